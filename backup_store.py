@@ -0,0 +1,172 @@
+"""
+Content-addressed configuration backup store for the POC Helper Menu tool.
+
+Configurations are stored once per unique content as gzip blobs named by their
+sha256 hash. Every backup run adds a row to the config_backups table, so unchanged
+configurations are recorded as a pointer to the existing blob instead of being
+written again.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from datetime import datetime
+from models import ConfigBackup, Session
+
+
+# Default root directory of the backup store
+BACKUP_STORE_DIR = "config_backups"
+
+# Serializes history writes coming from concurrent backup workers
+store_lock = threading.Lock()
+
+
+def config_hash(config_text):
+    """Return the sha256 hex digest used to address a configuration."""
+    return hashlib.sha256(config_text.encode("utf-8")).hexdigest()
+
+
+def blob_path_for(content_hash, store_dir=None):
+    """Return the path of the compressed blob for a content hash."""
+    store_dir = store_dir or BACKUP_STORE_DIR
+    return os.path.join(store_dir, "objects", content_hash[:2], f"{content_hash}.gz")
+
+
+def write_blob(config_text, blob_path):
+    """Write a compressed blob atomically, skipping it if it already exists."""
+    if os.path.exists(blob_path):
+        return False
+    
+    blob_dir = os.path.dirname(blob_path)
+    os.makedirs(blob_dir, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=blob_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw_file:
+            with gzip.GzipFile(fileobj=raw_file, mode="wb", mtime=0) as gz_file:
+                gz_file.write(config_text.encode("utf-8"))
+        os.replace(temp_path, blob_path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    return True
+
+
+def store_config(lab_name, hostname, config_text, store_dir=None, fingerprint=None):
+    """
+    Record a configuration backup for a host.
+    
+    Returns:
+        Tuple of (ConfigBackup record, changed) where changed is False when the
+        configuration matches the previous backup of the host
+    """
+    content_hash = config_hash(config_text)
+    blob_path = blob_path_for(content_hash, store_dir)
+    
+    with store_lock:
+        write_blob(config_text, blob_path)
+        
+        db = Session(expire_on_commit=False)
+        try:
+            latest = get_latest_backup(lab_name, hostname, db=db)
+            changed = latest is None or latest.content_hash != content_hash
+            record = ConfigBackup(
+                lab_name=lab_name,
+                hostname=hostname,
+                content_hash=content_hash,
+                blob_path=blob_path,
+                size=len(config_text.encode("utf-8")),
+                changed=changed,
+                fingerprint=fingerprint,
+                created_at=datetime.now(),
+            )
+            db.add(record)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    return record, changed
+
+
+def record_unchanged(latest, fingerprint=None):
+    """Record a backup that points at the blob of the previous backup without fetching it."""
+    with store_lock:
+        db = Session(expire_on_commit=False)
+        try:
+            record = ConfigBackup(
+                lab_name=latest.lab_name,
+                hostname=latest.hostname,
+                content_hash=latest.content_hash,
+                blob_path=latest.blob_path,
+                size=latest.size,
+                changed=False,
+                fingerprint=fingerprint,
+                created_at=datetime.now(),
+            )
+            db.add(record)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    
+    return record
+
+
+def history_query(db, lab_name, hostname):
+    """Return a query for the backup records of a host, newest first."""
+    return (
+        db.query(ConfigBackup)
+        .filter_by(lab_name=lab_name, hostname=hostname)
+        .order_by(ConfigBackup.created_at.desc(), ConfigBackup.id.desc())
+    )
+
+
+def get_latest_backup(lab_name, hostname, db=None):
+    """Return the most recent backup record for a host, or None."""
+    if db is not None:
+        return history_query(db, lab_name, hostname).first()
+    
+    db = Session(expire_on_commit=False)
+    try:
+        return history_query(db, lab_name, hostname).first()
+    finally:
+        db.close()
+
+
+def get_last_change(lab_name, hostname):
+    """Return the most recent backup record where the configuration changed, or None."""
+    db = Session(expire_on_commit=False)
+    try:
+        return history_query(db, lab_name, hostname).filter_by(changed=True).first()
+    finally:
+        db.close()
+
+
+def get_host_history(lab_name, hostname, limit=None):
+    """Return backup records for a host, newest first."""
+    db = Session(expire_on_commit=False)
+    try:
+        query = history_query(db, lab_name, hostname)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+    finally:
+        db.close()
+
+
+def read_config(record):
+    """Return the configuration text a backup record points at."""
+    with gzip.open(record.blob_path, "rt", encoding="utf-8") as gz_file:
+        return gz_file.read()
+
+
+def export_config(record, filepath):
+    """Write the configuration of a backup record to a plain text file."""
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(read_config(record))
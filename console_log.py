@@ -0,0 +1,304 @@
+"""
+Console session capture and search for the POC Helper Menu tool.
+
+Everything received on a console is appended to per-host log segments under
+CONSOLE_LOG_DIR/<lab>/<host>/. Segments rotate at CONSOLE_SEGMENT_SIZE bytes and
+only the newest CONSOLE_MAX_SEGMENTS are kept, so each host's log is bounded.
+Every line is also added to a SQLite FTS5 index, which search_console_logs uses
+to find the most recent matches without reading the logs themselves.
+
+Console loops only hand data to a queue. Writing and indexing happen on a
+background thread, so capture never slows the interactive session.
+"""
+
+import atexit
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+
+CONSOLE_LOG_DIR = "console_logs"
+CONSOLE_SEGMENT_SIZE = 4 * 1024 * 1024
+CONSOLE_MAX_SEGMENTS = 8
+# Chunks waiting for the writer; when full, new output is dropped rather than blocking
+CONSOLE_QUEUE_SIZE = 10000
+# Seconds between index commits while output is flowing
+INDEX_COMMIT_INTERVAL = 1.0
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+
+log_queue = queue.Queue(maxsize=CONSOLE_QUEUE_SIZE)
+writer_thread = None
+writer_lock = threading.Lock()
+dropped_chunks = 0
+
+
+def index_path(log_dir=None):
+    """Return the path of the search index database."""
+    return os.path.join(log_dir or CONSOLE_LOG_DIR, "index.db")
+
+
+def open_index(log_dir=None):
+    """Open the search index, creating it if needed. Returns None without FTS5 support."""
+    os.makedirs(log_dir or CONSOLE_LOG_DIR, exist_ok=True)
+    connection = sqlite3.connect(index_path(log_dir))
+    try:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS console_lines USING fts5("
+            "line, lab_name UNINDEXED, hostname UNINDEXED, segment UNINDEXED, "
+            "offset UNINDEXED, logged_at UNINDEXED)"
+        )
+    except sqlite3.OperationalError as e:
+        print(f"Console log search index unavailable: {e}")
+        connection.close()
+        return None
+    return connection
+
+
+def host_log_dir(lab_name, hostname, log_dir=None):
+    """Return the directory holding one host's log segments."""
+    return os.path.join(log_dir or CONSOLE_LOG_DIR, lab_name, hostname)
+
+
+def segment_path(lab_name, hostname, segment, log_dir=None):
+    """Return the path of a numbered log segment."""
+    return os.path.join(host_log_dir(lab_name, hostname, log_dir), f"segment-{segment:06d}.log")
+
+
+def list_segments(lab_name, hostname, log_dir=None):
+    """Return the segment numbers present for a host, oldest first."""
+    directory = host_log_dir(lab_name, hostname, log_dir)
+    if not os.path.isdir(directory):
+        return []
+    segments = []
+    for name in os.listdir(directory):
+        match = re.fullmatch(r"segment-(\d+)\.log", name)
+        if match:
+            segments.append(int(match.group(1)))
+    return sorted(segments)
+
+
+def clean_line(raw_line):
+    """Decode a captured line for indexing, dropping CR and terminal escape sequences."""
+    text = raw_line.decode("utf-8", errors="replace").replace("\r", "")
+    return ANSI_ESCAPE.sub("", text).strip()
+
+
+class HostLog:
+    """Open segment and pending partial line of one host, owned by the writer thread."""
+
+    def __init__(self, lab_name, hostname, log_dir=None):
+        self.lab_name = lab_name
+        self.hostname = hostname
+        self.log_dir = log_dir
+        os.makedirs(host_log_dir(lab_name, hostname, log_dir), exist_ok=True)
+        segments = list_segments(lab_name, hostname, log_dir)
+        self.segment = segments[-1] if segments else 1
+        self.file = open(segment_path(lab_name, hostname, self.segment, log_dir), "ab")
+        self.offset = self.file.tell()
+        self.partial_line = b""
+        self.partial_offset = self.offset
+
+    def index_line(self, raw_line, offset, index):
+        """Add one captured line to the search index."""
+        text = clean_line(raw_line)
+        if text and index is not None:
+            index.execute(
+                "INSERT INTO console_lines (line, lab_name, hostname, segment, offset, logged_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (text, self.lab_name, self.hostname, self.segment, offset, time.time()),
+            )
+
+    def append(self, data, index):
+        """Write data to the current segment, rotating it once full, and index every completed line."""
+        # Rotate only at a line boundary so no line spans two segments: once the
+        # segment is full, the chunk is split after its last newline and the rest
+        # starts the next segment
+        if self.offset + len(data) >= CONSOLE_SEGMENT_SIZE:
+            split = data.rfind(b"\n") + 1
+            if split:
+                self.write(data[:split], index)
+                self.rotate(index)
+                data = data[split:]
+        if data:
+            self.write(data, index)
+
+    def write(self, data, index):
+        """Write data to the current segment and index every completed line."""
+        self.file.write(data)
+        self.partial_line += data
+        lines = self.partial_line.split(b"\n")
+        self.partial_line = lines.pop()
+        line_offset = self.partial_offset
+        for raw_line in lines:
+            self.index_line(raw_line, line_offset, index)
+            line_offset += len(raw_line) + 1
+        self.partial_offset = line_offset
+        self.offset += len(data)
+
+    def rotate(self, index):
+        """Start a new segment and drop the oldest ones beyond CONSOLE_MAX_SEGMENTS."""
+        self.file.close()
+        self.segment += 1
+        self.file = open(segment_path(self.lab_name, self.hostname, self.segment, self.log_dir), "ab")
+        self.offset = 0
+        self.partial_offset = 0
+        for old_segment in list_segments(self.lab_name, self.hostname, self.log_dir)[:-CONSOLE_MAX_SEGMENTS]:
+            os.unlink(segment_path(self.lab_name, self.hostname, old_segment, self.log_dir))
+            if index is not None:
+                index.execute(
+                    "DELETE FROM console_lines WHERE lab_name = ? AND hostname = ? AND segment = ?",
+                    (self.lab_name, self.hostname, old_segment),
+                )
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self, index):
+        """Close the segment, indexing a trailing line that never got its newline."""
+        if self.partial_line:
+            self.index_line(self.partial_line, self.partial_offset, index)
+        self.file.close()
+
+
+def run_writer(log_dir=None):
+    """Writer thread: drain the queue into segments and the index until a None arrives."""
+    index = open_index(log_dir)
+    host_logs = {}
+    last_commit = time.monotonic()
+    try:
+        while True:
+            try:
+                item = log_queue.get(timeout=INDEX_COMMIT_INTERVAL)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                lab_name, hostname, data = item
+                key = (lab_name, hostname)
+                if key not in host_logs:
+                    host_logs[key] = HostLog(lab_name, hostname, log_dir)
+                host_logs[key].append(data, index)
+            # Commit in batches, and promptly once the queue goes quiet
+            if time.monotonic() - last_commit >= INDEX_COMMIT_INTERVAL or log_queue.empty():
+                for host_log in host_logs.values():
+                    host_log.flush()
+                if index is not None:
+                    index.commit()
+                last_commit = time.monotonic()
+    finally:
+        for host_log in host_logs.values():
+            host_log.close(index)
+        if index is not None:
+            index.commit()
+            index.close()
+
+
+def start_writer():
+    """Start the background writer thread if it is not running yet."""
+    global writer_thread
+    with writer_lock:
+        if writer_thread is None or not writer_thread.is_alive():
+            writer_thread = threading.Thread(target=run_writer, name="console-log-writer", daemon=True)
+            writer_thread.start()
+
+
+def log_console_output(lab_name, hostname, data):
+    """
+    Queue console output for capture. Never blocks: if the writer falls behind and
+    the queue is full, the chunk is dropped and counted in dropped_chunks.
+    """
+    global dropped_chunks
+    if not data:
+        return
+    start_writer()
+    try:
+        log_queue.put_nowait((lab_name, hostname, data))
+    except queue.Full:
+        dropped_chunks += 1
+
+
+def close_console_logs(timeout=5):
+    """Flush everything queued so far and stop the writer thread."""
+    global writer_thread
+    with writer_lock:
+        if writer_thread is None or not writer_thread.is_alive():
+            return
+        log_queue.put(None)
+        writer_thread.join(timeout)
+        writer_thread = None
+
+
+atexit.register(close_console_logs)
+
+
+def search_console_logs(text, lab_name=None, hostname=None, limit=20, log_dir=None):
+    """
+    Find the most recent captured lines containing the words of text, as a phrase.
+
+    Returns:
+        List of dicts (line, lab_name, hostname, segment, offset, logged_at), newest first
+    """
+    index = open_index(log_dir)
+    if index is None:
+        return []
+    phrase = '"' + text.replace('"', '""') + '"'
+    query = (
+        "SELECT line, lab_name, hostname, segment, offset, logged_at FROM console_lines "
+        "WHERE console_lines MATCH ?"
+    )
+    params = [f"line : {phrase}"]
+    if lab_name:
+        query += " AND lab_name = ?"
+        params.append(lab_name)
+    if hostname:
+        query += " AND hostname = ?"
+        params.append(hostname)
+    query += " ORDER BY logged_at DESC, rowid DESC LIMIT ?"
+    params.append(limit)
+    try:
+        rows = index.execute(query, params).fetchall()
+    except sqlite3.OperationalError as e:
+        print(f"Invalid search: {e}")
+        rows = []
+    finally:
+        index.close()
+    columns = ["line", "lab_name", "hostname", "segment", "offset", "logged_at"]
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def read_context(match, before=5, after=20, log_dir=None):
+    """
+    Return the captured lines around a search match, read directly from its segment.
+
+    Returns:
+        List of text lines, or [] if the segment has since been rotated away
+    """
+    path = segment_path(match["lab_name"], match["hostname"], match["segment"], log_dir)
+    try:
+        with open(path, "rb") as f:
+            # Read a window around the match instead of the whole segment
+            window_start = max(0, match["offset"] - 200 * before)
+            f.seek(window_start)
+            head = f.read(match["offset"] - window_start)
+            tail_lines = []
+            for _ in range(after + 1):
+                line = f.readline()
+                if not line:
+                    break
+                tail_lines.append(line)
+    except OSError:
+        return []
+    head_lines = head.split(b"\n")
+    if window_start > 0:
+        head_lines = head_lines[1:]  # first line may be cut off by the window
+    head_lines = [line for line in head_lines if line][-before:] if before else []
+    return [
+        line.decode("utf-8", errors="replace").rstrip("\r\n")
+        for line in head_lines + tail_lines
+    ]
@@ -0,0 +1,286 @@
+"""
+Multi-console monitor for the POC Helper Menu tool.
+
+Opens the telnet consoles of many hosts concurrently in one asyncio event loop.
+Their output is interleaved line by line with a per-host prefix and captured in
+the per-host console logs (see console_log). Lines typed at the monitor prompt
+can be broadcast to a chosen subset of the consoles.
+
+Monitor commands:
+    :targets <patterns>  set the hosts that typed lines are sent to (e.g. "r1,core*"
+                         or "all"; "none" clears the targets)
+    @<patterns> <text>   send text once to the matching hosts
+    :list                show the sessions and current targets
+    :quit                close every console and leave the monitor
+Any other line (including an empty one) is sent to the current targets.
+"""
+
+import asyncio
+import codecs
+import fnmatch
+import os
+import sys
+import console_log
+from device_actions import parse_console_address
+
+
+# Telnet protocol bytes (RFC 854)
+IAC = 255
+DONT = 254
+DO = 253
+WONT = 252
+WILL = 251
+SB = 250
+SE = 240
+ECHO = 1
+SUPPRESS_GO_AHEAD = 3
+
+CONNECT_TIMEOUT = 10
+# Seconds without new data before a partial line (such as a login prompt) is shown
+PARTIAL_LINE_DELAY = 0.5
+
+
+class ConsoleSession:
+    """State of one monitored console: connection, telnet parser and line buffer."""
+
+    def __init__(self, host, prefix):
+        self.lab_name = host.lab_name
+        self.hostname = host.hostname
+        self.address = parse_console_address(host.console)
+        self.prefix = prefix
+        self.reader = None
+        self.writer = None
+        self.connected = False
+        self.partial_line = b""
+        self.telnet_state = None
+        self.telnet_command = None
+
+    def filter_telnet(self, data):
+        """
+        Strip telnet commands from received data and answer option negotiation.
+
+        Echo and suppress-go-ahead offered by the server are accepted; every other
+        option is refused. State is kept between calls, so a command split across
+        two reads is handled.
+        """
+        output = bytearray()
+        replies = bytearray()
+        for byte in data:
+            state = self.telnet_state
+            if state is None:
+                if byte == IAC:
+                    self.telnet_state = "iac"
+                else:
+                    output.append(byte)
+            elif state == "iac":
+                if byte == IAC:
+                    output.append(IAC)  # escaped 255 data byte
+                    self.telnet_state = None
+                elif byte in (DO, DONT, WILL, WONT):
+                    self.telnet_command = byte
+                    self.telnet_state = "option"
+                elif byte == SB:
+                    self.telnet_state = "subnegotiation"
+                else:
+                    self.telnet_state = None
+            elif state == "option":
+                if self.telnet_command == DO:
+                    replies += bytes([IAC, WONT, byte])
+                elif self.telnet_command == WILL:
+                    answer = DO if byte in (ECHO, SUPPRESS_GO_AHEAD) else DONT
+                    replies += bytes([IAC, answer, byte])
+                self.telnet_state = None
+            elif state == "subnegotiation":
+                if byte == IAC:
+                    self.telnet_state = "subnegotiation-iac"
+            elif state == "subnegotiation-iac":
+                self.telnet_state = None if byte == SE else "subnegotiation"
+        if replies and self.writer:
+            self.writer.write(bytes(replies))
+        return bytes(output)
+
+    def emit(self, data, flush=False):
+        """Capture received data and print every complete line with the host prefix."""
+        console_log.log_console_output(self.lab_name, self.hostname, data)
+        self.partial_line += data
+        lines = self.partial_line.split(b"\n")
+        self.partial_line = lines.pop()
+        if flush and self.partial_line:
+            lines.append(self.partial_line)
+            self.partial_line = b""
+        for line in lines:
+            text = line.rstrip(b"\r").decode("utf-8", errors="replace")
+            print(f"{self.prefix} {text}", flush=True)
+
+    def send(self, text):
+        """Send a line of input to the console, escaping IAC bytes."""
+        if not self.connected:
+            return False
+        data = text.encode("utf-8").replace(bytes([IAC]), bytes([IAC, IAC]))
+        self.writer.write(data + b"\r\n")
+        return True
+
+    async def run(self):
+        """Connect and relay console output until the connection closes."""
+        host, port = self.address
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), CONNECT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"{self.prefix} *** failed to connect to {host}:{port}: timed out", flush=True)
+            return
+        except OSError as e:
+            print(f"{self.prefix} *** failed to connect to {host}:{port}: {e}", flush=True)
+            return
+
+        self.connected = True
+        print(f"{self.prefix} *** connected to {host}:{port}", flush=True)
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(self.reader.read(4096), PARTIAL_LINE_DELAY)
+                except asyncio.TimeoutError:
+                    # Nothing new for a moment: show a pending prompt without its newline
+                    if self.partial_line:
+                        self.emit(b"", flush=True)
+                    continue
+                if not data:
+                    break
+                self.emit(self.filter_telnet(data))
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.emit(b"", flush=True)
+            self.connected = False
+            print(f"{self.prefix} *** connection closed", flush=True)
+            self.close()
+
+    def close(self):
+        """Close the connection."""
+        if self.writer:
+            self.writer.close()
+
+
+def match_sessions(sessions, patterns):
+    """Return the sessions whose hostname matches any comma-separated pattern."""
+    names = [name.strip() for name in patterns.split(",") if name.strip()]
+    if "all" in names:
+        return list(sessions)
+    return [
+        session for session in sessions
+        if any(fnmatch.fnmatch(session.hostname, name) for name in names)
+    ]
+
+
+def handle_command(line, sessions, targets):
+    """
+    Act on one line typed at the monitor prompt.
+
+    Returns:
+        (targets, keep_running) after the command
+    """
+    stripped = line.strip()
+    if stripped == ":quit":
+        return targets, False
+    if stripped == ":list":
+        target_names = {session.hostname for session in targets}
+        for session in sessions:
+            state = "connected" if session.connected else "closed"
+            marker = " (target)" if session.hostname in target_names else ""
+            print(f"  {session.hostname}: {state}{marker}")
+        return targets, True
+    if stripped.startswith(":targets"):
+        patterns = stripped[len(":targets"):].strip()
+        targets = [] if patterns == "none" else match_sessions(sessions, patterns)
+        print(f"Sending to: {', '.join(s.hostname for s in targets) or 'nobody'}")
+        return targets, True
+    if stripped.startswith("@"):
+        patterns, _, text = stripped[1:].partition(" ")
+        recipients = match_sessions(sessions, patterns)
+    else:
+        recipients = targets
+        text = line
+    if not recipients:
+        print("No target hosts; use :targets <hosts> or @<hosts> <text>.")
+        return targets, True
+    sent = [session.hostname for session in recipients if session.send(text)]
+    if len(sent) < len(recipients):
+        print(f"Sent to {len(sent)} of {len(recipients)} hosts (others are disconnected).")
+    return targets, True
+
+
+async def run_monitor(hosts):
+    """Run every console session plus the input handler until :quit or all sessions end."""
+    width = max(len(host.hostname) for host in hosts)
+    sessions = [ConsoleSession(host, f"[{host.hostname:<{width}}]") for host in hosts]
+    session_tasks = [asyncio.create_task(session.run()) for session in sessions]
+
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+    stdin_fd = sys.stdin.fileno()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    partial = ""
+
+    def read_input():
+        nonlocal partial
+        # Read whatever is available rather than one line per wakeup, so every line
+        # of a paste is handled at once instead of waiting for more input
+        data = os.read(stdin_fd, 4096)
+        if not data:
+            if partial:
+                lines.put_nowait(partial)
+            lines.put_nowait(None)
+            loop.remove_reader(stdin_fd)
+            return
+        *complete, partial = (partial + decoder.decode(data)).split("\n")
+        for line in complete:
+            lines.put_nowait(line)
+
+    loop.add_reader(stdin_fd, read_input)
+    targets = []
+    running = set(session_tasks)
+    try:
+        while running:
+            line_task = asyncio.ensure_future(lines.get())
+            done, _ = await asyncio.wait(
+                [line_task, *running], return_when=asyncio.FIRST_COMPLETED
+            )
+            running -= done
+            if line_task not in done:
+                line_task.cancel()
+                continue
+            line = line_task.result()
+            if line is None:
+                break
+            targets, keep_running = handle_command(line, sessions, targets)
+            if not keep_running:
+                break
+    finally:
+        loop.remove_reader(stdin_fd)
+        for task in session_tasks:
+            task.cancel()
+        await asyncio.gather(*session_tasks, return_exceptions=True)
+        for session in sessions:
+            session.close()
+
+
+def monitor_consoles(hosts, lab_name):
+    """
+    Watch the telnet consoles of several hosts of a lab at once.
+
+    Output is captured per host in the console logs, where it can be searched later.
+    """
+    hosts = [host for host in hosts if host.console and host.console.strip()]
+    if not hosts:
+        print("No hosts with a console address selected.")
+        return
+
+    print(f"Lab {lab_name}: console output is captured to {console_log.CONSOLE_LOG_DIR}/{lab_name}/.")
+    print(f"Monitoring {len(hosts)} consoles. Type :targets <hosts> to choose where input goes,")
+    print("@<hosts> <text> to send once, :list to show sessions and :quit to leave.")
+    try:
+        asyncio.run(run_monitor(hosts))
+    except KeyboardInterrupt:
+        pass
+    print("Console monitor closed.")
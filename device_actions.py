@@ -1,18 +1,34 @@
 """Device connection and configuration backup functions for the POC Helper Menu tool."""
 
+import atexit
+import functools
 import getpass
+import hashlib
+import json
 import os
+import shlex
+import stat
 import subprocess
 import tempfile
 import threading
 import time
+import selectors
 import sys
-import select
+import termios
+import tty
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
+from typing import Optional
 from netmiko._telnetlib import telnetlib
 from napalm import get_network_driver
+from tabulate import tabulate
 from models import Host, Link, Lab, session
+import backup_store
+import console_log
+import docker_api
 import warnings
 # This is to suppress the deprecation warning from pkg_resources being used by NAPALM
 # until NAPALM fixes it in their codebase.
@@ -28,6 +44,44 @@ NETWORK_OS_TO_NAPALM_DRIVER = {
     'junos': 'junos',
 }
 
+# Cheap commands whose output changes whenever the configuration changes. Used to skip
+# the full get_config() transfer when the device reports no change since the last backup.
+# Network OSes without an entry always fall back to a full backup.
+CONFIG_FINGERPRINT_COMMANDS = {
+    'junos': 'show system commit',
+    'iosxr': 'show configuration commit list 1',
+    'ios': 'show running-config | include ^! Last configuration change',
+}
+
+# Persistent NAPALM sessions shared by all operations in one menu session
+NAPALM_IDLE_TIMEOUT = 300  # Seconds an unused session is kept open
+napalm_pool = {}  # (lab_name, hostname) -> pooled session entry
+napalm_pool_lock = threading.Lock()
+
+# Shared SSH master connections for remote containerlab hosts
+# Kept under the home directory: a predictable /tmp path could be created first by
+# another local user, who would then control the master sockets
+SSH_CONTROL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "poc_helper", "ssh")
+SSH_CONTROL_PATH = os.path.join(SSH_CONTROL_DIR, "%C")  # %C is a hash of user, host and port
+SSH_CONTROL_PERSIST = 600  # Seconds a master stays up after its last session
+SSH_CONNECTION_FAILED = 255  # ssh exit status for connection/authentication errors
+ssh_masters = set()  # Remote targets that may have a master started by this process
+unsafe_control_dirs = set()  # Control directories already warned about
+
+# Ctrl+] ends a console session, as in the telnet client
+CONSOLE_ESCAPE = b"\x1d"
+
+# Concurrency settings for bulk configuration backups
+BACKUP_MAX_WORKERS = 10
+BACKUP_HOST_TIMEOUT = 60  # Seconds allowed for each NAPALM session
+# Seconds run_host_jobs waits for jobs over their time limit before returning
+JOB_SHUTDOWN_GRACE = 5
+job_state = threading.local()  # cancel event of the run_host_jobs job on this thread
+
+# Concurrency settings for running one command across many hosts
+COMMAND_MAX_WORKERS = 20
+COMMAND_HOST_TIMEOUT = 30  # Seconds allowed for the command on each host
+
 
 def connect_to_host(hostname, command=None):
     """Function to connect to a host via SSH or docker exec for containerlab Linux containers."""
@@ -98,7 +152,7 @@ def connect_to_host(hostname, command=None):
 
 def connect_to_containerlab_host(host, lab, command=None):
     """Connect to a containerlab Linux container using docker exec."""
-    container_name = host.hostname
+    container_name = host.container_name or host.hostname
     
     if command:
         # Execute a specific command
@@ -126,20 +180,30 @@ def connect_to_containerlab_host(host, lab, command=None):
                 print(f"Failed to execute command on remote container {container_name}")
         else:
             # For interactive shell, need to use SSH with -t flag
-            remote_command = f"ssh -t {remote_host} '{docker_command}'"
+            control_args = ssh_control_args(remote_host)
+            remote_command = f"ssh -t {control_args} {remote_host} '{docker_command}'"
             
             # Try SSH key authentication first
             try:
                 result = subprocess.run(remote_command, shell=True, check=False)
-                if result.returncode != 0:
+                if result.returncode == SSH_CONNECTION_FAILED:
                     # SSH key failed, try with password
                     print("SSH key authentication failed, trying password authentication...")
                     password = getpass.getpass(f"Enter password for {remote_host}: ")
                     remote_command_with_pass = f"sshpass -p '{password}' \
-                        ssh -t -o StrictHostKeyChecking=no {remote_host} '{docker_command}'"
+                        ssh -t {control_args} -o StrictHostKeyChecking=no {remote_host} '{docker_command}'"
                     subprocess.run(remote_command_with_pass, shell=True, check=False)
             except Exception as e:
                 print(f"Failed to connect to remote container: {e}")
+    elif command and docker_api.docker_api_available():
+        # Local command through the Engine API, without starting the docker CLI
+        result = docker_api.exec_in_container(container_name, command)
+        if result["stdout"]:
+            print(result["stdout"], end="")
+        if result["stderr"]:
+            print(result["stderr"], end="", file=sys.stderr)
+        if result["returncode"] != 0:
+            print(f"Command on container {container_name} exited with status {result['returncode']}")
     else:
         # Local execution
         print(f"Connecting to container {container_name} locally...")
@@ -149,11 +213,125 @@ def connect_to_containerlab_host(host, lab, command=None):
             print(f"Failed to connect to container: {e}")
 
 
+def parse_console_address(console):
+    """Split a console address into (host, port); the port defaults to telnet's 23."""
+    console_parts = console.split(':')
+    if len(console_parts) == 2:
+        return console_parts[0], int(console_parts[1])
+    return console, 23  # Default telnet port
+
+
+def write_all(fd, data):
+    """Write all of data to a file descriptor."""
+    while data:
+        written = os.write(fd, data)
+        data = data[written:]
+
+
+def run_console_session(tn, stdin_fd, stdout_fd, raw_input=True, on_output=None):
+    """
+    Relay bytes between a telnet connection and the terminal until the user exits.
+    
+    A single selector waits on both the telnet socket and stdin, so nothing runs
+    while the console is idle and output is written the moment it arrives. Input is
+    forwarded byte by byte; in raw mode Enter is sent as CR NUL as telnet expects.
+    
+    The session ends on Ctrl+], on QUIT typed on its own line, or when the remote
+    side closes the connection. Returns a short reason.
+    
+    on_output, if given, is called with every chunk received from the device after
+    it has been written to the terminal; it must not block.
+    """
+    selector = selectors.DefaultSelector()
+    selector.register(tn.get_socket(), selectors.EVENT_READ, "telnet")
+    selector.register(stdin_fd, selectors.EVENT_READ, "stdin")
+    line_filter = QuitLineFilter()
+    
+    def send(data):
+        if data:
+            tn.write(data.replace(b"\r", b"\r\0") if raw_input else data)
+    
+    try:
+        while True:
+            for key, _ in selector.select():
+                if key.data == "telnet":
+                    try:
+                        # Only called when the socket is readable, so this never spins
+                        data = tn.read_very_eager()
+                    except EOFError:
+                        return "connection closed by remote host"
+                    if data:
+                        write_all(stdout_fd, data)
+                        if on_output:
+                            on_output(data)
+                    continue
+                
+                data = os.read(stdin_fd, 1024)
+                if not data:
+                    return "end of input"
+                if CONSOLE_ESCAPE in data:
+                    forward, _ = line_filter.feed(data.split(CONSOLE_ESCAPE, 1)[0])
+                    send(forward)
+                    return "escape character"
+                
+                forward, quit_typed = line_filter.feed(data)
+                send(forward)
+                if quit_typed:
+                    return "QUIT"
+    finally:
+        selector.close()
+
+
+class QuitLineFilter:
+    """
+    Spot QUIT typed on its own line without sending it to the device.
+    
+    Keystrokes at the start of a line are held back only while they spell a
+    prefix of QUIT (upper case, no whitespace) and are forwarded as soon as the
+    line can no longer match; a held line that is QUIT when Enter is pressed ends
+    the session instead. Backspace edits held keystrokes locally. Matching is
+    case-sensitive so that space, Tab and q reach a pager or the CLI at once.
+    """
+    
+    def __init__(self):
+        self.held = b""
+        self.forwarding = False  # Part of the current line was already sent
+    
+    def feed(self, data):
+        """
+        Process typed bytes.
+        
+        Returns:
+            (bytes to send to the device, True if QUIT was entered)
+        """
+        forward = bytearray()
+        for value in data:
+            byte = bytes([value])
+            if byte in (b"\r", b"\n"):
+                if not self.forwarding and self.held == b"QUIT":
+                    self.held = b""
+                    return bytes(forward), True
+                forward += self.held + byte
+                self.held = b""
+                self.forwarding = False
+            elif byte in (b"\x7f", b"\x08") and self.held:
+                self.held = self.held[:-1]
+            elif not self.forwarding and b"QUIT".startswith(self.held + byte):
+                self.held += byte
+            else:
+                forward += self.held + byte
+                self.held = b""
+                self.forwarding = True
+        return bytes(forward), False
+
+
 def connect_to_console(host):
     """
     Connect to a hardware device console using telnet via netmiko.
     
-    has custom exit handling because ctrl + ] doesn't work in some terminals.
+    The terminal is put in raw mode so control sequences and pastes reach the device
+    unchanged. Exit with Ctrl+] or by typing QUIT on its own line; Ctrl+C is sent to
+    the device like any other key.
     """
     
     if not host.console:
@@ -162,142 +340,428 @@ def connect_to_console(host):
         return
     
     # Parse console address - it might be host:port
-    console_parts = host.console.split(':')
-    if len(console_parts) == 2:
-        console_host = console_parts[0]
-        console_port = int(console_parts[1])
-    else:
-        console_host = host.console
-        console_port = 23  # Default telnet port
+    console_host, console_port = parse_console_address(host.console)
     
     print(f"Connecting to console {console_host}:{console_port} for {host.hostname}...")
     
+    tn = telnetlib.Telnet()
     try:
-        tn = telnetlib.Telnet()
         tn.open(console_host, console_port, timeout=10)
-        print(f"Connected to {console_host}:{console_port}")
-        print("=" * 50)
-        print("TELNET CONSOLE SESSION")
-        print("Multiple ways to exit:")
-        print("1. Type 'QUIT' on a new line")
-        print("2. Press Ctrl+C to interrupt")
-        print("3. Use Ctrl+] then type 'quit' at telnet prompt")
-        print("=" * 50)
-        
-        # Custom interactive session with better exit handling
-        
-        # Flag to control the session
-        session_active = True
-        
-        def read_from_telnet():
-            """Read data from telnet connection and display it."""
-            while session_active:
-                try:
-                    # Use a short timeout for non-blocking reads
-                    data = tn.read_very_eager()
-                    if data:
-                        sys.stdout.write(data.decode('utf-8', errors='ignore'))
-                        sys.stdout.flush()
-                    else:
-                        time.sleep(0.01)  # Small delay to prevent high CPU usage
-                except Exception:
-                    break
-        
-        # Start the read thread
-        read_thread = threading.Thread(target=read_from_telnet, daemon=True)
-        read_thread.start()
-        
-        try:
-            while session_active:
-                # Check if there's input available
-                if sys.stdin in select.select([sys.stdin], [], [], 0.1)[0]:
-                    user_input = sys.stdin.readline()
-                    
-                    # Check for exit commands
-                    if user_input.strip().upper() == 'QUIT':
-                        print("\nExiting telnet session...")
-                        session_active = False
-                        break
-                    
-                    # Send input to telnet connection
-                    tn.write(user_input.encode('utf-8'))
-                
-        except KeyboardInterrupt:
-            print("\nTelnet session interrupted by user (Ctrl+C)")
-            session_active = False
-        except Exception as e:
-            print(f"\nTelnet session error: {e}")
-            session_active = False
-        
-        # Clean up
-        session_active = False
-        time.sleep(0.1)  # Give read thread time to exit
-        
     except Exception as e:
         print(f"Failed to connect to {console_host}:{console_port}: {e}")
         input("Press Enter to continue...")
+        return
+    
+    print(f"Connected to {console_host}:{console_port}")
+    print("=" * 50)
+    print("TELNET CONSOLE SESSION")
+    print("Ways to exit:")
+    print("1. Press Ctrl+]")
+    print("2. Type 'QUIT' on a new line")
+    print("=" * 50)
+    
+    stdin_fd = sys.stdin.fileno()
+    stdout_fd = sys.stdout.fileno()
+    sys.stdout.flush()
+    saved_attributes = None
+    if os.isatty(stdin_fd):
+        saved_attributes = termios.tcgetattr(stdin_fd)
+        tty.setraw(stdin_fd)
+    
+    reason = None
+    try:
+        reason = run_console_session(
+            tn, stdin_fd, stdout_fd,
+            raw_input=saved_attributes is not None,
+            # Captured on a background thread for later search
+            on_output=lambda data: console_log.log_console_output(host.lab_name, host.hostname, data),
+        )
+    except Exception as e:
+        reason = f"error: {e}"
     finally:
+        if saved_attributes is not None:
+            termios.tcsetattr(stdin_fd, termios.TCSADRAIN, saved_attributes)
         try:
             tn.close()
-        except:
+        except Exception:
             pass
-        print("\nTelnet session closed.")
+        print(f"\nTelnet session closed ({reason}).")
+
+
+def get_remote_target(remote_host, remote_username=None):
+    """Return the user@host SSH target for a remote host."""
+    username_part = f"{remote_username}@" if remote_username else ""
+    return f"{username_part}{remote_host}"
 
 
-def execute_remote_command(remote_host, remote_username, command, description="command"):
+def ensure_ssh_control_dir():
     """
-    Execute a command on a remote host with SSH key or password authentication.
+    Create SSH_CONTROL_DIR if needed and check that only we can use it: a real
+    directory owned by this user with mode 0700. Returns False (with a warning)
+    otherwise.
+    """
+    os.makedirs(SSH_CONTROL_DIR, mode=0o700, exist_ok=True)
+    info = os.lstat(SSH_CONTROL_DIR)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        if SSH_CONTROL_DIR not in unsafe_control_dirs:
+            print(f"Warning: {SSH_CONTROL_DIR} is not a directory owned by you; "
+                  f"not sharing SSH connections.")
+            unsafe_control_dirs.add(SSH_CONTROL_DIR)
+        return False
+    if stat.S_IMODE(info.st_mode) != 0o700:
+        os.chmod(SSH_CONTROL_DIR, 0o700)
+    return True
+
+
+def ssh_control_options(remote_target):
+    """
+    Return ssh/scp options that route a connection through the shared master
+    connection for remote_target.
     
+    The master is created lazily by the first connection (ControlMaster=auto), kept
+    alive in the background between calls and closed by close_ssh_masters at exit.
+    Returns no options (plain connections) if the control directory is not safe.
     """
-    username_part = f"{remote_username}@" if remote_username else ""
-    remote_target = f"{username_part}{remote_host}"
+    if not ensure_ssh_control_dir():
+        return []
+    ssh_masters.add(remote_target)
+    return [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={SSH_CONTROL_PATH}",
+        "-o", f"ControlPersist={SSH_CONTROL_PERSIST}",
+    ]
+
+
+def ssh_control_args(remote_target):
+    """Return ssh_control_options as a string for shell command lines."""
+    return " ".join(shlex.quote(option) for option in ssh_control_options(remote_target))
+
+
+def close_ssh_masters():
+    """Tear down the master connections opened by this process."""
+    for remote_target in list(ssh_masters):
+        subprocess.run(
+            ["ssh", "-o", f"ControlPath={SSH_CONTROL_PATH}", "-O", "exit", remote_target],
+            capture_output=True,
+            check=False,
+        )
+    ssh_masters.clear()
+
+
+atexit.register(close_ssh_masters)
+
+
+@dataclass
+class RemoteCommandResult:
+    """
+    Outcome of a command run on a remote host over SSH.
+    
+    auth_method is "key" (including reuse of an open master connection), "password",
+    or None when no connection could be made. The result is truthy when the command
+    exited with status 0.
+    """
+    stdout: str = ""
+    stderr: str = ""
+    returncode: Optional[int] = None
+    duration: float = 0.0
+    auth_method: Optional[str] = None
     
-    # Try SSH key authentication first
-    remote_command = (
-        f"ssh -o PasswordAuthentication=no -o ConnectTimeout=10 {remote_target} '{command}'"
+    def __bool__(self):
+        return self.returncode == 0
+    
+    @property
+    def connected(self):
+        """True if the command reached the remote host, whatever its exit status."""
+        return self.auth_method is not None
+
+
+def run_ssh_command(remote_host, remote_username, remote_command, input_text=None,
+                    interactive=True, timeout=None):
+    """
+    Run remote_command on a remote host through the shared SSH master connection.
+    
+    Key authentication is tried first. Only with interactive set is the user asked
+    for a password when that fails; otherwise the call fails fast, which is what
+    unattended and parallel jobs need.
+    
+    Returns:
+        RemoteCommandResult
+    """
+    remote_target = get_remote_target(remote_host, remote_username)
+    control_options = ssh_control_options(remote_target)
+    start = time.monotonic()
+    
+    def run(argv, auth_method, env=None):
+        try:
+            completed = subprocess.run(
+                argv, input=input_text, capture_output=True, text=True, timeout=timeout,
+                env=env, check=False,
+                stdin=None if input_text is not None else subprocess.DEVNULL,
+            )
+        except subprocess.TimeoutExpired:
+            return RemoteCommandResult(
+                stderr=f"timed out after {timeout}s",
+                duration=time.monotonic() - start,
+                auth_method=auth_method,
+            )
+        return RemoteCommandResult(
+            stdout=completed.stdout,
+            stderr=completed.stderr,
+            returncode=completed.returncode,
+            duration=time.monotonic() - start,
+            auth_method=auth_method if completed.returncode != SSH_CONNECTION_FAILED else None,
+        )
+    
+    key_options = ["-o", "PasswordAuthentication=no", "-o", "ConnectTimeout=10"]
+    if not interactive:
+        key_options += ["-o", "BatchMode=yes"]
+    result = run(["ssh", *control_options, *key_options, remote_target, remote_command], "key")
+    if result.connected or not interactive:
+        return result
+    
+    # SSH key failed, try with password authentication (sshpass -e keeps it off the command line)
+    print("SSH key authentication failed, trying password authentication...")
+    password = getpass.getpass(f"Enter password for {remote_target}: ")
+    return run(
+        ["sshpass", "-e", "ssh", *control_options, "-o", "StrictHostKeyChecking=no",
+         remote_target, remote_command],
+        "password",
+        env=dict(os.environ, SSHPASS=password),
     )
-    print(f"Executing {description} remotely on {remote_target}: {command}")
+
+
+def execute_remote_command(remote_host, remote_username, command, description="command",
+                           interactive=True, timeout=None):
+    """
+    Execute a command on a remote host with SSH key or password authentication.
+    
+    Commands ride on the shared SSH master connection for the host, so only the first
+    call pays for the key exchange (and a password prompt, if one is needed). With
+    interactive=False nothing is printed or prompted for.
+    
+    Returns:
+        RemoteCommandResult, truthy if the command succeeded
+    """
+    remote_target = get_remote_target(remote_host, remote_username)
+    if interactive:
+        print(f"Executing {description} remotely on {remote_target}: {command}")
     
     try:
-        result = (
-            subprocess.run(remote_command, shell=True, check=False, capture_output=True, text=True)
+        result = run_ssh_command(
+            remote_host, remote_username, command, interactive=interactive, timeout=timeout
         )
-        if result.returncode == 0:
+    except Exception as e:
+        result = RemoteCommandResult(stderr=str(e))
+    
+    if interactive:
+        if result:
             print(f"Remote {description} executed successfully.")
-            return True
+            if result.stdout.strip():
+                print(result.stdout.rstrip())
+        elif not result.connected:
+            print(f"Failed to execute remote {description}: could not connect to {remote_target}.")
         else:
-            # SSH key failed, try with password authentication
-            print("SSH key authentication failed, trying password authentication...")
-            password = getpass.getpass(f"Enter password for {remote_target}: ")
-            remote_command_with_pass = (
-                f"sshpass -p '{password}' ssh -o StrictHostKeyChecking=no {remote_target} '{command}'"
+            print(f"Remote {description} failed: {result.stderr.strip()}")
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def get_napalm_driver_class(napalm_driver_name):
+    """Return the NAPALM driver class for a driver name, cached per process."""
+    return get_network_driver(napalm_driver_name)
+
+
+def evict_idle_napalm_sessions():
+    """Close pooled NAPALM sessions that have not been used for NAPALM_IDLE_TIMEOUT seconds."""
+    now = time.monotonic()
+    idle_entries = []
+    with napalm_pool_lock:
+        for key, entry in list(napalm_pool.items()):
+            # Only evict sessions nobody is using; holding the entry lock until the
+            # session is closed keeps a caller that found it earlier from using it
+            if now - entry["last_used"] > NAPALM_IDLE_TIMEOUT and entry["lock"].acquire(blocking=False):
+                idle_entries.append(napalm_pool.pop(key))
+    
+    for entry in idle_entries:
+        try:
+            if entry["device"] is not None:
+                entry["device"].close()
+        except Exception:
+            pass
+        finally:
+            entry["device"] = None
+            entry["lock"].release()
+
+
+def close_napalm_sessions():
+    """Close every pooled NAPALM session."""
+    with napalm_pool_lock:
+        entries = list(napalm_pool.values())
+        napalm_pool.clear()
+    
+    for entry in entries:
+        try:
+            entry["device"].close()
+        except Exception:
+            pass
+
+
+atexit.register(close_napalm_sessions)
+
+
+@contextmanager
+def napalm_session(host, napalm_driver_name, timeout=BACKUP_HOST_TIMEOUT):
+    """
+    Yield an open NAPALM device for a host, reusing a pooled session when possible.
+    
+    Sessions are keyed by (lab_name, hostname) and only used by one caller at a time.
+    A pooled session is health checked with is_alive() before reuse and reopened if
+    it is dead or the host's connection details changed. A session that raises is
+    dropped from the pool.
+    """
+    evict_idle_napalm_sessions()
+    
+    key = (host.lab_name, host.hostname)
+    params = (napalm_driver_name, host.ip_address, host.username, host.password)
+    
+    while True:
+        with napalm_pool_lock:
+            entry = napalm_pool.setdefault(
+                key, {"device": None, "params": None, "last_used": 0, "lock": threading.Lock()}
             )
-            result = subprocess.run(remote_command_with_pass, shell=True, check=False)
-            if result.returncode == 0:
-                print(f"Remote {description} executed successfully.")
-                return True
-            else:
-                print(f"Failed to execute remote {description} with password authentication.")
-                return False
-    except Exception as e:
-        print(f"Failed to execute remote {description}: {e}")
-        return False
+        # A job that timed out may still hold the session, so do not wait forever
+        if not entry["lock"].acquire(timeout=timeout if timeout else -1):
+            raise TimeoutError(f"NAPALM session of {host.hostname} is still in use by another job")
+        with napalm_pool_lock:
+            if napalm_pool.get(key) is entry:
+                break
+        # Evicted or dropped while we waited for it; start over with a fresh entry
+        entry["lock"].release()
+    
+    try:
+        device = entry["device"]
+        if device is not None:
+            alive = False
+            if entry["params"] == params:
+                try:
+                    alive = device.is_alive().get("is_alive", False)
+                except Exception:
+                    alive = False
+            if not alive:
+                try:
+                    device.close()
+                except Exception:
+                    pass
+                device = entry["device"] = None
+        
+        if device is None:
+            driver = get_napalm_driver_class(napalm_driver_name)
+            device = driver(
+                hostname=host.ip_address,
+                username=host.username,
+                password=host.password,
+                timeout=timeout,
+                optional_args={'port': 22}  # Default SSH port
+            )
+            print(f"Connecting to {host.hostname} ({host.ip_address})...")
+            device.open()
+            entry["device"] = device
+            entry["params"] = params
+        
+        try:
+            yield device
+        except Exception:
+            # The session may be broken, do not hand it out again
+            with napalm_pool_lock:
+                if napalm_pool.get(key) is entry:
+                    napalm_pool.pop(key)
+            entry["device"] = None
+            try:
+                device.close()
+            except Exception:
+                pass
+            raise
+        finally:
+            entry["last_used"] = time.monotonic()
+    finally:
+        entry["lock"].release()
 
 
-def backup_host_config(host, backup_dir=None):
-    """Function to backup the configuration of a host using NAPALM."""
-    print(f"Backing up configuration of {host.hostname}...")
+def get_config_fingerprint(device, network_os):
+    """
+    Return a hash of the device's cheap config fingerprint command output, or None
+    if the network OS has no fingerprint command or it could not be read.
+    """
+    command = CONFIG_FINGERPRINT_COMMANDS.get(network_os)
+    if not command:
+        return None
+    try:
+        output = device.cli([command]).get(command, "").strip()
+    except Exception:
+        return None
+    if not output:
+        return None
+    return hashlib.sha256(output.encode("utf-8")).hexdigest()
+
+
+def run_remote_script(remote_host, remote_username, script, description="script",
+                      interactive=True, timeout=None):
+    """
+    Run a shell script on a remote host in a single SSH session, feeding it to
+    'bash -s' on stdin so it needs no extra quoting.
+    
+    With interactive=False nothing is printed and no password is prompted for, which
+    is what background jobs need; they rely on key auth or an existing master connection.
     
-    # Default backup directory
-    if not backup_dir:
-        backup_dir = f"{host.lab_name}_config_backup"
+    Returns:
+        RemoteCommandResult; check .connected to tell connection failures from
+        scripts that ran and exited non-zero
+    """
+    remote_target = get_remote_target(remote_host, remote_username)
+    if interactive:
+        print(f"Executing {description} remotely on {remote_target}...")
     
-    # Ensure backup directory exists
     try:
-        os.makedirs(backup_dir, exist_ok=True)
+        result = run_ssh_command(
+            remote_host, remote_username, "bash -s", input_text=script,
+            interactive=interactive, timeout=timeout,
+        )
     except Exception as e:
-        print(f"Failed to create backup directory {backup_dir}: {e}")
-        return False
+        if interactive:
+            print(f"Failed to execute remote {description}: {e}")
+        return RemoteCommandResult(stderr=str(e))
+    
+    if interactive and not result.connected:
+        print(f"Failed to connect to {remote_target}.")
+    return result
+
+
+def ensure_ssh_master(lab):
+    """
+    Open the shared SSH master to the lab's remote containerlab host up front, so a
+    password prompt happens here rather than in worker threads.
+    
+    Returns:
+        True if connected (or the lab is local), False otherwise
+    """
+    if not lab.remote_containerlab_host:
+        return True
+    result = run_remote_script(
+        lab.remote_containerlab_host, lab.remote_containerlab_username, "true\n", "connection check"
+    )
+    return result.connected
+
+
+def backup_host_config(host, backup_dir=None, timeout=BACKUP_HOST_TIMEOUT, skip_unchanged=False):
+    """
+    Function to backup the configuration of a host using NAPALM.
+    
+    The configuration is recorded in the content-addressed backup store rooted at
+    backup_dir (backup_store.BACKUP_STORE_DIR by default). With skip_unchanged, the
+    device's config fingerprint is compared to the last backup first and the full
+    configuration is only transferred when it differs.
+    """
+    print(f"Backing up configuration of {host.hostname}...")
     
     # Get NAPALM driver
     napalm_driver_name = NETWORK_OS_TO_NAPALM_DRIVER.get(host.network_os)
@@ -306,54 +770,214 @@ def backup_host_config(host, backup_dir=None):
         return False
     
     try:
-        # Get NAPALM driver class
-        driver = get_network_driver(napalm_driver_name)
-        
-        # Create device connection
-        device = driver(
-            hostname=host.ip_address,
-            username=host.username,
-            password=host.password,
-            optional_args={'port': 22}  # Default SSH port
-        )
-        
-        # Connect to device
-        print(f"Connecting to {host.hostname} ({host.ip_address})...")
-        device.open()
-        
-        # Get configuration
-        config_dict = device.get_config()
-        running_config = config_dict.get("running", "")
+        with napalm_session(host, napalm_driver_name, timeout=timeout) as device:
+            # Fast path - skip the transfer if the device reports the same fingerprint
+            fingerprint = get_config_fingerprint(device, host.network_os)
+            if skip_unchanged and fingerprint:
+                latest = backup_store.get_latest_backup(host.lab_name, host.hostname)
+                if latest and latest.fingerprint == fingerprint:
+                    if job_cancelled():
+                        print(f"Backup of {host.hostname} took too long; nothing recorded")
+                        return False
+                    record = backup_store.record_unchanged(latest, fingerprint)
+                    print(
+                        f"Configuration of {host.hostname} unchanged according to device "
+                        f"fingerprint (version {record.content_hash[:12]}), skipped transfer"
+                    )
+                    return True
+            
+            # Get configuration
+            config_dict = device.get_config()
+            running_config = config_dict.get("running", "")
         
         if not running_config:
             print(f"No running configuration retrieved for {host.hostname}")
-            device.close()
             return False
         
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%H%M%S")
-        filename = f"{host.hostname}_{timestamp}.txt"
-        filepath = os.path.join(backup_dir, filename)
+        if job_cancelled():
+            print(f"Backup of {host.hostname} took too long; configuration not stored")
+            return False
         
-        # Save configuration
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(running_config)
+        # Save configuration to the backup store
+        record, changed = backup_store.store_config(
+            host.lab_name, host.hostname, running_config,
+            store_dir=backup_dir, fingerprint=fingerprint
+        )
         
-        print(f"Configuration backed up to {filepath}")
-        device.close()
+        if changed:
+            print(f"Configuration backed up to {record.blob_path}")
+        else:
+            print(
+                f"Configuration of {host.hostname} unchanged "
+                f"(version {record.content_hash[:12]}), recorded in backup history"
+            )
         return True
         
     except Exception as e:
         print(f"Failed to backup configuration for {host.hostname}: {e}")
-        try:
-            device.close()
-        except:
-            pass
         return False
 
 
-def backup_all_hosts():
-    """Backup configurations for all hosts in the selected lab."""
+def job_cancelled():
+    """
+    Return True inside a run_host_jobs worker whose host has been given up on.
+    
+    Threads cannot be stopped from outside, so jobs check this before side effects
+    such as writing a backup, and skip them once their time limit has passed.
+    """
+    event = getattr(job_state, "cancelled", None)
+    return bool(event and event.is_set())
+
+
+def run_host_jobs(hosts, job, max_workers=BACKUP_MAX_WORKERS, timeout=None,
+                  wait_for_running=False):
+    """
+    Run job(host) for many hosts at once using a bounded worker pool.
+    
+    Args:
+        hosts: List of Host objects
+        job: Callable taking a Host and returning True on success
+        max_workers: Maximum number of hosts worked on at the same time
+        timeout: Optional time limit in seconds for each host, counted from the
+            moment its job starts. A host over its limit is reported as timed out
+            and its job sees job_cancelled(). The whole run is also bounded; hosts
+            that never got a worker by then are reported as not started.
+        wait_for_running: Wait for jobs still running after a timeout to return
+            instead of leaving them in the background, for callers that remove
+            files those jobs may still be writing to
+    
+    Returns:
+        List of result dicts (hostname, success, duration, error) in host order
+    """
+    if not hosts:
+        return []
+    
+    started = {}  # hostname -> (start time, cancel event), set by the worker
+    
+    def timed_job(host):
+        cancelled = threading.Event()
+        start = time.monotonic()
+        started[host.hostname] = (start, cancelled)
+        job_state.cancelled = cancelled
+        try:
+            success = bool(job(host))
+            error = None if success else "failed"
+        except Exception as e:
+            success = False
+            error = str(e)
+        finally:
+            job_state.cancelled = None
+        return success, time.monotonic() - start, error
+    
+    def give_up(hostname, now):
+        start, cancelled = started[hostname]
+        cancelled.set()
+        results[hostname] = {
+            "hostname": hostname,
+            "success": False,
+            "duration": now - start,
+            "error": f"timed out after {timeout}s",
+        }
+    
+    max_workers = max(1, min(max_workers, len(hosts)))
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {executor.submit(timed_job, host): host.hostname for host in hosts}
+    pending = set(futures)
+    
+    # Hosts are processed in waves of max_workers, so the whole run is bounded by
+    # the number of waves times the per-host timeout (plus some slack for teardown)
+    deadline = None
+    if timeout:
+        waves = (len(hosts) + max_workers - 1) // max_workers
+        deadline = time.monotonic() + waves * timeout + 30
+    
+    try:
+        while pending:
+            wait_time = None
+            if timeout:
+                # Wake up when the earliest running job reaches its limit, and at
+                # least every second to notice jobs that have just started
+                limits = [
+                    started[futures[future]][0] + timeout
+                    for future in pending if futures[future] in started
+                ]
+                wait_time = max(0.0, min([1.0, deadline - time.monotonic()] +
+                                         [limit - time.monotonic() for limit in limits]))
+            done, pending = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+            for future in done:
+                success, duration, error = future.result()
+                results[futures[future]] = {
+                    "hostname": futures[future],
+                    "success": success,
+                    "duration": duration,
+                    "error": error,
+                }
+            if not timeout:
+                continue
+            
+            now = time.monotonic()
+            for future in list(pending):
+                hostname = futures[future]
+                if hostname in started and now - started[hostname][0] >= timeout:
+                    give_up(hostname, now)
+                    pending.discard(future)
+            if now >= deadline:
+                for future in pending:
+                    hostname = futures[future]
+                    if future.cancel() or hostname not in started:
+                        results[hostname] = {
+                            "hostname": hostname,
+                            "success": False,
+                            "duration": 0.0,
+                            "error": "not started",
+                        }
+                    else:
+                        give_up(hostname, now)
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Jobs over their limit usually end soon through their own timeouts; give
+        # them a moment so they do not keep printing after we return
+        overrunning = [future for future in futures if future.running()]
+        if overrunning and wait_for_running:
+            print(f"Waiting for {len(overrunning)} timed out hosts to finish...")
+            wait(overrunning)
+        elif overrunning:
+            wait(overrunning, timeout=JOB_SHUTDOWN_GRACE)
+            still_running = [futures[future] for future in overrunning if not future.done()]
+            if still_running:
+                print(f"Still finishing in the background: {', '.join(still_running)}")
+    
+    return [results[host.hostname] for host in hosts if host.hostname in results]
+
+
+def print_job_summary(results, title, elapsed):
+    """Print an aggregated success/failure/duration summary for run_host_jobs results."""
+    successful = [r for r in results if r["success"]]
+    failed = [r for r in results if not r["success"]]
+    
+    print(
+        f"\n{title} completed in {elapsed:.1f}s. "
+        f"Successful: {len(successful)}, Failed: {len(failed)}"
+    )
+    if results:
+        slowest = max(results, key=lambda r: r["duration"])
+        print(f"Slowest host: {slowest['hostname']} ({slowest['duration']:.1f}s)")
+    if failed:
+        print("Failed hosts:")
+        for result in failed:
+            print(f"  {result['hostname']}: {result['error']} ({result['duration']:.1f}s)")
+
+
+def backup_all_hosts(max_workers=BACKUP_MAX_WORKERS, timeout=BACKUP_HOST_TIMEOUT,
+                     skip_unchanged=False):
+    """
+    Backup configurations for all hosts in the selected lab concurrently.
+    
+    With skip_unchanged, hosts whose config fingerprint matches their last backup are
+    recorded without transferring the full configuration.
+    """
     import lab_mgmt
     
     selected_lab = lab_mgmt.get_selected_lab()
@@ -363,22 +987,182 @@ def backup_all_hosts():
         print(f"No hosts found in lab '{selected_lab}'.")
         return False
     
-    print(f"Starting backup for all hosts in lab '{selected_lab}'...")
-    successful_backups = 0
-    failed_backups = 0
+    print(
+        f"Starting backup for {len(hosts)} hosts in lab '{selected_lab}' "
+        f"({min(max_workers, len(hosts))} at a time)..."
+    )
+    start = time.monotonic()
+    results = run_host_jobs(
+        hosts,
+        lambda host: backup_host_config(host, timeout=timeout, skip_unchanged=skip_unchanged),
+        max_workers=max_workers,
+        timeout=timeout,
+    )
+    print_job_summary(results, "Backup", time.monotonic() - start)
+    return results
+
+
+def build_host_command(host, lab, command):
+    """
+    Return (argv, env) that run a command non-interactively on a host: docker exec
+    for containerlab Linux containers (through SSH for remote labs), SSH otherwise.
+    """
+    if lab and lab.lab_type == "containerlab" and host.image_type == "linux":
+        container_name = host.container_name or host.hostname
+        docker_command = ["docker", "exec", container_name, "sh", "-c", command]
+        if not lab.remote_containerlab_host:
+            return docker_command, None
+        remote_target = get_remote_target(lab.remote_containerlab_host, lab.remote_containerlab_username)
+        return (
+            ["ssh", *ssh_control_options(remote_target), "-o", "BatchMode=yes", remote_target,
+             shlex.join(docker_command)],
+            None,
+        )
     
-    for host in hosts:
-        if backup_host_config(host):
-            successful_backups += 1
-        else:
-            failed_backups += 1
+    ssh_command = [
+        "ssh", "-o", "StrictHostKeyChecking=no", "-o", "UserKnownHostsFile=/dev/null",
+        "-o", "ConnectTimeout=10", "-o", "LogLevel=ERROR",
+        f"{host.username}@{host.ip_address}", command,
+    ]
+    if not host.password:
+        return ssh_command[:1] + ["-o", "BatchMode=yes"] + ssh_command[1:], None
+    # sshpass -e reads the password from the environment instead of the command line
+    return ["sshpass", "-e", *ssh_command], dict(os.environ, SSHPASS=host.password)
+
+
+def run_host_command(host, lab, command, timeout=COMMAND_HOST_TIMEOUT):
+    """
+    Run a command on one host and capture its output.
     
-    print(f"\nBackup completed. Successful: {successful_backups}, Failed: {failed_backups}")
-    return True
+    Returns:
+        Dict with hostname, stdout, stderr, returncode (None on timeout) and duration
+    """
+    # Local containers go through the Engine API; each worker thread reuses its connection
+    if (lab and lab.lab_type == "containerlab" and host.image_type == "linux"
+            and not lab.remote_containerlab_host and docker_api.docker_api_available()):
+        result = docker_api.exec_in_container(host.container_name or host.hostname, command, timeout=timeout)
+        return {"hostname": host.hostname, **result}
+    
+    argv, env = build_host_command(host, lab, command)
+    start = time.monotonic()
+    try:
+        result = subprocess.run(
+            argv, capture_output=True, text=True, timeout=timeout,
+            stdin=subprocess.DEVNULL, env=env, check=False,
+        )
+        stdout, stderr, returncode = result.stdout, result.stderr, result.returncode
+    except subprocess.TimeoutExpired as e:
+        stdout = e.stdout.decode(errors="replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+        stderr = f"timed out after {timeout}s"
+        returncode = None
+    return {
+        "hostname": host.hostname,
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": returncode,
+        "duration": time.monotonic() - start,
+    }
+
+
+def save_command_results(lab_name, command, results):
+    """Write command results to <lab>_command_results/<timestamp>.json and return the path."""
+    results_dir = f"{lab_name}_command_results"
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"lab": lab_name, "command": command, "run_at": datetime.now().isoformat(), "results": results},
+            f,
+            indent=2,
+        )
+    return path
+
+
+def print_command_summary(results):
+    """Print one row per host with exit code, duration and the first line of output."""
+    rows = []
+    for result in results:
+        output = (result["stdout"] or result["stderr"] or "").strip()
+        first_line = output.splitlines()[0] if output else ""
+        if len(first_line) > 60:
+            first_line = first_line[:57] + "..."
+        returncode = result.get("returncode")
+        rows.append([
+            result["hostname"],
+            "timeout" if returncode is None else returncode,
+            f"{result['duration']:.1f}s",
+            first_line,
+        ])
+    print(tabulate(rows, headers=["Hostname", "Exit Code", "Duration", "Output"]))
+
+
+def run_command_on_hosts(command, hosts=None, max_workers=COMMAND_MAX_WORKERS,
+                         timeout=COMMAND_HOST_TIMEOUT):
+    """
+    Run a command on every host of the selected lab (or the given hosts) concurrently.
+    
+    Each host's stdout, stderr, exit code and duration are saved as JSON under
+    <lab>_command_results/ and summarized in a table.
+    
+    Returns:
+        List of per-host result dicts in host order
+    """
+    import lab_mgmt
+    
+    selected_lab = lab_mgmt.get_selected_lab()
+    lab = session.query(Lab).filter_by(lab_name=selected_lab).first()
+    if hosts is None:
+        hosts = session.query(Host).filter_by(lab_name=selected_lab).all()
+    if not hosts:
+        print(f"No hosts found in lab '{selected_lab}'.")
+        return []
+    
+    # Only docker exec on Linux containers goes through the remote containerlab host
+    if lab and any(h.image_type == "linux" for h in hosts) and not ensure_ssh_master(lab):
+        print("Could not connect to the remote containerlab host.")
+        return []
+    
+    print(
+        f"Running '{command}' on {len(hosts)} hosts in lab '{selected_lab}' "
+        f"({min(max_workers, len(hosts))} at a time)..."
+    )
+    captured = {}
+    
+    def job(host):
+        result = run_host_command(host, lab, command, timeout=timeout)
+        captured[host.hostname] = result
+        return result["returncode"] == 0
+    
+    start = time.monotonic()
+    jobs = run_host_jobs(hosts, job, max_workers=max_workers, timeout=timeout)
+    elapsed = time.monotonic() - start
+    
+    results = []
+    for job_result in jobs:
+        result = captured.get(job_result["hostname"]) or {
+            "hostname": job_result["hostname"],
+            "stdout": "",
+            "stderr": job_result["error"] or "",
+            "returncode": None,
+            "duration": job_result["duration"],
+        }
+        results.append(result)
+    
+    print_command_summary(results)
+    print_job_summary(jobs, "Command", elapsed)
+    path = save_command_results(selected_lab, command, results)
+    print(f"Full output saved to {path}")
+    return results
 
 
-def backup_to_containerlab_directory():
-    """Backup configurations to containerlab topology directory structure."""
+def backup_to_containerlab_directory(max_workers=BACKUP_MAX_WORKERS, timeout=BACKUP_HOST_TIMEOUT):
+    """
+    Backup configurations to containerlab topology directory structure.
+    
+    Configs are fetched concurrently. For remote labs they are staged locally in the
+    <clab_dir>/<host>/config/startup-config.cfg layout and shipped to the containerlab
+    host in a single tar-over-ssh stream.
+    """
     import lab_mgmt
     
     selected_lab = lab_mgmt.get_selected_lab()
@@ -387,38 +1171,29 @@ def backup_to_containerlab_directory():
         print("Containerlab topology path not configured for this lab.")
         return False
     
-    # Check if topology path exists and find containerlab directory
+    # Check if topology path exists and find containerlab directory (contains "clab" in name)
     if lab.remote_containerlab_host:
-        # For remote labs, the topology path is on the remote machine
+        # For remote labs, the topology path is on the remote machine. Check it and
+        # list the containerlab directories in a single SSH round trip.
         topology_path_str = lab.topology_path
-        username_part = (
-            f"{lab.remote_containerlab_username}@" if lab.remote_containerlab_username else ""
+        remote_target = get_remote_target(
+            lab.remote_containerlab_host, lab.remote_containerlab_username
         )
-        # Check if the remote path exists
-        check_command = (
-            f"ssh {username_part}{lab.remote_containerlab_host} 'test -d \"{topology_path_str}\"'"
+        quoted_path = shlex.quote(topology_path_str)
+        list_command = (
+            f"test -d {quoted_path} || exit 3; "
+            f"find {quoted_path} -maxdepth 1 -type d -name '*clab*'"
+        )
+        result = run_ssh_command(
+            lab.remote_containerlab_host, lab.remote_containerlab_username, list_command
         )
-        result = subprocess.run(check_command, shell=True, capture_output=True, text=True)
         
-        if result.returncode != 0:
-            print(f"Topology path does not exist on remote host: {topology_path_str}")
+        if not result.connected:
+            print(f"Could not connect to {remote_target}.")
             return
-    else:
-        # For local labs, expand and resolve the path locally
-        topology_path = Path(lab.topology_path).expanduser().resolve()
-        if not topology_path.exists():
-            print(f"Topology path does not exist: {topology_path}")
+        if result.returncode == 3:
+            print(f"Topology path does not exist on remote host: {topology_path_str}")
             return
-    
-    # Find containerlab directory (contains "clab" in name)
-    if lab.remote_containerlab_host:
-        # Remote operation - find directories containing "clab"
-        list_command = f"find '{topology_path_str}' -maxdepth 1 -type d -name '*clab*'"
-        result = subprocess.run(
-            f"ssh {username_part}{lab.remote_containerlab_host} \"{list_command}\"",
-            shell=True, capture_output=True, text=True
-        )
-        
         if result.returncode != 0:
             print("Failed to list directories on remote host.")
             return
@@ -435,7 +1210,12 @@ def backup_to_containerlab_directory():
         clab_dir_path = clab_dirs[0]
         
     else:
-        # Local operation - find directories containing "clab"
+        # For local labs, expand and resolve the path locally
+        topology_path = Path(lab.topology_path).expanduser().resolve()
+        if not topology_path.exists():
+            print(f"Topology path does not exist: {topology_path}")
+            return
+        
         clab_dirs = [d for d in topology_path.iterdir() if d.is_dir() and "clab" in d.name]
         if not clab_dirs:
             print("No containerlab directory (containing 'clab') found in the specified path.")
@@ -450,59 +1230,85 @@ def backup_to_containerlab_directory():
     print(f"Backing up configurations to containerlab directory: {clab_dir_path}")
     
     hosts = session.query(Host).filter_by(lab_name=selected_lab).all()
-    successful_backups = 0
-    failed_backups = 0
-    
-    for host in hosts:
-        if lab.remote_containerlab_host:
-            # For remote labs, we need to use a different approach
-            # Create the node config directory remotely
-            node_config_dir = f"{clab_dir_path}/{host.hostname}/config"
-            mkdir_command = (
-                f"ssh {username_part}{lab.remote_containerlab_host} \
-                'mkdir -p \"{node_config_dir}\"'"
-            )
-            subprocess.run(mkdir_command, shell=True, check=False)
-            
-            # Backup configuration and upload to remote
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.cfg', delete=False) as temp_file:
-                if backup_host_config_to_file(host, temp_file.name):
-                    # Copy to remote location
-                    remote_config_file = f"{node_config_dir}/startup-config.cfg"
-                    scp_command = (
-                        f"scp '{temp_file.name}' {username_part}{lab.remote_containerlab_host}:\
-                        '{remote_config_file}'"
-                    )
-
-                    result = subprocess.run(scp_command, shell=True, check=False)
-                    if result.returncode == 0:
-                        successful_backups += 1
-                        print(f"Configuration for {host.hostname} copied to remote location")
-                    else:
-                        failed_backups += 1
-                        print(f"Failed to copy configuration for {host.hostname} to remote location")
-                else:
-                    failed_backups += 1
-                
-                # Clean up temp file
-                os.unlink(temp_file.name)
-        else:
-            # Local operation
+    if not hosts:
+        print(f"No hosts found in lab '{selected_lab}'.")
+        return False
+    
+    start = time.monotonic()
+    
+    if not lab.remote_containerlab_host:
+        # Local operation - write straight into the containerlab directory
+        def backup_local(host):
             node_config_dir = Path(clab_dir_path) / host.hostname / "config"
             node_config_dir.mkdir(parents=True, exist_ok=True)
-            
             config_file = node_config_dir / "startup-config.cfg"
-            
-            if backup_host_config_to_file(host, str(config_file)):
-                successful_backups += 1
-            else:
-                failed_backups += 1
+            return backup_host_config_to_file(host, str(config_file), timeout=timeout)
+        
+        results = run_host_jobs(hosts, backup_local, max_workers=max_workers, timeout=timeout)
+        print_job_summary(results, "Containerlab backup", time.monotonic() - start)
+        return True
+    
+    # Remote operation - stage the directory tree locally, then upload it in one stream
+    with tempfile.TemporaryDirectory(prefix="clab_backup_", ignore_cleanup_errors=True) as staging_dir:
+        def backup_staged(host):
+            node_config_dir = Path(staging_dir) / host.hostname / "config"
+            node_config_dir.mkdir(parents=True, exist_ok=True)
+            config_file = node_config_dir / "startup-config.cfg"
+            return backup_host_config_to_file(host, str(config_file), timeout=timeout)
+        
+        # Timed out jobs skip their write once cancelled, but the staging directory
+        # must outlive them, so wait for every job before uploading and cleaning up
+        results = run_host_jobs(
+            hosts, backup_staged, max_workers=max_workers, timeout=timeout, wait_for_running=True
+        )
+        staged_hosts = [r["hostname"] for r in results if r["success"]]
+        
+        if staged_hosts:
+            print(f"Uploading {len(staged_hosts)} configurations to {remote_target}:{clab_dir_path}...")
+            if not upload_directory_tree(staging_dir, staged_hosts, remote_target, clab_dir_path):
+                for result in results:
+                    if result["success"]:
+                        result["success"] = False
+                        result["error"] = "upload to remote location failed"
+    
+    print_job_summary(results, "Containerlab backup", time.monotonic() - start)
+    return True
+
+
+def upload_directory_tree(local_dir, entries, remote_target, remote_dir):
+    """
+    Copy entries (relative to local_dir) to remote_dir on remote_target in a single
+    tar-over-ssh stream, creating remote_dir if needed.
+    """
+    extract_command = (
+        f"mkdir -p {shlex.quote(remote_dir)} && tar -C {shlex.quote(remote_dir)} -xf -"
+    )
+    try:
+        tar_process = subprocess.Popen(
+            ["tar", "-C", local_dir, "-cf", "-", "--", *entries],
+            stdout=subprocess.PIPE,
+        )
+        ssh_result = subprocess.run(
+            ["ssh", *ssh_control_options(remote_target), remote_target, extract_command],
+            stdin=tar_process.stdout,
+            capture_output=True,
+            text=True,
+        )
+        tar_process.stdout.close()
+        tar_returncode = tar_process.wait()
+    except Exception as e:
+        print(f"Failed to upload configurations: {e}")
+        return False
     
-    print(f"\nContainerlab backup completed. Successful: {successful_backups}, Failed: {failed_backups}")
+    if tar_returncode != 0 or ssh_result.returncode != 0:
+        print(f"Failed to upload configurations to remote location: {ssh_result.stderr.strip()}")
+        return False
+    
+    print(f"Configurations copied to remote location {remote_dir}")
     return True
 
 
-def backup_host_config_to_file(host, filepath):
+def backup_host_config_to_file(host, filepath, timeout=BACKUP_HOST_TIMEOUT):
     """Backup host configuration to a specific file path."""
     print(f"Backing up {host.hostname} to {filepath}...")
     
@@ -513,27 +1319,17 @@ def backup_host_config_to_file(host, filepath):
         return False
     
     try:
-        # Get NAPALM driver class
-        driver = get_network_driver(napalm_driver_name)
-        
-        # Create device connection
-        device = driver(
-            hostname=host.ip_address,
-            username=host.username,
-            password=host.password,
-            optional_args={'port': 22}
-        )
-        
-        # Connect to device
-        device.open()
-        
-        # Get configuration
-        config_dict = device.get_config()
-        running_config = config_dict.get("running", "")
+        with napalm_session(host, napalm_driver_name, timeout=timeout) as device:
+            # Get configuration
+            config_dict = device.get_config()
+            running_config = config_dict.get("running", "")
         
         if not running_config:
             print(f"No running configuration retrieved for {host.hostname}")
-            device.close()
+            return False
+        
+        if job_cancelled():
+            print(f"Backup of {host.hostname} took too long; {filepath} not written")
             return False
         
         # Save configuration to specified file
@@ -541,13 +1337,8 @@ def backup_host_config_to_file(host, filepath):
             f.write(running_config)
         
         print(f"Configuration backed up to {filepath}")
-        device.close()
         return True
         
     except Exception as e:
         print(f"Failed to backup configuration for {host.hostname}: {e}")
-        try:
-            device.close()
-        except:
-            pass
         return False
@@ -0,0 +1,217 @@
+"""
+Docker Engine API client for local containerlab containers.
+
+Commands run in containers through the Engine API on the local Unix socket
+instead of spawning the docker CLI for each call. Every thread keeps one
+persistent HTTP connection for the short exec create and inspect requests, so
+many containers can be driven concurrently without a process per command.
+
+Starting an exec hijacks its connection for the output stream, so that request
+uses a connection of its own, which is closed once the command finishes. The
+stream is demultiplexed into stdout and stderr.
+
+Callers check docker_api_available() and keep using the docker CLI when the
+socket is missing or the daemon does not answer.
+"""
+
+import http.client
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from urllib.parse import quote
+
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+# Seconds allowed for API requests other than the exec output stream
+DOCKER_API_TIMEOUT = 10
+# Exit status reported when the daemon refuses an exec, as the docker CLI does
+DOCKER_ERROR_EXIT_CODE = 125
+
+# Frame header of a multiplexed exec stream: stream type, 3 padding bytes, size
+STREAM_HEADER = struct.Struct(">BxxxI")
+STDOUT_STREAM = 1
+STDERR_STREAM = 2
+
+local_connections = threading.local()
+availability = {}  # socket path -> True/False, checked once per process
+
+
+class DockerAPIError(Exception):
+    """Raised when the Docker Engine API returns an error status."""
+
+    def __init__(self, status, message):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path, timeout=DOCKER_API_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def get_socket_path():
+    """Return the Engine socket, honouring a unix:// DOCKER_HOST. None for remote daemons."""
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if not docker_host:
+        return DOCKER_SOCKET
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    return None
+
+
+def get_connection(socket_path):
+    """Return this thread's persistent connection to the Engine socket."""
+    connections = getattr(local_connections, "connections", None)
+    if connections is None:
+        connections = local_connections.connections = {}
+    connection = connections.get(socket_path)
+    if connection is None:
+        connection = connections[socket_path] = UnixHTTPConnection(socket_path)
+    return connection
+
+
+def send_request(connection, method, path, body=None):
+    """Send one request and return the response, leaving the body unread."""
+    headers = {"Host": "docker"}
+    payload = None
+    if body is not None:
+        payload = json.dumps(body).encode("utf-8")
+        headers["Content-Type"] = "application/json"
+    connection.request(method, path, body=payload, headers=headers)
+    return connection.getresponse()
+
+
+def read_json(response):
+    """Read a response body, raising DockerAPIError for error statuses."""
+    data = response.read()
+    try:
+        decoded = json.loads(data) if data else {}
+    except ValueError:
+        decoded = {"message": data.decode("utf-8", errors="replace")}
+    if response.status >= 400:
+        raise DockerAPIError(response.status, decoded.get("message", response.reason))
+    return decoded
+
+
+def api_request(method, path, body=None, socket_path=None):
+    """
+    Make a request on the persistent connection and return the decoded JSON body.
+
+    A connection the daemon closed while idle is reopened and the request sent
+    once more.
+    """
+    socket_path = socket_path or get_socket_path()
+    connection = get_connection(socket_path)
+    try:
+        response = send_request(connection, method, path, body)
+    except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+        connection.close()
+        response = send_request(connection, method, path, body)
+    return read_json(response)
+
+
+def docker_api_available(socket_path=None):
+    """Return True if a Docker daemon answers on the local socket (checked once)."""
+    socket_path = socket_path or get_socket_path()
+    if not socket_path:
+        return False
+    if socket_path not in availability:
+        available = False
+        if os.path.exists(socket_path):
+            try:
+                connection = get_connection(socket_path)
+                response = send_request(connection, "GET", "/_ping")
+                response.read()
+                available = response.status == 200
+            except (OSError, http.client.HTTPException):
+                available = False
+        availability[socket_path] = available
+    return availability[socket_path]
+
+
+def demultiplex_stream(data):
+    """
+    Split a multiplexed exec stream into (stdout, stderr) bytes.
+
+    Each frame is an 8-byte header (stream type, size) followed by the payload.
+    Data that does not start with a valid header is treated as plain stdout, which
+    is what a TTY exec returns.
+    """
+    stdout = bytearray()
+    stderr = bytearray()
+    offset = 0
+    while offset + STREAM_HEADER.size <= len(data):
+        stream, size = STREAM_HEADER.unpack_from(data, offset)
+        if stream not in (0, STDOUT_STREAM, STDERR_STREAM):
+            if offset == 0:
+                return bytes(data), b""
+            break
+        start = offset + STREAM_HEADER.size
+        (stderr if stream == STDERR_STREAM else stdout).extend(data[start:start + size])
+        offset = start + size
+    return bytes(stdout), bytes(stderr)
+
+
+def read_exec_stream(exec_id, socket_path, timeout):
+    """Start an exec on a dedicated connection and read its output until it closes."""
+    connection = UnixHTTPConnection(socket_path, timeout=timeout)
+    try:
+        response = send_request(
+            connection, "POST", f"/exec/{exec_id}/start", {"Detach": False, "Tty": False}
+        )
+        if response.status >= 400:
+            read_json(response)
+        # The hijacked stream has no length; it ends when the command exits and
+        # the daemon closes the connection
+        return response.read()
+    finally:
+        connection.close()
+
+
+def exec_in_container(container_name, command, timeout=None, socket_path=None):
+    """
+    Run a shell command in a container through the Engine API and capture its output.
+
+    Returns:
+        Dict with stdout, stderr, returncode (None on timeout) and duration, as
+        device_actions.run_host_command returns
+    """
+    socket_path = socket_path or get_socket_path()
+    start = time.monotonic()
+    result = {"stdout": "", "stderr": "", "returncode": None, "duration": 0.0}
+    try:
+        created = api_request(
+            "POST",
+            f"/containers/{quote(container_name, safe='')}/exec",
+            {"AttachStdout": True, "AttachStderr": True, "Cmd": ["sh", "-c", command]},
+            socket_path=socket_path,
+        )
+        output = read_exec_stream(created["Id"], socket_path, timeout)
+        stdout, stderr = demultiplex_stream(output)
+        result["stdout"] = stdout.decode("utf-8", errors="replace")
+        result["stderr"] = stderr.decode("utf-8", errors="replace")
+        result["returncode"] = api_request(
+            "GET", f"/exec/{created['Id']}/json", socket_path=socket_path
+        ).get("ExitCode")
+    except DockerAPIError as e:
+        result["stderr"] = f"{e.message}\n"
+        result["returncode"] = DOCKER_ERROR_EXIT_CODE
+    except socket.timeout:
+        result["stderr"] = f"timed out after {timeout}s"
+    except (OSError, http.client.HTTPException) as e:
+        result["stderr"] = f"Docker API request failed: {e}\n"
+        result["returncode"] = DOCKER_ERROR_EXIT_CODE
+    result["duration"] = time.monotonic() - start
+    return result
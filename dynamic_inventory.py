@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Ansible dynamic inventory for POC Helper Menu.
+
+Emits the hosts of one lab from the poc_helper.db hosts table:
+
+    POC_HELPER_LAB=<lab> ./dynamic_inventory.py --list
+    POC_HELPER_LAB=<lab> ./dynamic_inventory.py --host <hostname>
+
+Hosts are grouped by network_os, and _meta.hostvars is included so Ansible never
+calls --host per node. The generated inventory is cached per lab and reused until
+the database file changes.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+
+
+INVENTORY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "poc_helper", "inventory")
+DATABASE_FILE = "poc_helper.db"
+LAB_ENV_VAR = "POC_HELPER_LAB"
+GROUP_PREFIX = "os_"
+# Bumped when the inventory layout changes, so older cache files are rebuilt
+CACHE_VERSION = 2
+
+
+def group_name(value):
+    """
+    Return a valid Ansible group name for a network_os value, prefixed with
+    GROUP_PREFIX so values like "all" or "ungrouped" cannot clash with Ansible's
+    built-in groups.
+    """
+    name = re.sub(r"[^A-Za-z0-9_]", "_", value or "") or "unknown"
+    return f"{GROUP_PREFIX}{name}"
+
+
+def host_vars_for(host):
+    """Return the Ansible variables for a Host row."""
+    host_vars = {
+        "ansible_network_os": host.network_os,
+        "ansible_user": host.username,
+        "ansible_password": host.password,
+    }
+    if host.ip_address:
+        host_vars["ansible_host"] = host.ip_address
+    if host.console:
+        host_vars["console"] = host.console
+    if host.image_type:
+        host_vars["image_type"] = host.image_type
+    if host.container_name:
+        host_vars["container_name"] = host.container_name
+    return host_vars
+
+
+def build_inventory(lab_name):
+    """Build the --list inventory for a lab from the hosts table."""
+    from models import Host, Session
+
+    db = Session()
+    try:
+        hosts = db.query(Host).filter_by(lab_name=lab_name).order_by(Host.hostname).all()
+        groups = {}
+        hostvars = {}
+        for host in hosts:
+            groups.setdefault(group_name(host.network_os), []).append(host.hostname)
+            hostvars[host.hostname] = host_vars_for(host)
+    finally:
+        db.close()
+
+    inventory = {group: {"hosts": members} for group, members in groups.items()}
+    inventory["all"] = {"children": sorted(groups)}
+    inventory["_meta"] = {"hostvars": hostvars}
+    return inventory
+
+
+def cache_path(lab_name):
+    """Return the cache file for a lab's inventory."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", lab_name)
+    return os.path.join(INVENTORY_CACHE_DIR, f"{safe_name}.json")
+
+
+def database_stamp():
+    """Return (mtime, size) of the database, which changes with every commit."""
+    try:
+        stat = os.stat(DATABASE_FILE)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def get_inventory(lab_name):
+    """Return the lab inventory, rebuilding it only if the database changed."""
+    stamp = database_stamp()
+    path = cache_path(lab_name)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if stamp and cached.get("database") == stamp and cached.get("version") == CACHE_VERSION:
+            return cached["inventory"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    inventory = build_inventory(lab_name)
+    # Stamp taken before the build, so a commit during the build forces a rebuild
+    if stamp:
+        os.makedirs(INVENTORY_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=INVENTORY_CACHE_DIR, prefix=".inventory-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "database": stamp, "inventory": inventory}, f)
+        os.replace(tmp_path, path)
+    return inventory
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="POC Helper dynamic Ansible inventory")
+    parser.add_argument("--list", action="store_true", help="list all hosts of the lab")
+    parser.add_argument("--host", help="show the variables of one host")
+    parser.add_argument("--lab", default=os.environ.get(LAB_ENV_VAR),
+                        help=f"lab name (defaults to ${LAB_ENV_VAR})")
+    args = parser.parse_args(argv)
+
+    if not args.lab:
+        print(f"No lab given; set {LAB_ENV_VAR} or pass --lab.", file=sys.stderr)
+        return 1
+
+    inventory = get_inventory(args.lab)
+    if args.host:
+        result = inventory["_meta"]["hostvars"].get(args.host, {})
+    else:
+        result = inventory
+    json.dump(result, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
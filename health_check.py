@@ -0,0 +1,216 @@
+"""
+Lab reachability sweep for the POC Helper Menu tool.
+
+Every host of a lab is probed concurrently from one asyncio event loop: a TCP
+connect to port 22 of its ip_address, optionally an ICMP echo (via the system
+ping command), and a TCP connect to its console address. Each probe has a tight
+timeout, so a sweep takes about as long as the slowest single probe rather than
+the sum of them.
+
+The latest result per host is stored in the host_health table with the time it
+was taken. Host menus read their status column from that table instead of
+probing again.
+"""
+
+import asyncio
+import shutil
+import sys
+import time
+from datetime import datetime
+from sqlalchemy import delete, insert
+from tabulate import tabulate
+from models import Host, HostHealth, session
+from device_actions import parse_console_address
+
+
+SSH_PORT = 22
+# Seconds to wait for a TCP connect or a ping reply
+HEALTH_PROBE_TIMEOUT = 2
+# Probes in flight at once, to stay well below the open file limit
+HEALTH_MAX_CONCURRENCY = 200
+# Status older than this is shown with its age so nobody mistakes it for live data
+HEALTH_STALE_AFTER = 15 * 60
+
+
+async def probe_tcp(address, port, timeout=HEALTH_PROBE_TIMEOUT):
+    """
+    Try to open a TCP connection.
+
+    Returns:
+        (reachable, latency_ms) tuple; latency is None when unreachable
+    """
+    start = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(address, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False, None
+    latency = (time.monotonic() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True, latency
+
+
+async def probe_ping(address, timeout=HEALTH_PROBE_TIMEOUT):
+    """Send one ICMP echo with the system ping command. Returns True if it was answered."""
+    # -W is the reply wait in seconds on Linux but in milliseconds on macOS
+    wait = str(int(timeout * 1000)) if sys.platform == "darwin" else str(timeout)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-W", wait, address,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        return False
+    try:
+        returncode = await asyncio.wait_for(process.wait(), timeout + 1)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return False
+    return returncode == 0
+
+
+async def check_host(target, semaphore, ping=False):
+    """Probe one host, described by a plain dict so no ORM object is used in the loop."""
+    result = {
+        "hostname": target["hostname"],
+        "ssh_reachable": None,
+        "ssh_latency": None,
+        "ping_reachable": None,
+        "console_reachable": None,
+    }
+    probes = {}
+    async with semaphore:
+        if target["ip_address"]:
+            probes["ssh"] = probe_tcp(target["ip_address"], SSH_PORT)
+            if ping:
+                probes["ping"] = probe_ping(target["ip_address"])
+        if target["console"]:
+            console_host, console_port = parse_console_address(target["console"])
+            probes["console"] = probe_tcp(console_host, console_port)
+        # The probes of one host run together as well
+        outcomes = dict(zip(probes, await asyncio.gather(*probes.values())))
+
+    if "ssh" in outcomes:
+        result["ssh_reachable"], result["ssh_latency"] = outcomes["ssh"]
+    if "ping" in outcomes:
+        result["ping_reachable"] = outcomes["ping"]
+    if "console" in outcomes:
+        result["console_reachable"] = outcomes["console"][0]
+    return result
+
+
+async def check_hosts(targets, ping=False, max_concurrency=HEALTH_MAX_CONCURRENCY):
+    """Probe every target concurrently. Returns results in target order."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await asyncio.gather(*(check_host(target, semaphore, ping) for target in targets))
+
+
+def save_health_results(lab_name, results, checked_at):
+    """Replace the stored status of the checked hosts with these results."""
+    hostnames = [result["hostname"] for result in results]
+    session.execute(
+        delete(HostHealth)
+        .where(HostHealth.lab_name == lab_name)
+        .where(HostHealth.hostname.in_(hostnames))
+    )
+    session.execute(
+        insert(HostHealth),
+        [dict(result, lab_name=lab_name, checked_at=checked_at) for result in results],
+    )
+    session.commit()
+
+
+def format_reachable(value):
+    """Render one probe outcome for the summary table."""
+    if value is None:
+        return "-"
+    return "up" if value else "DOWN"
+
+
+def print_health_summary(results):
+    """Print one row per host with the outcome of each probe."""
+    rows = []
+    for result in results:
+        latency = result["ssh_latency"]
+        rows.append([
+            result["hostname"],
+            format_reachable(result["ssh_reachable"]),
+            f"{latency:.0f} ms" if latency is not None else "",
+            format_reachable(result["ping_reachable"]),
+            format_reachable(result["console_reachable"]),
+        ])
+    print(tabulate(rows, headers=["Hostname", "SSH", "Connect", "Ping", "Console"]))
+
+
+def run_health_check(lab_name, hosts=None, ping=False):
+    """
+    Probe every host of a lab (or the given hosts) and store the results.
+
+    ping adds an ICMP echo per host; it is skipped with a notice when no ping
+    command is installed.
+
+    Returns:
+        List of per-host result dicts in host order
+    """
+    if hosts is None:
+        hosts = session.query(Host).filter_by(lab_name=lab_name).order_by(Host.hostname).all()
+    if not hosts:
+        print(f"No hosts found in lab '{lab_name}'.")
+        return []
+    if ping and not shutil.which("ping"):
+        print("ping command not found; skipping ICMP checks.")
+        ping = False
+
+    targets = [
+        {
+            "hostname": host.hostname,
+            "ip_address": (host.ip_address or "").strip(),
+            "console": (host.console or "").strip(),
+        }
+        for host in hosts
+    ]
+    print(f"Checking {len(targets)} hosts in lab '{lab_name}'...")
+    start = time.monotonic()
+    results = asyncio.run(check_hosts(targets, ping=ping))
+    elapsed = time.monotonic() - start
+
+    save_health_results(lab_name, results, datetime.now())
+    print_health_summary(results)
+    down = sum(
+        1 for result in results
+        if False in (result["ssh_reachable"], result["ping_reachable"], result["console_reachable"])
+    )
+    print(f"\nChecked {len(results)} hosts in {elapsed:.1f}s: {len(results) - down} healthy, {down} with failures.")
+    return results
+
+
+def get_health_status(lab_name):
+    """Return the stored health records of a lab, keyed by hostname."""
+    records = session.query(HostHealth).filter_by(lab_name=lab_name).all()
+    return {record.hostname: record for record in records}
+
+
+def format_status(record, probe="ssh_reachable"):
+    """
+    Return a short status for a host menu from a stored health record.
+
+    probe selects the outcome shown (ssh_reachable or console_reachable). Results
+    older than HEALTH_STALE_AFTER carry their age.
+    """
+    if record is None or getattr(record, probe) is None:
+        return "unknown"
+    status = "up" if getattr(record, probe) else "DOWN"
+    age = (datetime.now() - record.checked_at).total_seconds()
+    if age >= HEALTH_STALE_AFTER:
+        if age >= 86400:
+            status += f" ({age // 86400:.0f}d ago)"
+        elif age >= 3600:
+            status += f" ({age // 3600:.0f}h ago)"
+        else:
+            status += f" ({age // 60:.0f}m ago)"
+    return status
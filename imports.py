@@ -7,13 +7,16 @@ Handles importing hosts and links from various sources including:
 - Manual host entry
 """
 
+import json
 import os
+import subprocess
 import yaml
 from configparser import ConfigParser
 from simple_term_menu import TerminalMenu
+from sqlalchemy import delete, insert, update
 from sqlalchemy.exc import IntegrityError
 from tabulate import tabulate
-from models import Host, Link, Lab, session
+from models import Host, Link, Lab, ConfigBackup, HostHealth, session
 
 
 # Mapping of containerlab kinds to Ansible network_os values
@@ -85,6 +88,129 @@ CONTAINERLAB_KIND_TO_NETWORK_OS = {
     'routeros': 'routeros',
 }
 
+# Use the libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Rows buffered before each set-based insert while streaming a topology
+IMPORT_BATCH_SIZE = 1000
+
+
+def load_yaml(file):
+    """Parse a whole YAML document with the fastest available safe loader."""
+    return yaml.load(file, Loader=YAML_LOADER)
+
+
+def compose_event_node(loader, anchors):
+    """Build a YAML node from the next parser events, resolving tags and aliases."""
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(
+                None, None, f"found undefined alias {event.anchor}", event.start_mark
+            )
+        return anchors[event.anchor]
+    
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        if event.anchor:
+            anchors[event.anchor] = node
+        return node
+    
+    if isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor:
+            anchors[event.anchor] = node
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(compose_event_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+        return node
+    
+    if isinstance(event, yaml.MappingStartEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor:
+            anchors[event.anchor] = node
+        while not loader.check_event(yaml.MappingEndEvent):
+            key_node = compose_event_node(loader, anchors)
+            value_node = compose_event_node(loader, anchors)
+            node.value.append((key_node, value_node))
+        node.end_mark = loader.get_event().end_mark
+        return node
+    
+    raise yaml.composer.ComposerError(None, None, f"unexpected event {event}", event.start_mark)
+
+
+def iter_containerlab_topology(file):
+    """
+    Stream a containerlab topology file without building the whole document.
+    
+    Parser events are composed one entry at a time, so only a single node or link
+    is held in memory while the rest of the file is read.
+    
+    Yields:
+        ("name", name), ("node", (hostname, node_data)) and ("link", link_data) tuples
+    """
+    loader = YAML_LOADER(file)
+    anchors = {}
+    
+    def next_value():
+        return loader.construct_document(compose_event_node(loader, anchors))
+    
+    try:
+        loader.get_event()  # StreamStart
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()  # DocumentStart
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise yaml.YAMLError("Topology file must contain a mapping at the top level")
+        loader.get_event()
+        
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = next_value()
+            if key != "topology" or not loader.check_event(yaml.MappingStartEvent):
+                value = next_value()
+                if key == "name":
+                    yield "name", value
+                continue
+            
+            loader.get_event()
+            while not loader.check_event(yaml.MappingEndEvent):
+                section = next_value()
+                if section == "nodes" and loader.check_event(yaml.MappingStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(yaml.MappingEndEvent):
+                        hostname = next_value()
+                        yield "node", (hostname, next_value())
+                    loader.get_event()
+                elif section == "links" and loader.check_event(yaml.SequenceStartEvent):
+                    loader.get_event()
+                    while not loader.check_event(yaml.SequenceEndEvent):
+                        yield "link", next_value()
+                    loader.get_event()
+                else:
+                    next_value()
+            loader.get_event()
+    finally:
+        loader.dispose()
+
+
+def flush_rows(model, rows):
+    """Insert and clear buffered rows once a full batch is ready; returns the rows written."""
+    if len(rows) < IMPORT_BATCH_SIZE:
+        return 0
+    session.execute(insert(model), rows)
+    written = len(rows)
+    rows.clear()
+    return written
+
 
 def file_selector(title="Select File", file_extensions=None):
     """
@@ -158,8 +284,251 @@ def file_selector(title="Select File", file_extensions=None):
         return None
 
 
-def import_links_from_containerlab(lab_name, filename=None):
-    """Function to import links from a Containerlab topology YAML file."""
+def parse_containerlab_link(link, lab_name):
+    """Return the Link row dict for a point-to-point containerlab link, or None."""
+    endpoints = (link or {}).get("endpoints", [])
+    if len(endpoints) == 2:
+        source = endpoints[0].split(":")
+        destination = endpoints[1].split(":")
+        if len(source) == 2 and len(destination) == 2:
+            source_host, source_interface = source
+            destination_host, destination_interface = destination
+            return {
+                "source_host": source_host,
+                "source_interface": source_interface,
+                "destination_host": destination_host,
+                "destination_interface": destination_interface,
+                "lab_name": lab_name,
+            }
+    return None
+
+
+def parse_containerlab_node(hostname, node_data, lab_name):
+    """Return the Host row dict for a containerlab node, or None for bridge nodes."""
+    node_data = node_data or {}
+    kind = node_data.get("kind", "")
+    
+    # Skip bridge nodes
+    if kind == "bridge":
+        return None
+    
+    return {
+        "hostname": hostname,
+        "ip_address": node_data.get("mgmt-ipv4", ""),  # Use mgmt-ipv4 for address
+        # Map containerlab kind to network_os using the dictionary
+        "network_os": CONTAINERLAB_KIND_TO_NETWORK_OS.get(kind, ""),
+        "username": "admin",      # Default containerlab username
+        "password": "admin@123",  # Default containerlab password
+        "image_type": kind,       # Use kind for image_type
+        "lab_name": lab_name,
+        "console": "",
+    }
+
+
+def print_host_rows(host_rows):
+    """Print host row dicts as a table."""
+    print(
+        tabulate(
+            [
+                [
+                    host["hostname"],
+                    host["ip_address"],
+                    host["network_os"],
+                    host["username"],
+                    host["password"],
+                    host["image_type"],
+                    host["lab_name"],
+                    host["console"],
+                ]
+                for host in host_rows
+            ],
+            headers=[
+                "Hostname",
+                "IP Address",
+                "Network OS",
+                "Username",
+                "Password",
+                "Image Type",
+                "Lab",
+                "Console",
+            ],
+        )
+    )
+
+
+def print_link_rows(link_rows):
+    """Print link row dicts as a table."""
+    print(
+        tabulate(
+            [
+                [
+                    link["source_host"],
+                    link["source_interface"],
+                    link["destination_host"],
+                    link["destination_interface"],
+                    link["lab_name"],
+                ]
+                for link in link_rows
+            ],
+            headers=[
+                "Source Host",
+                "Source Interface",
+                "Destination Host",
+                "Destination Interface",
+                "Lab",
+            ],
+        )
+    )
+
+
+def link_key(source_host, source_interface, destination_host, destination_interface):
+    """Return an endpoint-order independent key for a link."""
+    return frozenset([(source_host, source_interface), (destination_host, destination_interface)])
+
+
+def sync_containerlab_topology(lab_name, host_rows, link_rows, sync_hosts=True):
+    """
+    Apply only the differences between parsed topology rows and the lab in the database.
+    
+    Hosts are matched by hostname: new nodes are inserted, kind/network OS changes and
+    new mgmt-ipv4 addresses are updated, and nodes no longer in the topology are deleted.
+    Credentials and console settings edited in the tool are kept.
+    
+    Links are matched by their endpoints in either order. A link with one endpoint
+    that now connects somewhere else is updated in place, keeping that endpoint as
+    its source; state and impairment columns of existing links are never touched.
+    Hosts that are deleted also lose their backup history and health status.
+    
+    Nothing is committed; the caller commits the whole sync as one transaction.
+    
+    Returns:
+        Dict of counts: hosts/links added, updated, deleted and unchanged
+    """
+    counts = {
+        "hosts_added": 0, "hosts_updated": 0, "hosts_deleted": 0, "hosts_unchanged": 0,
+        "links_added": 0, "links_updated": 0, "links_deleted": 0, "links_unchanged": 0,
+    }
+    
+    if sync_hosts:
+        existing_hosts = {
+            host.hostname: host for host in session.query(Host).filter_by(lab_name=lab_name).all()
+        }
+        new_hosts = []
+        seen = set()
+        for row in host_rows:
+            seen.add(row["hostname"])
+            host = existing_hosts.get(row["hostname"])
+            if host is None:
+                new_hosts.append(row)
+                continue
+            changed = False
+            for field in ("network_os", "image_type"):
+                if getattr(host, field) != row[field]:
+                    setattr(host, field, row[field])
+                    changed = True
+            if row["ip_address"] and host.ip_address != row["ip_address"]:
+                host.ip_address = row["ip_address"]
+                changed = True
+            counts["hosts_updated" if changed else "hosts_unchanged"] += 1
+        
+        removed_hosts = [host for hostname, host in existing_hosts.items() if hostname not in seen]
+        removed_host_ids = [host.id for host in removed_hosts]
+        if removed_hosts:
+            removed_hostnames = [host.hostname for host in removed_hosts]
+            session.execute(delete(Host).where(Host.id.in_(removed_host_ids)))
+            # Backup history and health status go with the host, as when a lab is deleted
+            for model in (ConfigBackup, HostHealth):
+                session.execute(
+                    delete(model)
+                    .where(model.lab_name == lab_name)
+                    .where(model.hostname.in_(removed_hostnames))
+                )
+        if new_hosts:
+            session.execute(insert(Host), new_hosts)
+        counts["hosts_added"] = len(new_hosts)
+        counts["hosts_deleted"] = len(removed_host_ids)
+    
+    existing_links = {
+        link_key(link.source_host, link.source_interface,
+                 link.destination_host, link.destination_interface): link
+        for link in session.query(Link).filter_by(lab_name=lab_name).all()
+    }
+    unmatched_rows = []
+    matched_keys = set()
+    for row in link_rows:
+        key = link_key(row["source_host"], row["source_interface"],
+                       row["destination_host"], row["destination_interface"])
+        if key in existing_links and key not in matched_keys:
+            matched_keys.add(key)
+            counts["links_unchanged"] += 1
+        else:
+            unmatched_rows.append(row)
+    
+    # Existing links left over are either rewired (one endpoint kept, on either side
+    # of the topology entry) or removed. Links keeping their source endpoint, where
+    # impairments are applied, are matched first.
+    leftover = [link for key, link in existing_links.items() if key not in matched_keys]
+    rewired = {}  # id(row) -> (link, kept endpoint, other endpoint)
+    for side in ("source", "destination"):
+        by_endpoint = {
+            (getattr(link, f"{side}_host"), getattr(link, f"{side}_interface")): link
+            for link in leftover
+        }
+        for row in unmatched_rows:
+            if id(row) in rewired:
+                continue
+            endpoints = [
+                (row["source_host"], row["source_interface"]),
+                (row["destination_host"], row["destination_interface"]),
+            ]
+            for kept, other in (endpoints, endpoints[::-1]):
+                link = by_endpoint.get(kept)
+                if link is not None and link in leftover:
+                    leftover.remove(link)
+                    rewired[id(row)] = (link, kept, other)
+                    break
+    
+    new_links = []
+    for row in unmatched_rows:
+        if id(row) not in rewired:
+            new_links.append(row)
+            continue
+        link, kept, other = rewired[id(row)]
+        link.source_host, link.source_interface = kept
+        link.destination_host, link.destination_interface = other
+        counts["links_updated"] += 1
+    
+    removed_link_ids = [link.id for link in leftover]
+    if removed_link_ids:
+        session.execute(delete(Link).where(Link.id.in_(removed_link_ids)))
+    session.flush()
+    if new_links:
+        session.execute(insert(Link), new_links)
+    counts["links_added"] = len(new_links)
+    counts["links_deleted"] = len(removed_link_ids)
+    
+    return counts
+
+
+def print_sync_summary(counts, include_hosts=True):
+    """Print the counts returned by sync_containerlab_topology."""
+    if include_hosts:
+        print(
+            f"Hosts: {counts['hosts_added']} added, {counts['hosts_updated']} updated, "
+            f"{counts['hosts_deleted']} deleted, {counts['hosts_unchanged']} unchanged"
+        )
+    print(
+        f"Links: {counts['links_added']} added, {counts['links_updated']} updated, "
+        f"{counts['links_deleted']} deleted, {counts['links_unchanged']} unchanged"
+    )
+
+
+def import_links_from_containerlab(lab_name, filename=None, show_table=True, sync=False):
+    """
+    Function to import links from a Containerlab topology YAML file.
+    
+    With sync, only the differences to the links already in the lab are applied.
+    """
     if filename:
         yaml_file = filename
     else:
@@ -168,58 +537,63 @@ def import_links_from_containerlab(lab_name, filename=None):
             print("No topology file selected.")
             return
 
+    # Sync and the results table need every row; otherwise rows are inserted in batches
+    keep_rows = sync or show_table
+    
     try:
+        link_rows = []
+        link_count = 0
         with open(yaml_file, "r", encoding="utf-8") as file:
-            data = yaml.safe_load(file)
-            links = data.get("topology", {}).get("links", [])
-            links_added = []
-            for link in links:
-                endpoints = link.get("endpoints", [])
-                if len(endpoints) == 2:
-                    source = endpoints[0].split(":")
-                    destination = endpoints[1].split(":")
-                    if len(source) == 2 and len(destination) == 2:
-                        source_host, source_interface = source
-                        destination_host, destination_interface = destination
-                        new_link = Link(
-                            source_host=source_host,
-                            source_interface=source_interface,
-                            destination_host=destination_host,
-                            destination_interface=destination_interface,
-                            lab_name=lab_name,
-                        )
-                        session.add(new_link)
-                        links_added.append(new_link)
+            for kind, item in iter_containerlab_topology(file):
+                if kind != "link":
+                    continue
+                link_row = parse_containerlab_link(item, lab_name)
+                if link_row:
+                    link_rows.append(link_row)
+                    if not keep_rows:
+                        link_count += flush_rows(Link, link_rows)
+        
+        if sync:
+            counts = sync_containerlab_topology(lab_name, [], link_rows, sync_hosts=False)
             session.commit()
-            print(
-                tabulate(
-                    [
-                        [
-                            link.source_host,
-                            link.source_interface,
-                            link.destination_host,
-                            link.destination_interface,
-                            link.lab_name,
-                        ]
-                        for link in links_added
-                    ],
-                    headers=[
-                        "Source Host",
-                        "Source Interface",
-                        "Destination Host",
-                        "Destination Interface",
-                        "Lab",
-                    ],
-                )
-            )
+            print(f"Links synchronized from {yaml_file}:")
+            if show_table:
+                print_link_rows(link_rows)
+            print_sync_summary(counts, include_hosts=False)
+            return
+        
+        # Remaining rows, all in the same transaction
+        if link_rows:
+            session.execute(insert(Link), link_rows)
+            link_count += len(link_rows)
+        session.commit()
+        
+        if show_table:
+            print_link_rows(link_rows)
+        print(f"\nImport completed: {link_count} links")
+    except IntegrityError as e:
+        # Used to prevent having the same link added to the database
+        session.rollback()
+        print(f"IntegrityError: {e.orig}")
+        print("One or more links already exist in the database.")
     except FileNotFoundError:
+        session.rollback()
         print(f"File {yaml_file} not found.")
     except yaml.YAMLError as exc:
+        # Batches flushed before the error must not be committed later
+        session.rollback()
         print(f"Error parsing YAML file: {exc}")
 
 
-def import_from_containerlab_topology(lab_name):
-    """Function to import both hosts and links from a Containerlab topology YAML file."""
+def import_from_containerlab_topology(lab_name, filename=None, show_table=False, sync=False):
+    """
+    Function to import both hosts and links from a Containerlab topology YAML file.
+    
+    Nodes and links are written with set-based inserts in a single transaction.
+    Only summary counts are printed unless show_table is set. With sync, only the
+    differences to the hosts and links already in the lab are applied, keeping link
+    state and impairments.
+    """
     
     # Get lab info to check for remote configuration
     lab = session.query(Lab).filter_by(lab_name=lab_name).first()
@@ -228,9 +602,9 @@ def import_from_containerlab_topology(lab_name):
     has_remote = (lab and lab.remote_containerlab_host and 
                  lab.remote_containerlab_username and lab.topology_path)
     
-    yaml_file = None
+    yaml_file = filename
     
-    if has_remote:
+    if not yaml_file and has_remote:
         # Show options for local vs remote
         options = [
             "[l] Select local topology file",
@@ -249,11 +623,12 @@ def import_from_containerlab_topology(lab_name):
         if choice == 0:  # Local file
             yaml_file = file_selector("Select Local Containerlab Topology File")
         elif choice == 1:  # Remote scan
-            yaml_file = scan_remote_topology_files(lab)
+            # A sync must see the file as it is now, not a listing up to LISTING_TTL old
+            yaml_file = scan_remote_topology_files(lab, refresh=sync)
         else:  # Cancel
             print("Import cancelled.")
             return
-    else:
+    elif not yaml_file:
         # No remote config, use local file selector
         yaml_file = file_selector("Select Containerlab Topology File")
     
@@ -261,145 +636,336 @@ def import_from_containerlab_topology(lab_name):
         print("No topology file selected.")
         return
 
+    # Sync and the results table need every row; otherwise rows are inserted in batches
+    keep_rows = sync or show_table
+    
     try:
+        containerlab_name = None
+        host_rows = []
+        link_rows = []
+        host_count = 0
+        link_count = 0
         with open(yaml_file, "r", encoding="utf-8") as file:
-            data = yaml.safe_load(file)
-            topology = data.get("topology", {})
-            nodes = topology.get("nodes", {})
-            links = topology.get("links", [])
-            
-            # Capture the containerlab topology name and update the lab
-            containerlab_name = data.get("name")
-            if containerlab_name:
-                lab = session.query(Lab).filter_by(lab_name=lab_name).first()
-                if lab:
-                    lab.containerlab_name = containerlab_name
-                    session.add(lab)
-                    print(f"Captured containerlab topology name: {containerlab_name}")
-            
-            hosts_added = []
-            links_added = []
-            
-            # Import hosts/nodes (skip bridge nodes)
-            for hostname, node_data in nodes.items():
-                kind = node_data.get("kind", "")
-                
-                # Skip bridge nodes
-                if kind == "bridge":
-                    continue
-                
-                # Use kind for image_type, mgmt-ipv4 for address
-                mgmt_ipv4 = node_data.get("mgmt-ipv4", "")
-                
-                # Map containerlab kind to network_os using the dictionary
-                network_os = CONTAINERLAB_KIND_TO_NETWORK_OS.get(kind, "")
-            
-                
-                new_host = Host(
-                    hostname=hostname,
-                    ip_address=mgmt_ipv4,
-                    network_os=network_os,
-                    username="admin",     # Default containerlab username
-                    password="admin@123", # Default containerlab password
-                    image_type=kind,      # Use kind for image_type
-                    lab_name=lab_name,
-                    console="", 
-                )
-                session.add(new_host)
-                hosts_added.append(new_host)
-            
-            # Import links (reuse logic from import_links_from_containerlab)
-            for link in links:
-                endpoints = link.get("endpoints", [])
-                if len(endpoints) == 2:
-                    source = endpoints[0].split(":")
-                    destination = endpoints[1].split(":")
-                    if len(source) == 2 and len(destination) == 2:
-                        source_host, source_interface = source
-                        destination_host, destination_interface = destination
-                        new_link = Link(
-                            source_host=source_host,
-                            source_interface=source_interface,
-                            destination_host=destination_host,
-                            destination_interface=destination_interface,
-                            lab_name=lab_name,
-                        )
-                        session.add(new_link)
-                        links_added.append(new_link)
-            
-            # Commit all changes
+            for kind, item in iter_containerlab_topology(file):
+                if kind == "name":
+                    containerlab_name = item
+                elif kind == "node":
+                    host_row = parse_containerlab_node(item[0], item[1], lab_name)
+                    if host_row:
+                        host_rows.append(host_row)
+                        if not keep_rows:
+                            host_count += flush_rows(Host, host_rows)
+                elif kind == "link":
+                    link_row = parse_containerlab_link(item, lab_name)
+                    if link_row:
+                        link_rows.append(link_row)
+                        if not keep_rows:
+                            link_count += flush_rows(Link, link_rows)
+        
+        # Capture the containerlab topology name and update the lab
+        if containerlab_name:
+            lab = session.query(Lab).filter_by(lab_name=lab_name).first()
+            if lab:
+                lab.containerlab_name = containerlab_name
+                print(f"Captured containerlab topology name: {containerlab_name}")
+        
+        if sync:
+            counts = sync_containerlab_topology(lab_name, host_rows, link_rows)
             session.commit()
+            print(f"Containerlab topology synchronized from {yaml_file}:")
+            if show_table and host_rows:
+                print("\nHosts in topology:")
+                print_host_rows(host_rows)
+            if show_table and link_rows:
+                print("\nLinks in topology:")
+                print_link_rows(link_rows)
+            print_sync_summary(counts)
+            return
+        
+        # Remaining rows, committed together with any earlier batches
+        if host_rows:
+            session.execute(insert(Host), host_rows)
+            host_count += len(host_rows)
+        if link_rows:
+            session.execute(insert(Link), link_rows)
+            link_count += len(link_rows)
+        session.commit()
+        
+        if containerlab_name:
+            print(f"Containerlab topology '{containerlab_name}' imported successfully.")
+        # Display results
+        if show_table and host_rows:
+            print("\nHosts imported:")
+            print_host_rows(host_rows)
+        if show_table and link_rows:
+            print("\nLinks imported:")
+            print_link_rows(link_rows)
             
-            if containerlab_name:
-                print(f"Containerlab topology '{containerlab_name}' imported successfully.")
-            # Display results
-            if hosts_added:
-                print("\nHosts imported:")
-                print(
-                    tabulate(
-                        [
-                            [
-                                host.hostname,
-                                host.ip_address,
-                                host.network_os,
-                                host.username,
-                                host.password,
-                                host.image_type,
-                                host.lab_name,
-                                host.console,
-                            ]
-                            for host in hosts_added
-                        ],
-                        headers=[
-                            "Hostname",
-                            "IP Address",
-                            "Network OS",
-                            "Username",
-                            "Password",
-                            "Image Type",
-                            "Lab",
-                            "Console",
-                        ],
-                    )
-                )
-            
-            if links_added:
-                print("\nLinks imported:")
-                print(
-                    tabulate(
-                        [
-                            [
-                                link.source_host,
-                                link.source_interface,
-                                link.destination_host,
-                                link.destination_interface,
-                                link.lab_name,
-                            ]
-                            for link in links_added
-                        ],
-                        headers=[
-                            "Source Host",
-                            "Source Interface",
-                            "Destination Host",
-                            "Destination Interface",
-                            "Lab",
-                        ],
-                    )
-                )
-                
-            print(f"\nImport completed: {len(hosts_added)} hosts, {len(links_added)} links")
+        print(f"\nImport completed: {host_count} hosts, {link_count} links")
             
+    except IntegrityError as e:
+        # Used to prevent having the same host or link added to the database
+        session.rollback()
+        print(f"IntegrityError: {e.orig}")
+        print("One or more hosts or links already exist in the database.")
     except FileNotFoundError:
+        session.rollback()
         print(f"File {yaml_file} not found.")
     except yaml.YAMLError as exc:
+        # Batches flushed before the error must not be committed later
+        session.rollback()
         print(f"Error parsing YAML file: {exc}")
     except Exception as e:
         print(f"Error importing containerlab topology: {e}")
         session.rollback()
 
 
-def import_inv_from_yaml(lab_name, filename=None):
-    """Function to import hosts from an Ansible YAML inventory file."""
+def parse_containerlab_inspect(output):
+    """
+    Return the containers listed in `containerlab inspect --format json` output.
+    
+    Older containerlab releases wrap the list as {"containers": [...]}, newer ones
+    group it by lab name as {"<lab>": [...]}; both are flattened into one list.
+    """
+    data = json.loads(output or "{}")
+    if isinstance(data, list):
+        return data
+    if "containers" in data:
+        return data["containers"] or []
+    containers = []
+    for lab_containers in data.values():
+        if isinstance(lab_containers, list):
+            containers.extend(lab_containers)
+    return containers
+
+
+def run_containerlab_inspect(lab):
+    """
+    Run containerlab inspect once, locally or on the lab's remote host.
+    
+    Returns:
+        List of container dicts, or None if inspect failed
+    """
+    from device_actions import run_remote_script
+    
+    if lab.containerlab_name:
+        command = f"sudo containerlab inspect --name {lab.containerlab_name} --format json"
+    else:
+        command = "sudo containerlab inspect --all --format json"
+    
+    if lab.remote_containerlab_host:
+        result = run_remote_script(
+            lab.remote_containerlab_host,
+            lab.remote_containerlab_username,
+            command,
+            "containerlab inspect",
+        )
+    else:
+        print("Running containerlab inspect locally...")
+        try:
+            result = subprocess.run(
+                ["bash", "-c", command], capture_output=True, text=True, check=False
+            )
+        except Exception as e:
+            print(f"Failed to run containerlab inspect: {e}")
+            return None
+    
+    if result is None or (lab.remote_containerlab_host and not result.connected):
+        return None
+    if result.returncode != 0:
+        print(f"containerlab inspect failed: {result.stderr.strip()}")
+        return None
+    try:
+        return parse_containerlab_inspect(result.stdout)
+    except ValueError as e:
+        print(f"Could not parse containerlab inspect output: {e}")
+        return None
+
+
+def match_inspect_containers(lab, hosts, containers):
+    """
+    Return {host.id: container} by matching each container name to a hostname.
+    
+    Container names are clab-{lab}-{node} by default; a custom or empty prefix is
+    handled by matching the "-{node}" suffix when it is unambiguous. Without a
+    containerlab name the containers of every lab are listed, so a host matching
+    containers of more than one lab is left out and reported instead of guessed.
+    """
+    hosts_by_name = {host.hostname: host for host in hosts}
+    candidates = {}  # host.id -> matching containers
+    for container in containers:
+        name = container.get("name", "")
+        if lab.containerlab_name and container.get("lab_name") not in (None, lab.containerlab_name):
+            continue
+        
+        host = hosts_by_name.get(name)
+        if host is None and lab.containerlab_name:
+            prefix = f"clab-{lab.containerlab_name}-"
+            if name.startswith(prefix):
+                host = hosts_by_name.get(name[len(prefix):])
+        if host is None:
+            suffix_matches = [h for hostname, h in hosts_by_name.items() if name.endswith(f"-{hostname}")]
+            if len(suffix_matches) == 1:
+                host = suffix_matches[0]
+        if host is not None:
+            candidates.setdefault(host.id, []).append(container)
+    
+    matches = {}
+    ambiguous = []
+    for host in hosts:
+        found = candidates.get(host.id, [])
+        if len(found) == 1:
+            matches[host.id] = found[0]
+        elif found:
+            labs = sorted({container.get("lab_name") or "?" for container in found})
+            ambiguous.append(f"{host.hostname} ({', '.join(labs)})")
+    if ambiguous:
+        print(f"Skipped hosts matching containers of several labs: {'; '.join(ambiguous)}")
+        print("Set the lab's containerlab name so only its containers are inspected.")
+    return matches
+
+
+def discover_containerlab_hosts(lab_name):
+    """
+    Update the management address, container name and state of every host in a
+    containerlab lab from a single containerlab inspect call.
+    
+    Returns:
+        Number of hosts updated
+    """
+    lab = session.query(Lab).filter_by(lab_name=lab_name).first()
+    if not lab:
+        print(f"Lab '{lab_name}' not found.")
+        return 0
+    
+    containers = run_containerlab_inspect(lab)
+    if containers is None:
+        return 0
+    
+    hosts = session.query(Host).filter_by(lab_name=lab_name).all()
+    matches = match_inspect_containers(lab, hosts, containers)
+    
+    updates = []
+    for host in hosts:
+        container = matches.get(host.id)
+        if not container:
+            continue
+        # ipv4_address is "172.20.20.2/24" in most releases; keep the address only
+        ip_address = (container.get("ipv4_address") or "").split("/")[0]
+        if ip_address in ("", "N/A"):
+            ip_address = host.ip_address
+        updates.append({
+            "id": host.id,
+            "ip_address": ip_address,
+            "container_name": container.get("name"),
+            "state": container.get("state"),
+        })
+    
+    # Set-based update of every matched host by primary key
+    if updates:
+        session.execute(update(Host), updates)
+    session.commit()
+    
+    hostnames = {host.id: host.hostname for host in hosts}
+    table = [
+        [hostnames[row["id"]], row["container_name"], row["ip_address"], row["state"]]
+        for row in updates
+    ]
+    if table:
+        print(tabulate(table, headers=["Hostname", "Container", "IP Address", "State"]))
+    unmatched = [host.hostname for host in hosts if host.id not in matches]
+    print(f"\nUpdated {len(updates)} of {len(hosts)} hosts from containerlab inspect.")
+    if unmatched:
+        print(f"No running container found for: {', '.join(unmatched)}")
+    return len(updates)
+
+
+def resolve_console_domain(console, groups, default_domain=None, domain_rules=None, batch=False):
+    """
+    Qualify a console hostname that has no domain.
+    
+    The first of the host's groups (innermost first) with an entry in domain_rules
+    wins, then default_domain. Without either, the user is prompted unless batch is
+    set, in which case the console is kept as-is.
+    """
+    if not console or ":" in console or "." in console:
+        return console
+    
+    for group in groups:
+        if domain_rules and domain_rules.get(group):
+            return f"{console}.{domain_rules[group]}"
+    if default_domain:
+        return f"{console}.{default_domain}"
+    if batch:
+        return console
+    
+    # If Console is a hostname without domain, prompt for domain
+    domain = input(f"Enter domain for console '{console}' (or press Enter to use as-is): ").strip()
+    if domain:
+        console = f"{console}.{domain}"
+    return console
+
+
+def load_vars_file(path):
+    """Return the variables in a YAML vars file, or {} if it is empty."""
+    with open(path, "r", encoding="utf-8") as file:
+        return load_yaml(file) or {}
+
+
+def load_inventory_vars(vars_dir, kind):
+    """
+    Load Ansible group_vars or host_vars (kind) from vars_dir.
+    
+    Supports both <kind>/<name>.yml (or .yaml, or no extension) files and
+    <kind>/<name>/ directories whose YAML files are merged in name order.
+    
+    Returns:
+        Dict mapping group or host name to its variables
+    """
+    tree = os.path.join(vars_dir, kind)
+    if not os.path.isdir(tree):
+        return {}
+    
+    variables = {}
+    for entry in sorted(os.listdir(tree)):
+        path = os.path.join(tree, entry)
+        if os.path.isdir(path):
+            name = entry
+            merged = {}
+            for vars_file in sorted(os.listdir(path)):
+                if vars_file.endswith((".yml", ".yaml")):
+                    merged.update(load_vars_file(os.path.join(path, vars_file)))
+            variables.setdefault(name, {}).update(merged)
+        elif entry.endswith((".yml", ".yaml")) or "." not in entry:
+            name = os.path.splitext(entry)[0]
+            variables.setdefault(name, {}).update(load_vars_file(path))
+    return variables
+
+
+def write_inventory_hosts(host_rows, unresolved_consoles=None):
+    """Insert inventory host rows in a single transaction and print them."""
+    if host_rows:
+        session.execute(insert(Host), host_rows)
+    session.commit()
+    print_host_rows(host_rows)
+    print(f"\nImport completed: {len(host_rows)} hosts")
+    if unresolved_consoles:
+        print(f"Consoles left without a domain: {', '.join(unresolved_consoles)}")
+
+
+def import_inv_from_yaml(lab_name, filename=None, default_domain=None, domain_rules=None,
+                        vars_dir=None, batch=False):
+    """
+    Function to import hosts from an Ansible YAML inventory file.
+    
+    group_vars/ and host_vars/ next to the inventory (or under vars_dir) are merged
+    the way Ansible does: outer groups first, then inner groups, then host variables.
+    A host listed in several groups is imported once, with the variables of all of
+    its groups merged.
+    Consoles without a domain are qualified by domain_rules ({group: domain}) or
+    default_domain; with batch set nothing is prompted for. All hosts are written in
+    a single transaction.
+    """
     if filename:
         yaml_file = filename
     else:
@@ -408,100 +974,109 @@ def import_inv_from_yaml(lab_name, filename=None):
             print("No inventory file selected.")
             return
 
-    def process_group(group_name, group_data, parent_vars=None):
-        """Recursively process groups to find hosts."""
-        hosts_found = []
+    vars_dir = vars_dir or os.path.dirname(os.path.abspath(yaml_file))
+    group_vars_files = load_inventory_vars(vars_dir, "group_vars")
+    host_vars_files = load_inventory_vars(vars_dir, "host_vars")
+    unresolved_consoles = []
+
+    group_depths = {"all": 0}
+    group_inline_vars = {}
+    group_parents = {}
+    host_groups = {}  # hostname -> groups the host is listed in, in file order
+    host_inline_vars = {}
+
+    def process_group(group_name, group_data, parent_name, depth):
+        """Recursively record group variables, parents and host membership."""
+        group_data = group_data or {}
+        group_depths[group_name] = max(group_depths.get(group_name, 0), depth)
+        group_parents.setdefault(group_name, set()).add(parent_name)
+        group_inline_vars.setdefault(group_name, {}).update(group_data.get("vars", {}) or {})
         
-        # Merge parent vars with current group vars
-        current_vars = parent_vars.copy() if parent_vars else {}
-        group_vars = group_data.get("vars", {})
-        current_vars.update(group_vars)
+        for hostname, host_data in (group_data.get("hosts", {}) or {}).items():
+            memberships = host_groups.setdefault(hostname, [])
+            if group_name not in memberships:
+                memberships.append(group_name)
+            host_inline_vars.setdefault(hostname, {}).update(host_data or {})
         
-        # Process direct hosts in this group
-        hosts = group_data.get("hosts", {})
-        for hostname, host_data in hosts.items():
-            # Use ansible_network_os if available, otherwise use group name as network_os
-            network_os = current_vars.get("ansible_network_os", group_name)
-            
-            console = host_data.get("console", "")
-            if console and not (":" in console or "." in console):
-                # If Console is a hostname without domain, prompt for domain
-                domain = input(f"Enter domain for console '{console}' (or press Enter to use as-is): ").strip()
-                if domain:
-                    console = f"{console}.{domain}"
-            
-            new_host = Host(
-                hostname=hostname,
-                ip_address=host_data.get("ansible_host", ""),
-                network_os=network_os,
-                username=current_vars.get("ansible_user", ""),
-                password=current_vars.get("ansible_password", ""),
-                image_type="",  # Leave blank for hardware labs - network_os should be explicit in vars
-                lab_name=lab_name,
-                console=console,
-            )
-            hosts_found.append(new_host)
-        
-        # Process children groups recursively
-        children = group_data.get("children", {})
+        children = group_data.get("children", {}) or {}
         for child_name, child_data in children.items():
-            child_hosts = process_group(child_name, child_data, current_vars)
-            hosts_found.extend(child_hosts)
+            process_group(child_name, child_data, group_name, depth + 1)
+
+    def sort_groups(groups):
+        """Order groups as Ansible merges them: by depth, ansible_group_priority, then name."""
+        def priority(group):
+            merged = dict(group_inline_vars.get(group, {}))
+            merged.update(group_vars_files.get(group, {}))
+            return int(merged.get("ansible_group_priority", 1))
+        return sorted(groups, key=lambda group: (group_depths.get(group, 0), priority(group), group))
+
+    def build_host_row(hostname, base_vars):
+        """Merge a host's variables from all of its groups into one host row."""
+        groups = set()
+        pending = list(host_groups[hostname])
+        while pending:
+            group = pending.pop()
+            if group in groups or group == "all":
+                continue
+            groups.add(group)
+            pending.extend(group_parents.get(group, ()))
+        ordered = sort_groups(groups)
+        
+        # Inventory group vars, then group_vars files (all first), then host vars;
+        # deeper groups override their parents
+        host_vars = dict(base_vars)
+        for group in ordered:
+            host_vars.update(group_inline_vars.get(group, {}))
+        host_vars.update(group_vars_files.get("all", {}))
+        for group in ordered:
+            host_vars.update(group_vars_files.get(group, {}))
+        host_vars.update(host_inline_vars.get(hostname, {}))
+        host_vars.update(host_vars_files.get(hostname, {}))
         
-        return hosts_found
+        # Use ansible_network_os if available, otherwise the host's innermost group
+        innermost = sort_groups(host_groups[hostname])[-1]
+        network_os = host_vars.get("ansible_network_os", innermost)
+        
+        console = resolve_console_domain(
+            host_vars.get("console", ""), list(reversed(ordered)) + ["all"],
+            default_domain, domain_rules, batch
+        )
+        if console and not (":" in console or "." in console):
+            unresolved_consoles.append(console)
+        
+        return {
+            "hostname": hostname,
+            "ip_address": host_vars.get("ansible_host", ""),
+            "network_os": network_os,
+            "username": host_vars.get("ansible_user", ""),
+            "password": host_vars.get("ansible_password", ""),
+            "image_type": "",  # Leave blank for hardware labs - network_os should be explicit in vars
+            "lab_name": lab_name,
+            "console": console,
+        }
 
     try:
         with open(yaml_file, "r", encoding="utf-8") as file:
-            data = yaml.safe_load(file)
-            children = data.get("all", {}).get("children", {})
-            hosts_added = []
-            
-            for group, group_data in children.items():
-                if group == "bridge":
-                    continue
-                
-                group_hosts = process_group(group, group_data)
-                hosts_added.extend(group_hosts)
-            
-            # Add all hosts to database
-            for host in hosts_added:
-                session.add(host)
-            
-            # Save changes to hosts.db
-            session.commit()
-            print(
-                tabulate(
-                    [
-                        [
-                            host.hostname,
-                            host.ip_address,
-                            host.network_os,
-                            host.username,
-                            host.password,
-                            host.image_type,
-                            host.lab_name,
-                            host.console,
-                        ]
-                        for host in hosts_added
-                    ],
-                    headers=[
-                        "Hostname",
-                        "IP Address",
-                        "Network OS",
-                        "Username",
-                        "Password",
-                        "Image Type",
-                        "Lab",
-                        "Console",
-                    ],
-                )
-            )
+            data = load_yaml(file)
+        all_group = data.get("all", {}) or {}
+        base_vars = dict(all_group.get("vars", {}) or {})
+        children = all_group.get("children", {}) or {}
+        
+        for group, group_data in children.items():
+            if group == "bridge":
+                continue
+            process_group(group, group_data, "all", 1)
+        
+        # A host listed in several groups becomes a single row
+        host_rows = [build_host_row(hostname, base_vars) for hostname in host_groups]
+        write_inventory_hosts(host_rows, unresolved_consoles if batch else None)
     except IntegrityError as e:
         # Used to prevent having the same host added to the database
         session.rollback()
-        print(f"IntegrityError: {e}")
+        print(f"IntegrityError: {e.orig}")
         print("One or more hosts already exist in the database.")
     except Exception as e:
+        session.rollback()
         print(f"Failed to import from YAML: {e}")
 
 
@@ -570,8 +1145,14 @@ def manually_add_host(lab_name):
         print(f"Host {hostname} already exists in the database.")
 
 
-def import_inv_from_ini(lab_name, filename=None):
-    """Function to import hosts from an Ansible INI inventory file."""
+def import_inv_from_ini(lab_name, filename=None, default_domain=None, domain_rules=None,
+                       vars_dir=None, batch=False):
+    """
+    Function to import hosts from an Ansible INI inventory file.
+    
+    Takes the same batch options as import_inv_from_yaml; sections are treated as
+    groups for group_vars and domain_rules.
+    """
     if filename:
         ini_file = filename
     else:
@@ -580,80 +1161,98 @@ def import_inv_from_ini(lab_name, filename=None):
             print("No inventory file selected.")
             return
 
-    hosts_added = []
+    vars_dir = vars_dir or os.path.dirname(os.path.abspath(ini_file))
+    group_vars_files = load_inventory_vars(vars_dir, "group_vars")
+    host_vars_files = load_inventory_vars(vars_dir, "host_vars")
+    unresolved_consoles = []
+    host_rows = {}
     try:
         config = ConfigParser()
         config.read(ini_file)
-        for section in config.sections():
+        # Sections are merged in name order, as Ansible orders groups of equal depth
+        for section in sorted(config.sections()):
+            section_vars = dict(group_vars_files.get("all", {}))
+            section_vars.update(group_vars_files.get(section, {}))
             for hostname, ip_address in config.items(section):
+                host_vars = dict(section_vars)
+                host_vars.update(host_vars_files.get(hostname, {}))
+                
                 # Use ansible_network_os if available, otherwise use section name as network_os
-                network_os = config.get(section, "ansible_network_os", fallback=section)
+                network_os = config.get(
+                    section, "ansible_network_os", fallback=host_vars.get("ansible_network_os", section)
+                )
                 
-                console = config.get(section, "console", fallback="")
-                if console and not (":" in console or "." in console):
-                    # Console is a hostname without domain, prompt for domain
-                    domain = (
-                    input(f"Enter domain for console '{console}' (or press Enter to use as-is): ").strip()
-                    )
-                    if domain:
-                        console = f"{console}.{domain}"
+                console = config.get(section, "console", fallback=host_vars.get("console", ""))
+                console = resolve_console_domain(
+                    console, (section, "all"), default_domain, domain_rules, batch
+                )
+                if console and not (":" in console or "." in console) and console not in unresolved_consoles:
+                    unresolved_consoles.append(console)
                 
-                new_host = Host(
-                    hostname=hostname,
-                    ip_address=ip_address,
-                    network_os=network_os,
-                    username=config.get(section, "ansible_user", fallback=""),
-                    password=config.get(
-                        section, "ansible_password", fallback=""
+                row = {
+                    "hostname": hostname,
+                    "ip_address": ip_address,
+                    "network_os": network_os,
+                    "username": config.get(
+                        section, "ansible_user", fallback=host_vars.get("ansible_user", "")
                     ),
-                    image_type="",  # Leave blank for hardware labs - network_os should be explicit
-                    lab_name=lab_name,
-                    console=console or None,
-                )
-                session.add(new_host)
-                hosts_added.append(new_host)
-        # Save changes to hosts.db
-        session.commit()
-        print(
-            tabulate(
-                [
-                    [
-                        host.hostname,
-                        host.ip_address,
-                        host.network_os,
-                        host.username,
-                        host.password,
-                        host.image_type,
-                        host.lab_name,
-                        host.console,
-                    ]
-                    for host in hosts_added
-                ],
-                headers=[
-                    "Hostname",
-                    "IP Address",
-                    "Network OS",
-                    "Username",
-                    "Password",
-                    "Image Type",
-                    "Lab",
-                    "Console",
-                ],
-            )
-        )
+                    "password": config.get(
+                        section, "ansible_password", fallback=host_vars.get("ansible_password", "")
+                    ),
+                    "image_type": "",  # Leave blank for hardware labs - network_os should be explicit
+                    "lab_name": lab_name,
+                    "console": console or None,
+                }
+                # A host listed in several sections becomes a single row; values set
+                # by a later section override earlier ones
+                merged = host_rows.setdefault(hostname, row)
+                if merged is not row:
+                    merged.update({key: value for key, value in row.items() if value})
+        write_inventory_hosts(list(host_rows.values()), unresolved_consoles if batch else None)
     except IntegrityError as e:
         # Used to prevent having the same host added to the database
         session.rollback()
-        print(f"IntegrityError: {e}")
-        print(f"Host {hostname} already exists in the database.")
+        print(f"IntegrityError: {e.orig}")
+        print("One or more hosts already exist in the database.")
     except Exception as e:
+        session.rollback()
         print(f"Failed to import from INI: {e}")
 
 
-def scan_remote_topology_files(lab):
-    """Scan remote path for containerlab topology YAML files and let user select one."""
-    import subprocess
-    import tempfile
+def batch_import_inventory(lab_name, filename, default_domain=None, domain_rules=None, vars_dir=None):
+    """
+    Import an Ansible YAML or INI inventory without any prompts, so it can be
+    scripted. See import_inv_from_yaml for the options.
+    """
+    options = dict(default_domain=default_domain, domain_rules=domain_rules,
+                   vars_dir=vars_dir, batch=True)
+    if filename.endswith(".ini"):
+        import_inv_from_ini(lab_name, filename, **options)
+    else:
+        import_inv_from_yaml(lab_name, filename, **options)
+
+
+def parse_domain_rules(text):
+    """Parse "group=domain, group2=domain2" into a {group: domain} dict."""
+    rules = {}
+    for rule in (text or "").split(","):
+        group, sep, domain = rule.partition("=")
+        if sep and group.strip() and domain.strip():
+            rules[group.strip()] = domain.strip()
+    return rules
+
+
+def scan_remote_topology_files(lab, refresh=False):
+    """
+    Let the user select a containerlab topology YAML file from the lab's remote path.
+    
+    The remote listing and downloaded files come from the local topology cache, so
+    SSH is only used when the listing is stale or the selected file changed. With
+    refresh the remote path is always listed again first.
+    """
+    import time
+    import topology_cache
+    from device_actions import get_remote_target
     
     remote_host = lab.remote_containerlab_host
     remote_user = lab.remote_containerlab_username  
@@ -663,59 +1262,50 @@ def scan_remote_topology_files(lab):
         print("Remote configuration incomplete. Missing host, username, or path.")
         return None
     
+    remote_target = get_remote_target(remote_host, remote_user)
+    
     try:
-        # Use SSH to list YAML files in the remote directory (top level only)
-        # Use find with -maxdepth 1 to avoid shell wildcard issues
-        ssh_command = (
-        f"ssh {remote_user}@{remote_host} \
-        'find {remote_path} -maxdepth 1 \
-        -type f \\( -name \"*.yml\" -o -name \"*.yaml\" \\) 2>/dev/null'"
-        )
-        result = subprocess.run(ssh_command, shell=True, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"Failed to scan remote path: {result.stderr}")
-            return None
-        
-        remote_files = [f.strip() for f in result.stdout.split('\n') if f.strip()]
-        
-        if not remote_files:
-            print(f"No YAML files found in remote path: {remote_path}")
-            return None
-        
-        # Let user select a file
-        options = []
-        for i, file_path in enumerate(remote_files):
-            filename = os.path.basename(file_path)
-            options.append(f"[{i+1}] {filename} ({file_path})")
-        options.append("[c] Cancel")
-        
-        terminal_menu = TerminalMenu(
-            options,
-            menu_cursor_style=("fg_red", "bold"),
-            menu_highlight_style=("bg_green", "bold"),
-            title=f"Remote Topology Files - {remote_user}@{remote_host}:{remote_path}",
-        )
-        choice = terminal_menu.show()
-        
-        if choice is None or choice == len(options) - 1:  # Cancel
-            return None
-        
-        selected_remote_file = remote_files[choice]
-        
-        # Download the selected file to a temporary location
-        temp_dir = tempfile.mkdtemp()
-        local_filename = os.path.basename(selected_remote_file)
-        local_path = os.path.join(temp_dir, local_filename)
-        
-        scp_command = f"scp {remote_user}@{remote_host}:{selected_remote_file} {local_path}"
-        scp_result = subprocess.run(scp_command, shell=True, capture_output=True, text=True)
-        
-        if scp_result.returncode != 0:
-            print(f"Failed to download remote file: {scp_result.stderr}")
-            return None
+        while True:
+            remote_files, fetched_at = topology_cache.list_remote_topologies(
+                remote_target, remote_path, refresh=refresh
+            )
+            if remote_files is None:
+                return None
+            if not remote_files:
+                print(f"No YAML files found in remote path: {remote_path}")
+                return None
+            
+            # Let user select a file
+            index = topology_cache.load_index()
+            options = []
+            for i, entry in enumerate(remote_files):
+                filename = os.path.basename(entry["path"])
+                modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["mtime"]))
+                cached = " [cached]" if topology_cache.is_cached(remote_target, entry, index=index) else ""
+                options.append(f"[{i+1}] {filename} ({entry['size']} bytes, {modified}){cached}")
+            options.append("[r] Refresh remote listing")
+            options.append("[c] Cancel")
+            
+            age = int(time.time() - fetched_at)
+            terminal_menu = TerminalMenu(
+                options,
+                menu_cursor_style=("fg_red", "bold"),
+                menu_highlight_style=("bg_green", "bold"),
+                title=f"Remote Topology Files - {remote_user}@{remote_host}:{remote_path} (listed {age}s ago)",
+            )
+            choice = terminal_menu.show()
+            
+            if choice == len(options) - 2:  # Refresh
+                refresh = True
+                continue
+            if choice is None or choice == len(options) - 1:  # Cancel
+                return None
+            break
         
-        print(f"Downloaded {selected_remote_file} to {local_path}")
+        selected = remote_files[choice]
+        local_path = topology_cache.fetch_remote_topology(remote_target, selected)
+        if local_path:
+            print(f"Using {selected['path']} from {local_path}")
         return local_path
         
     except Exception as e:
@@ -1,10 +1,27 @@
 """Interface management functions for the POC Helper Menu tool."""
 
+import fnmatch
+import os
 import subprocess
+import threading
+import time
+from datetime import datetime
+import yaml
 from simple_term_menu import TerminalMenu
-from models import Host, Link, Lab, session
+from tabulate import tabulate
+from models import Link, Lab, ImpairmentProfile, Session, session
 import main
 
+
+# Impairment columns of the Link table, in netem option order
+IMPAIRMENT_FIELDS = ("jitter", "latency", "loss", "rate", "corruption")
+
+# Prefix of the per-command result lines printed by bulk netem scripts
+NETEM_RESULT_MARKER = "NETEM_RESULT"
+
+# Currently running impairment scenario, if any (see start_impairment_scenario)
+active_scenario = None
+
 def manage_impairment(link):
     """Function to manage impairments on a network interface."""
     impairments = {
@@ -78,50 +95,64 @@ def manage_impairment(link):
         manage_impairment(link)
 
 
+def get_container_name(lab, host):
+    """
+    Return the containerlab container name for a host: the name discovered by
+    containerlab inspect, else clab-{containerlab_name}-{hostname}.
+    """
+    if host.container_name:
+        return host.container_name
+    if lab.containerlab_name:
+        return f"clab-{lab.containerlab_name}-{host.hostname}"
+    # Fallback to just hostname if containerlab_name is not set
+    print(f"Warning: No containerlab_name found for lab {lab.lab_name}, using hostname only")
+    return host.hostname
+
+
+def get_link_impairments(link):
+    """Return the impairment values stored on a link as a dict."""
+    return {field: getattr(link, field) for field in IMPAIRMENT_FIELDS}
+
+
+def build_netem_command(container_name, interface, impairments):
+    """Build the containerlab tools netem set command for a set of impairment values."""
+    command = (
+        f"sudo containerlab tools netem set -n {container_name} "
+        f"-i {interface}"
+    )
+    if impairments.get("latency", 0) > 0:
+        command += f" --delay {impairments['latency']}ms"
+    if impairments.get("jitter", 0) > 0:
+        command += f" --jitter {impairments['jitter']}ms"
+    if impairments.get("loss", 0) > 0:
+        command += f" --loss {impairments['loss']}"
+    if impairments.get("rate", 0) > 0:
+        command += f" --rate {impairments['rate']}"
+    if impairments.get("corruption", 0) > 0:
+        command += f" --corruption {impairments['corruption']}"
+    return command
+
+
 def apply_impairments(link):
     """
     Function to apply impairments to a network interface using containerlab
         tools netem set. Supports remote execution if lab has remote_containerlab_host set.
     """
     from device_actions import execute_remote_command
+    import lab_mgmt
     
     lab = session.query(Lab).filter_by(lab_name=link.lab_name).first()
     if not lab:
         print(f"Lab {link.lab_name} not found in database.")
         return
     
-    host = (
-        session.query(Host)
-        .filter(Host.hostname.contains(link.source_host))
-        .filter(Host.lab_name == link.lab_name)
-        .first()
-    )
+    host = lab_mgmt.resolve_host(link.lab_name, link.source_host)
     if not host:
         print(f"Host {link.source_host} not found in lab {link.lab_name}.")
         return
 
-    # Construct the containerlab container name: clab-{containerlab_name}-{hostname}
-    if lab.containerlab_name:
-        container_name = f"clab-{lab.containerlab_name}-{host.hostname}"
-    else:
-        # Fallback to just hostname if containerlab_name is not set
-        container_name = host.hostname
-        print(f"Warning: No containerlab_name found for lab {link.lab_name}, using hostname only")
-
-    command = (
-        f"sudo containerlab tools netem set -n {container_name} "
-        f"-i {link.source_interface}"
-    )
-    if link.latency > 0:
-        command += f" --delay {link.latency}ms"
-    if link.jitter > 0:
-        command += f" --jitter {link.jitter}ms"
-    if link.loss > 0:
-        command += f" --loss {link.loss}"
-    if link.rate > 0:
-        command += f" --rate {link.rate}"
-    if link.corruption > 0:
-        command += f" --corruption {link.corruption}"
+    container_name = get_container_name(lab, host)
+    command = build_netem_command(container_name, link.source_interface, get_link_impairments(link))
 
     print(f"Using container name: {container_name}")
 
@@ -146,6 +177,228 @@ def apply_impairments(link):
             print(f"Failed to apply impairments: {e}")
 
 
+def build_netem_script(commands, parallel=False):
+    """
+    Build a shell script that runs netem commands and prints one NETEM_RESULT line
+    per command with its key, exit status and last line of output. With parallel,
+    the commands run concurrently in background subshells.
+    """
+    lines = []
+    for key, command in commands:
+        line = (
+            f"out=$({command} 2>&1); rc=$?; "
+            f"printf '{NETEM_RESULT_MARKER} %s %s %s\\n' {key} \"$rc\" "
+            f"\"$(printf '%s' \"$out\" | tail -n 1)\""
+        )
+        lines.append(f"( {line} ) &" if parallel else line)
+    if parallel:
+        lines.append("wait")
+    return "\n".join(lines) + "\n"
+
+
+def parse_netem_results(output):
+    """Parse NETEM_RESULT lines into a dict of key -> (exit status, message)."""
+    results = {}
+    for line in output.splitlines():
+        if not line.startswith(NETEM_RESULT_MARKER + " "):
+            continue
+        parts = line.split(" ", 3)
+        if len(parts) < 3 or not parts[2].lstrip("-").isdigit():
+            continue
+        results[parts[1]] = (int(parts[2]), parts[3] if len(parts) > 3 else "")
+    return results
+
+
+def run_netem_script(lab, script, interactive=True):
+    """Run a netem script locally or on the lab's remote containerlab host. Returns stdout."""
+    from device_actions import run_remote_script
+    
+    if lab.remote_containerlab_host:
+        result = run_remote_script(
+            lab.remote_containerlab_host,
+            lab.remote_containerlab_username,
+            script,
+            "bulk impairments",
+            interactive=interactive,
+        )
+    else:
+        if interactive:
+            print("Applying impairments locally...")
+        try:
+            result = subprocess.run(
+                ["bash", "-s"], input=script, capture_output=True, text=True, check=False
+            )
+        except Exception as e:
+            if interactive:
+                print(f"Failed to apply impairments: {e}")
+            result = None
+    return result.stdout if result is not None else ""
+
+
+def apply_impairments_bulk(lab, targets, db_session=None, parallel=False, interactive=True):
+    """
+    Apply target impairment values to many links of a lab in one shell invocation
+    (a single SSH session for remote labs).
+    
+    Args:
+        lab: Lab the links belong to
+        targets: List of (link, impairments) tuples, impairments being a dict of
+            IMPAIRMENT_FIELDS values
+        db_session: Session used to store the applied values (defaults to the shared session)
+        parallel: Run the netem commands concurrently instead of one after another
+        interactive: Allow progress output and password prompts (False for background jobs)
+    
+    Returns:
+        Dict of link id -> (status, message) where status is "applied", "skipped"
+        (already at the target values) or "failed"
+    """
+    import lab_mgmt
+    
+    db_session = db_session or session
+    results = {}
+    commands = []
+    pending = {}
+    
+    hosts = lab_mgmt.build_host_map(lab.lab_name, db=db_session)
+    
+    # Reload the links before the "already at target" check: a scenario running in
+    # the background updates them through its own session, so values loaded earlier
+    # here may be stale
+    link_ids = [link.id for link, _ in targets]
+    if link_ids:
+        db_session.query(Link).filter(Link.id.in_(link_ids)).populate_existing().all()
+    
+    for link, impairments in targets:
+        impairments = {field: int(impairments.get(field, 0)) for field in IMPAIRMENT_FIELDS}
+        if get_link_impairments(link) == impairments:
+            results[link.id] = ("skipped", "already at target")
+            continue
+        
+        host = hosts.get(link.source_host)
+        if not host:
+            results[link.id] = ("failed", f"host {link.source_host} not found")
+            continue
+        
+        key = str(link.id)
+        commands.append((
+            key,
+            build_netem_command(get_container_name(lab, host), link.source_interface, impairments)
+        ))
+        pending[key] = (link, impairments)
+    
+    if commands:
+        output = run_netem_script(
+            lab, build_netem_script(commands, parallel=parallel), interactive=interactive
+        )
+        command_results = parse_netem_results(output)
+        
+        for key, (link, impairments) in pending.items():
+            if key not in command_results:
+                results[link.id] = ("failed", "no result returned")
+                continue
+            returncode, message = command_results[key]
+            if returncode != 0:
+                results[link.id] = ("failed", message or f"exit status {returncode}")
+                continue
+            for field, value in impairments.items():
+                setattr(link, field, value)
+            results[link.id] = ("applied", "")
+        
+        db_session.commit()
+    
+    return results
+
+
+def get_impairment_profiles():
+    """Return all impairment profiles, ordered by name."""
+    return session.query(ImpairmentProfile).order_by(ImpairmentProfile.name).all()
+
+
+def get_profile_impairments(profile):
+    """Return the impairment values of a profile as a dict."""
+    return {field: getattr(profile, field) for field in IMPAIRMENT_FIELDS}
+
+
+def describe_impairments(impairments):
+    """Return a short human readable summary of impairment values."""
+    units = {"jitter": "ms", "latency": "ms", "loss": "%", "rate": "kbit/s", "corruption": "%"}
+    parts = [
+        f"{field.capitalize()}: {value}{units[field]}"
+        for field, value in impairments.items() if value
+    ]
+    return ", ".join(parts) if parts else "No impairments"
+
+
+def apply_impairment_profile(lab, links, profile):
+    """
+    Apply a profile to a set of links concurrently, all or nothing.
+    
+    If any link fails, the links that did change are put back to their previous
+    values so the lab is never left half-way into a profile.
+    
+    Returns:
+        Tuple of (success, results) with results as returned by apply_impairments_bulk
+    """
+    impairments = get_profile_impairments(profile)
+    # Reload the links first: a scenario may have changed them since they were
+    # loaded, and rolling back to stale values would not restore the lab
+    link_ids = [link.id for link in links]
+    if link_ids:
+        session.query(Link).filter(Link.id.in_(link_ids)).populate_existing().all()
+    previous = {link.id: get_link_impairments(link) for link in links}
+    targets = [(link, impairments) for link in links]
+    
+    print(f"Applying profile '{profile.name}' ({describe_impairments(impairments)}) "
+          f"to {len(links)} links...")
+    results = apply_impairments_bulk(lab, targets, parallel=True)
+    print_impairment_results(targets, results)
+    
+    if not any(status == "failed" for status, _ in results.values()):
+        print(f"Profile '{profile.name}' applied.")
+        return True, results
+    
+    applied_links = [link for link in links if results[link.id][0] == "applied"]
+    if applied_links:
+        print(f"Profile '{profile.name}' failed on some links, rolling back {len(applied_links)} links...")
+        rollback_targets = [(link, previous[link.id]) for link in applied_links]
+        rollback_results = apply_impairments_bulk(lab, rollback_targets, parallel=True)
+        print_impairment_results(rollback_targets, rollback_results)
+        stuck = [link for link, _ in rollback_targets if rollback_results[link.id][0] == "failed"]
+        if stuck:
+            print(f"Rollback failed on {len(stuck)} links, which are left with profile '{profile.name}':")
+            for link in stuck:
+                print(
+                    f"  {link.source_host}:{link.source_interface} -> "
+                    f"{link.destination_host}:{link.destination_interface} "
+                    f"({rollback_results[link.id][1]})"
+                )
+    else:
+        print(f"Profile '{profile.name}' was not applied to any link.")
+    return False, results
+
+
+def print_impairment_results(targets, results):
+    """Print a per-link report of apply_impairments_bulk results."""
+    print(
+        tabulate(
+            [
+                [
+                    f"{link.source_host}:{link.source_interface}",
+                    f"{link.destination_host}:{link.destination_interface}",
+                    results.get(link.id, ("failed", ""))[0],
+                    results.get(link.id, ("failed", ""))[1],
+                ]
+                for link, _ in targets
+            ],
+            headers=["Source", "Destination", "Result", "Message"],
+        )
+    )
+    applied = sum(1 for status, _ in results.values() if status == "applied")
+    skipped = sum(1 for status, _ in results.values() if status == "skipped")
+    failed = sum(1 for status, _ in results.values() if status == "failed")
+    print(f"\nImpairments applied: {applied}, Skipped: {skipped}, Failed: {failed}")
+
+
 def enable_disable_interfaces(link):
     """
     Function to enable or disable network interfaces based on lab type.
@@ -169,12 +422,7 @@ def enable_disable_interfaces(link):
     
     if lab.lab_type == "hardware":
         # Hardware lab - only manage source interface
-        source_host = (
-            session.query(Host)
-            .filter(Host.hostname.contains(link.source_host))
-            .filter(Host.lab_name == link.lab_name)
-            .first()
-        )
+        source_host = lab_mgmt.resolve_host(link.lab_name, link.source_host)
         
         if not source_host:
             print(f"Source host {link.source_host} not found in lab {link.lab_name}.")
@@ -208,18 +456,8 @@ def enable_disable_interfaces(link):
 
     else:
         # Containerlab - manage both source and destination interfaces
-        source_host = (
-            session.query(Host)
-            .filter(Host.hostname.contains(link.source_host))
-            .filter(Host.lab_name == link.lab_name)
-            .first()
-        )
-        destination_host = (
-            session.query(Host)
-            .filter(Host.hostname.contains(link.destination_host))
-            .filter(Host.lab_name == link.lab_name)
-            .first()
-        )
+        source_host = lab_mgmt.resolve_host(link.lab_name, link.source_host)
+        destination_host = lab_mgmt.resolve_host(link.lab_name, link.destination_host)
 
         if not source_host and not destination_host:
             print(
@@ -309,3 +547,253 @@ def enable_disable_interfaces(link):
         except Exception as e:
             print(f"Failed to manage interfaces: {e}")
             session.rollback()  # Rollback in case of an error
+
+
+def load_impairment_scenario(scenario_file):
+    """
+    Load an impairment scenario (timeline) from a YAML file.
+    
+    Example:
+        name: core-convergence
+        steps:
+          - at: 0                      # seconds from scenario start
+            links: ["core*:*"]         # source host:interface globs, or "all"
+            set: {latency: 50}         # merged onto the current link values
+          - at: 30
+            links: ["core1:eth1"]
+            set: {loss: 5}
+          - at: 60
+            links: all
+            profile: lossy-wifi        # absolute values from a saved profile
+          - at: 90
+            restore: true              # back to the values from before the scenario
+    
+    Returns:
+        Dict with name and steps sorted by time
+    """
+    with open(scenario_file, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    
+    steps = data.get("steps") or []
+    if not steps:
+        raise ValueError("Scenario has no steps")
+    
+    if not isinstance(steps, list):
+        raise ValueError("Scenario 'steps' must be a list")
+    
+    # Every step is checked here so a typo fails before anything is applied, not
+    # minutes into the run
+    for step in steps:
+        if not isinstance(step, dict):
+            raise ValueError(f"Scenario step must be a mapping: {step}")
+        if "at" not in step:
+            raise ValueError(f"Scenario step is missing 'at': {step}")
+        try:
+            step["at"] = float(step["at"])
+        except (TypeError, ValueError):
+            raise ValueError(f"Scenario step has an invalid 'at' time: {step}")
+        if step["at"] < 0:
+            raise ValueError(f"Scenario step has a negative 'at' time: {step}")
+        if not (step.get("restore") or "set" in step or "profile" in step):
+            raise ValueError(f"Scenario step needs 'set', 'profile' or 'restore': {step}")
+        if "profile" in step and not isinstance(step["profile"], str):
+            raise ValueError(f"Scenario step 'profile' must be a profile name: {step}")
+        links = step.get("links")
+        if not (links is None or isinstance(links, str) or
+                (isinstance(links, list) and all(isinstance(link, str) for link in links))):
+            raise ValueError(f"Scenario step 'links' must be \"all\" or a list of globs: {step}")
+        values = step.get("set") or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"Scenario step 'set' must be a mapping of impairment values: {step}")
+        unknown = set(values) - set(IMPAIRMENT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown impairment fields {sorted(unknown)} in step: {step}")
+        for field, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                raise ValueError(f"Impairment '{field}' must be a whole number >= 0 in step: {step}")
+    
+    return {
+        "name": data.get("name") or os.path.splitext(os.path.basename(scenario_file))[0],
+        "steps": sorted(steps, key=lambda step: step["at"]),
+    }
+
+
+def select_scenario_links(links, selectors):
+    """Return the links whose source host:interface matches any of the selectors."""
+    if selectors in (None, "all"):
+        return list(links)
+    if isinstance(selectors, str):
+        selectors = [selectors]
+    return [
+        link for link in links
+        if any(
+            selector == "all"
+            or fnmatch.fnmatch(f"{link.source_host}:{link.source_interface}", selector)
+            for selector in selectors
+        )
+    ]
+
+
+def run_impairment_scenario(lab_name, scenario, log_path, stop_event=None):
+    """
+    Run an impairment scenario against the links of a lab, firing each step at its
+    planned offset from the start. Steps with the same offset are merged into one
+    batched netem call. Planned and actual fire times are written to log_path.
+    
+    Uses its own database session so it can run in a background thread.
+    """
+    stop_event = stop_event or threading.Event()
+    db = Session()
+    
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        def log(message):
+            log_file.write(f"{datetime.now():%Y-%m-%d %H:%M:%S.%f} {message}\n")
+            log_file.flush()
+        
+        try:
+            lab = db.query(Lab).filter_by(lab_name=lab_name).first()
+            links = db.query(Link).filter_by(lab_name=lab_name).all()
+            if not lab or not links:
+                log(f"No links found in lab '{lab_name}', scenario not started")
+                return
+            
+            original = {link.id: get_link_impairments(link) for link in links}
+            profiles = {profile.name: profile for profile in db.query(ImpairmentProfile).all()}
+            
+            # Group steps that fire at the same time into one batch
+            batches = []
+            for step in scenario["steps"]:
+                if batches and batches[-1][0] == step["at"]:
+                    batches[-1][1].append(step)
+                else:
+                    batches.append((step["at"], [step]))
+            
+            log(f"Scenario '{scenario['name']}' started with {len(batches)} batches")
+            start = time.monotonic()
+            
+            for planned, steps in batches:
+                remaining = start + planned - time.monotonic()
+                if remaining > 0 and stop_event.wait(remaining):
+                    log("Scenario stopped")
+                    return
+                if stop_event.is_set():
+                    log("Scenario stopped")
+                    return
+                
+                # Build the target values for every link touched by this batch
+                targets = {}
+                for step in steps:
+                    for link in select_scenario_links(links, step.get("links")):
+                        current = targets.get(link.id, (link, get_link_impairments(link)))[1]
+                        if step.get("restore"):
+                            values = dict(original[link.id])
+                        elif "profile" in step:
+                            profile = profiles.get(step["profile"])
+                            if profile is None:
+                                log(f"Unknown profile '{step['profile']}', step skipped")
+                                continue
+                            values = get_profile_impairments(profile)
+                        else:
+                            values = dict(current)
+                        values.update(step.get("set") or {})
+                        targets[link.id] = (link, values)
+                
+                fired = time.monotonic() - start
+                results = apply_impairments_bulk(
+                    lab, list(targets.values()), db_session=db, parallel=True, interactive=False
+                )
+                completed = time.monotonic() - start
+                
+                counts = {"applied": 0, "skipped": 0, "failed": 0}
+                for status, _ in results.values():
+                    counts[status] += 1
+                log(
+                    f"t={planned:.3f}s fired at {fired:.3f}s "
+                    f"(drift {(fired - planned) * 1000:+.1f} ms), completed at {completed:.3f}s: "
+                    f"applied {counts['applied']}, skipped {counts['skipped']}, "
+                    f"failed {counts['failed']}"
+                )
+                for link, _ in targets.values():
+                    status, message = results.get(link.id, ("failed", "no result"))
+                    if status == "failed":
+                        log(f"  {link.source_host}:{link.source_interface} failed: {message}")
+            
+            log(f"Scenario '{scenario['name']}' finished")
+        except Exception as e:
+            log(f"Scenario error: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+
+def start_impairment_scenario(lab_name, scenario_file):
+    """
+    Start an impairment scenario in a background thread.
+    
+    Returns:
+        Path of the scenario log file, or None if it could not be started
+    """
+    from device_actions import ensure_ssh_master
+    global active_scenario
+    
+    if active_scenario and active_scenario["thread"].is_alive():
+        print(f"Scenario '{active_scenario['name']}' is already running. Stop it first.")
+        return None
+    
+    try:
+        scenario = load_impairment_scenario(scenario_file)
+    except Exception as e:
+        print(f"Failed to load scenario: {e}")
+        return None
+    
+    lab = session.query(Lab).filter_by(lab_name=lab_name).first()
+    if not lab:
+        print(f"Lab {lab_name} not found in database.")
+        return None
+    
+    profile_names = {profile.name for profile in get_impairment_profiles()}
+    unknown_profiles = sorted({
+        step["profile"] for step in scenario["steps"]
+        if "profile" in step and step["profile"] not in profile_names
+    })
+    if unknown_profiles:
+        print(f"Failed to load scenario: unknown profiles {unknown_profiles}")
+        return None
+    
+    # Every batch of the background thread rides on an established connection
+    if not ensure_ssh_master(lab):
+        print("Could not connect to the remote containerlab host, scenario not started.")
+        return None
+    
+    log_dir = f"{lab_name}_scenario_logs"
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{scenario['name']}_{datetime.now():%Y%m%d_%H%M%S}.log")
+    
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_impairment_scenario,
+        args=(lab_name, scenario, log_path, stop_event),
+        daemon=True,
+    )
+    active_scenario = {
+        "name": scenario["name"],
+        "thread": thread,
+        "stop_event": stop_event,
+        "log_path": log_path,
+    }
+    thread.start()
+    
+    print(f"Scenario '{scenario['name']}' started with {len(scenario['steps'])} steps.")
+    print(f"Log: {log_path}")
+    return log_path
+
+
+def stop_impairment_scenario():
+    """Stop the running impairment scenario, if any."""
+    if not active_scenario or not active_scenario["thread"].is_alive():
+        print("No scenario is running.")
+        return False
+    active_scenario["stop_event"].set()
+    active_scenario["thread"].join(timeout=30)
+    print(f"Scenario '{active_scenario['name']}' stopped.")
+    return True
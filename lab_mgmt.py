@@ -10,8 +10,9 @@ This module contains all functions related to lab management including:
 
 import re
 from simple_term_menu import TerminalMenu
+from sqlalchemy.exc import IntegrityError
 from tabulate import tabulate
-from models import Host, Link, Lab, session
+from models import Host, Link, Lab, ConfigBackup, HostHealth, session
 import main
 
 
@@ -212,6 +213,12 @@ def rename_lab():
         selected_lab_obj.lab_name = new_name
         session.query(Host).filter_by(lab_name=old_name).update({Host.lab_name: new_name})
         session.query(Link).filter_by(lab_name=old_name).update({Link.lab_name: new_name})
+        session.query(ConfigBackup).filter_by(lab_name=old_name).update(
+            {ConfigBackup.lab_name: new_name}
+        )
+        session.query(HostHealth).filter_by(lab_name=old_name).update(
+            {HostHealth.lab_name: new_name}
+        )
         session.commit()
         print(f"Lab renamed from '{old_name}' to '{new_name}' successfully.")
         break
@@ -258,6 +265,8 @@ def delete_lab():
         # Delete all associated data
         session.query(Host).filter_by(lab_name=lab_name).delete()
         session.query(Link).filter_by(lab_name=lab_name).delete()
+        session.query(ConfigBackup).filter_by(lab_name=lab_name).delete()
+        session.query(HostHealth).filter_by(lab_name=lab_name).delete()
         session.delete(selected_lab_obj)
         session.commit()
         print(f"Lab '{lab_name}' and all associated data deleted successfully.")
@@ -481,7 +490,12 @@ def edit_host_fields(host, lab_name):
             continue
 
         setattr(host, attr, new_val if new_val else None)
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            print(f"Host {new_val} already exists in lab '{lab_name}'.")
+            continue
         print(f"{label} updated successfully.")
 
 
@@ -583,10 +597,60 @@ def edit_link_fields(link, lab_name):
             continue
 
         setattr(link, attr, new_val)
-        session.commit()
+        try:
+            session.commit()
+        except IntegrityError:
+            endpoint = f"{link.source_host}:{link.source_interface}"
+            session.rollback()
+            print(f"Another link in lab '{lab_name}' already uses {endpoint} as its source.")
+            continue
         print(f"{label} updated successfully.")
 
 
+def resolve_host(lab_name, name, db=None):
+    """
+    Resolve a link endpoint name to a Host in a lab.
+    
+    Uses an exact (lab_name, hostname) lookup. If that misses, a domain-qualified
+    hostname whose short name matches is accepted (r1 -> r1.lab.example.com), but
+    never a different host that merely contains the name (r1 does not match r10).
+    """
+    db = db or session
+    host = db.query(Host).filter_by(lab_name=lab_name, hostname=name).first()
+    if host:
+        return host
+    candidates = (
+        db.query(Host)
+        .filter(Host.lab_name == lab_name, Host.hostname.startswith(f"{name}.", autoescape=True))
+        .limit(2)
+        .all()
+    )
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def build_host_map(lab_name, db=None):
+    """
+    Load every host of a lab once and return a dict of endpoint name -> Host for
+    in-memory resolution during bulk link operations.
+    
+    Keys are the exact hostnames plus the short names of domain-qualified hostnames,
+    when those are unambiguous (same rules as resolve_host).
+    """
+    db = db or session
+    hosts = db.query(Host).filter_by(lab_name=lab_name).all()
+    host_map = {host.hostname: host for host in hosts}
+    
+    short_names = {}
+    for host in hosts:
+        if "." in host.hostname:
+            short_names.setdefault(host.hostname.split(".", 1)[0], []).append(host)
+    for short_name, matches in short_names.items():
+        if short_name not in host_map and len(matches) == 1:
+            host_map[short_name] = matches[0]
+    
+    return host_map
+
+
 def get_selected_lab():
     """Get the currently selected lab."""
     return selected_lab
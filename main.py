@@ -1,7 +1,16 @@
+import fnmatch
 import os
+import shlex
 import subprocess
+from datetime import datetime
 from simple_term_menu import TerminalMenu
-from models import Host, Link, Lab, session
+from tabulate import tabulate
+from models import Host, Link, Lab, ImpairmentProfile, session
+import backup_store
+import console_log
+import console_monitor
+import dynamic_inventory
+import health_check
 import imports
 import device_actions
 import lab_mgmt
@@ -121,6 +130,12 @@ def main_menu():
         exit()
 
 
+def ask_show_table():
+    """Ask whether an import should print every host and link, not just the counts."""
+    answer = input("Show the full table of hosts and links? (y/N): ")
+    return answer.strip().lower() == "y"
+
+
 def create_lab_menu():
     """Menu to create a new lab and set up imports."""
     # Create the lab first
@@ -142,7 +157,11 @@ def create_lab_menu():
     if lab.lab_type == "containerlab":
         # For containerlab, go straight to containerlab import
         print(f"Containerlab '{lab_name}' created. Now importing from containerlab topology...")
-        imports.import_from_containerlab_topology(lab_name)
+        imports.import_from_containerlab_topology(lab_name, show_table=ask_show_table())
+        # Deployed labs usually rely on automatic management addresses
+        discover = input("Discover addresses from a deployed lab with containerlab inspect? (y/n): ")
+        if discover.strip().lower() == "y":
+            imports.discover_containerlab_hosts(lab_name)
         # After import, go to lab operations
         lab_operations_menu()
     else:
@@ -154,6 +173,7 @@ def hardware_import_menu(lab_name):
     """Import menu for hardware labs."""
     options = [
         "[h] Import Hosts",
+        "[i] Batch Import Hosts (no prompts)",
         "[l] Import Links",
         "[e] Exit to Main Menu",
     ]
@@ -167,13 +187,19 @@ def hardware_import_menu(lab_name):
     if menu_entry_index == 0:
         file_based_import_hosts_menu(lab_name)
     elif menu_entry_index == 1:
-        import_links_menu(lab_name)
+        file_based_import_hosts_menu(lab_name, batch=True)
     elif menu_entry_index == 2:
+        import_links_menu(lab_name)
+    elif menu_entry_index == 3:
         main_menu()
 
 
-def file_based_import_hosts_menu(lab_name):
-    """File-based import menu for hosts - auto-detects file type."""
+def file_based_import_hosts_menu(lab_name, batch=False):
+    """
+    File-based import menu for hosts - auto-detects file type.
+    
+    In batch mode console domains are asked for once up front instead of per host.
+    """
     print("Select a file to import hosts from:")
     
     # Get list of potential import files
@@ -205,6 +231,16 @@ def file_based_import_hosts_menu(lab_name):
     
     selected_file = import_files[menu_entry_index]
     
+    if batch:
+        default_domain = input("Default console domain (Enter for none): ").strip() or None
+        domain_rules = imports.parse_domain_rules(
+            input("Per-group console domains, e.g. core=core.example.net,edge=edge.example.net: ")
+        )
+        imports.batch_import_inventory(lab_name, selected_file, default_domain, domain_rules)
+        input("Press Enter to continue...")
+        hardware_import_menu(lab_name)
+        return
+    
     # Auto-detect file type and call appropriate import function
     if selected_file.endswith(('.yml', '.yaml')):
         imports.import_inv_from_yaml(lab_name, selected_file)
@@ -275,7 +311,12 @@ def connect_host_menu():
     lab = session.query(Lab).filter_by(lab_name=current_lab).first()
     
     # First, show connection method selection
-    connection_options = ["[s] SSH Connection", "[c] Console (Telnet)", "[b] Back to Lab Operations"]
+    connection_options = [
+        "[s] SSH Connection",
+        "[c] Console (Telnet)",
+        "[r] Run Command on All Hosts",
+        "[b] Back to Lab Operations",
+    ]
     
     conn_menu = TerminalMenu(
         connection_options,
@@ -285,13 +326,36 @@ def connect_host_menu():
     )
     conn_choice = conn_menu.show()
     
-    if conn_choice == 2:  # Back to Lab Operations
+    if conn_choice == 3:  # Back to Lab Operations
         lab_operations_menu()
         return
     elif conn_choice == 0:  # SSH Connection
         show_ssh_hosts_menu(hosts, lab)
     elif conn_choice == 1:  # Console (Telnet)
         show_console_hosts_menu(hosts, lab)
+    elif conn_choice == 2:  # Command fan-out
+        run_command_menu(hosts)
+
+
+def run_command_menu(hosts):
+    """Run one command on all hosts of the lab, or the hosts matching a pattern."""
+    command = input("Enter command to run on each host: ").strip()
+    if not command:
+        connect_host_menu()
+        return
+    
+    pattern = input("Hostname pattern, e.g. spine* (press Enter for all hosts): ").strip()
+    if pattern:
+        hosts = [host for host in hosts if fnmatch.fnmatch(host.hostname, pattern)]
+        if not hosts:
+            print(f"No hosts match '{pattern}'.")
+            input("Press Enter to continue...")
+            connect_host_menu()
+            return
+    
+    device_actions.run_command_on_hosts(command, hosts)
+    input("Press Enter to continue...")
+    connect_host_menu()
 
 
 def show_ssh_hosts_menu(hosts, lab):
@@ -307,9 +371,14 @@ def show_ssh_hosts_menu(hosts, lab):
         connect_host_menu()
         return
     
+    # Status comes from the last health check, not a new probe
+    health = health_check.get_health_status(current_lab)
+    width = max(len(host.hostname) for host in ssh_hosts)
+    
     # Use paginated menu for host selection
     def format_host(idx, host):
-        return f"[{idx + 1}] {host.hostname}"
+        status = health_check.format_status(health.get(host.hostname))
+        return f"[{idx + 1}] {host.hostname:<{width}}  {status}"
     
     selected_host = paginated_menu(
         ssh_hosts,
@@ -344,9 +413,36 @@ def show_console_hosts_menu(hosts, lab):
         connect_host_menu()
         return
     
+    mode_menu = TerminalMenu(
+        [
+            "[c] Connect to One Console",
+            "[m] Monitor Multiple Consoles",
+            "[s] Search Console Logs",
+            "[b] Back",
+        ],
+        menu_cursor_style=("fg_red", "bold"),
+        menu_highlight_style=("bg_green", "bold"),
+        title=f"Console (Telnet) - Lab: {current_lab}",
+    )
+    mode = mode_menu.show()
+    if mode == 1:
+        monitor_consoles_menu(console_hosts, current_lab)
+        return
+    if mode == 2:
+        search_console_logs_menu(current_lab)
+        return
+    if mode != 0:
+        connect_host_menu()
+        return
+    
+    # Status comes from the last health check, not a new probe
+    health = health_check.get_health_status(current_lab)
+    width = max(len(host.hostname) for host in console_hosts)
+    
     # Use paginated menu for host selection
     def format_host(idx, host):
-        return f"[{idx + 1}] {host.hostname}"
+        status = health_check.format_status(health.get(host.hostname), "console_reachable")
+        return f"[{idx + 1}] {host.hostname:<{width}}  {status}"
     
     selected_host = paginated_menu(
         console_hosts,
@@ -362,6 +458,70 @@ def show_console_hosts_menu(hosts, lab):
         device_actions.connect_to_console(selected_host)
         connect_host_menu() 
 
+
+def search_console_logs_menu(current_lab):
+    """Search captured console output of the lab and show the context of a match."""
+    text = input("Search console logs for (e.g. Kernel panic): ").strip()
+    if not text:
+        connect_host_menu()
+        return
+    hostname = input("Hostname (press Enter for all hosts): ").strip() or None
+    
+    # Make sure output captured so far is indexed before searching
+    console_log.close_console_logs()
+    matches = console_log.search_console_logs(text, lab_name=current_lab, hostname=hostname)
+    if not matches:
+        print(f"No captured console output matches '{text}'.")
+        input("Press Enter to continue...")
+        connect_host_menu()
+        return
+    
+    options = [
+        f"{datetime.fromtimestamp(match['logged_at']).strftime('%Y-%m-%d %H:%M:%S')}  "
+        f"{match['hostname']}  {match['line'][:80]}"
+        for match in matches
+    ]
+    options.append("[b] Back")
+    terminal_menu = TerminalMenu(
+        options,
+        menu_cursor_style=("fg_red", "bold"),
+        menu_highlight_style=("bg_green", "bold"),
+        title=f"Console Log Matches (newest first) - '{text}'",
+    )
+    choice = terminal_menu.show()
+    if choice is not None and choice < len(matches):
+        match = matches[choice]
+        print(f"\n--- {match['hostname']} ---")
+        for line in console_log.read_context(match):
+            print(line)
+        input("\nPress Enter to continue...")
+    connect_host_menu()
+
+
+def monitor_consoles_menu(console_hosts, current_lab):
+    """Pick several console hosts and watch them together in the console monitor."""
+    health = health_check.get_health_status(current_lab)
+    terminal_menu = TerminalMenu(
+        [
+            f"{host.hostname} ({host.console}) "
+            f"{health_check.format_status(health.get(host.hostname), 'console_reachable')}"
+            for host in console_hosts
+        ],
+        multi_select=True,
+        show_multi_select_hint=True,
+        multi_select_select_on_accept=False,
+        multi_select_empty_ok=True,
+        menu_cursor_style=("fg_red", "bold"),
+        menu_highlight_style=("bg_green", "bold"),
+        title=f"Select Consoles to Monitor - Lab: {current_lab}",
+    )
+    selected = terminal_menu.show()
+    if selected:
+        console_monitor.monitor_consoles([console_hosts[i] for i in selected], current_lab)
+        input("Press Enter to continue...")
+    connect_host_menu()
+
+
 def preview_and_run_playbook_menu():
     """Menu to preview files and run ansible-playbook."""
     current_lab = lab_mgmt.get_selected_lab()
@@ -411,12 +571,23 @@ def preview_and_run_playbook_menu():
 
 
 def run_ansible_playbook(file):
-    """Function to run ansible-playbook with the selected file and arguments."""
+    """
+    Function to run ansible-playbook with the selected file and arguments.
+    
+    Unless an inventory is given with -i/--inventory, the selected lab's hosts are
+    used through the dynamic_inventory.py inventory script.
+    """
     current_lab = lab_mgmt.get_selected_lab()
     args = input("Enter any additional arguments for ansible-playbook: ")
     command = f"ansible-playbook {file} {args}"
+    env = None
     try:
-        subprocess.run(command, shell=True, check=False)
+        has_inventory = any(arg.startswith(("-i", "--inventory")) for arg in shlex.split(args))
+        if current_lab and not has_inventory:
+            inventory_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dynamic_inventory.py")
+            command = f"ansible-playbook -i {shlex.quote(inventory_script)} {file} {args}"
+            env = dict(os.environ, **{dynamic_inventory.LAB_ENV_VAR: current_lab})
+        subprocess.run(command, shell=True, check=False, env=env)
     except Exception as e:
         print(f"Failed to run ansible-playbook: {e}")
     
@@ -440,6 +611,8 @@ def config_backup_menu():
     options = [
         "[i] Backup Individual Host",
         "[a] Backup All Hosts",
+        "[q] Quick Backup All Hosts (skip unchanged)",
+        "[h] View Backup History",
     ]
     
     # Add containerlab-specific backup option if topology path is set
@@ -460,6 +633,11 @@ def config_backup_menu():
     elif menu_entry_index == 1:
         device_actions.backup_all_hosts()
         lab_operations_menu()
+    elif menu_entry_index == 2:
+        device_actions.backup_all_hosts(skip_unchanged=True)
+        lab_operations_menu()
+    elif menu_entry_index == 3:
+        backup_history_menu()
     elif (lab and lab.lab_type == "containerlab" and lab.topology_path and 
           menu_entry_index == len(options) - 2):
         device_actions.backup_to_containerlab_directory()
@@ -502,6 +680,77 @@ def single_host_backup_menu():
         # Return to the single host backup menu after execution
         single_host_backup_menu()
 
+def backup_history_menu():
+    """Menu to view the backup history of a host and export a stored version."""
+    current_lab = lab_mgmt.get_selected_lab()
+    if not current_lab:
+        print("No lab selected. Please select a lab first.")
+        config_backup_menu()
+        return
+    
+    hosts = session.query(Host).filter_by(lab_name=current_lab).all()
+    if not hosts:
+        print(f"No hosts found in lab '{current_lab}'.")
+        config_backup_menu()
+        return
+    
+    def format_host(idx, host):
+        return f"[{idx + 1}] {host.hostname}"
+    
+    selected_host = paginated_menu(
+        hosts,
+        page_size=9,
+        title=f"Backup History - Lab: {current_lab}",
+        format_func=format_host
+    )
+    
+    if selected_host is None:
+        config_backup_menu()
+        return
+    
+    history = backup_store.get_host_history(current_lab, selected_host.hostname)
+    if not history:
+        print(f"No backups recorded for {selected_host.hostname}.")
+        input("Press Enter to continue...")
+        backup_history_menu()
+        return
+    
+    last_change = backup_store.get_last_change(current_lab, selected_host.hostname)
+    if last_change:
+        print(
+            f"Last configuration change of {selected_host.hostname}: "
+            f"{last_change.created_at:%Y-%m-%d %H:%M:%S} ({last_change.content_hash[:12]})"
+        )
+    print(tabulate(
+        [
+            [
+                i,
+                record.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+                record.content_hash[:12],
+                record.size,
+                "yes" if record.changed else "no",
+            ]
+            for i, record in enumerate(history, start=1)
+        ],
+        headers=["#", "Backup Time", "Version", "Size", "Changed"],
+    ))
+    
+    choice = input("Enter # to export a version to a file (press Enter to go back): ").strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(history):
+        record = history[int(choice) - 1]
+        filepath = (
+            f"{selected_host.hostname}_{record.created_at:%Y%m%d_%H%M%S}.txt"
+        )
+        try:
+            backup_store.export_config(record, filepath)
+            print(f"Configuration exported to {filepath}")
+        except Exception as e:
+            print(f"Failed to export configuration: {e}")
+        input("Press Enter to continue...")
+    
+    backup_history_menu()
+
+
 def interface_management_menu():
     """Menu for interface management."""
     
@@ -519,9 +768,12 @@ def interface_management_menu():
         "[e] Enable or Disable Interfaces",
     ]
     
-    # Only show impairment option for containerlab
+    # Only show impairment options for containerlab
     if lab_type == "containerlab":
         options.append("[i] Impair Interfaces")
+        options.append("[w] Bulk Impair Interfaces")
+        options.append("[p] Impairment Profiles")
+        options.append("[t] Impairment Scenarios")
     
     options.append("[b] Back to Lab Operations")
     
@@ -536,6 +788,12 @@ def interface_management_menu():
         enable_disable_interfaces_menu()
     elif lab_type == "containerlab" and menu_entry_index == 1:
         impair_interfaces_menu()
+    elif lab_type == "containerlab" and menu_entry_index == 2:
+        bulk_impair_interfaces_menu()
+    elif lab_type == "containerlab" and menu_entry_index == 3:
+        impairment_profiles_menu()
+    elif lab_type == "containerlab" and menu_entry_index == 4:
+        impairment_scenarios_menu()
     elif menu_entry_index == len(options) - 1:
         lab_operations_menu()
 
@@ -625,6 +883,233 @@ def impair_interfaces_menu():
         impair_interfaces_menu()
 
 
+def prompt_impairment_values():
+    """Ask for each netem impairment value; empty input means 0, anything non-numeric is asked again."""
+    prompts = [
+        ("latency", "Enter delay value (ms)"),
+        ("jitter", "Enter jitter value (ms)"),
+        ("loss", "Enter loss value (%)"),
+        ("rate", "Enter rate value (kbit/s)"),
+        ("corruption", "Enter corruption value (%)"),
+    ]
+    values = {}
+    for field, prompt in prompts:
+        while True:
+            value = input(f"{prompt} [0]: ").strip()
+            if not value or value.isdigit():
+                values[field] = int(value or 0)
+                break
+            print(f"'{value}' is not a whole number. Enter a value, or leave empty for 0.")
+    return values
+
+
+def bulk_impair_interfaces_menu():
+    """Menu to apply the same impairments to several links in one remote round trip."""
+    
+    selected_lab = lab_mgmt.get_selected_lab()
+    if not selected_lab:
+        print("No lab selected. Please select a lab first.")
+        interface_management_menu()
+        return
+    
+    lab = session.query(Lab).filter_by(lab_name=selected_lab).first()
+    links = session.query(Link).filter_by(lab_name=selected_lab).all()
+    if not lab or not links:
+        print(f"No links found in lab '{selected_lab}'.")
+        interface_management_menu()
+        return
+    
+    options = [
+        f"{link.source_host}:{link.source_interface} -> "
+        f"{link.destination_host}:{link.destination_interface}"
+        for link in links
+    ]
+    terminal_menu = TerminalMenu(
+        options,
+        menu_cursor_style=("fg_red", "bold"),
+        menu_highlight_style=("bg_green", "bold"),
+        multi_select=True,
+        show_multi_select_hint=True,
+        title=f"Select Links to Impair - Lab: {selected_lab}",
+    )
+    selected_indexes = terminal_menu.show()
+    if not selected_indexes:
+        interface_management_menu()
+        return
+    
+    impairments = prompt_impairment_values()
+    
+    targets = [(links[i], impairments) for i in selected_indexes]
+    results = interface_actions.apply_impairments_bulk(lab, targets)
+    interface_actions.print_impairment_results(targets, results)
+    input("Press Enter to continue...")
+    interface_management_menu()
+
+
+def impairment_profiles_menu():
+    """Menu to manage impairment profiles and apply them to the selected lab."""
+    
+    selected_lab = lab_mgmt.get_selected_lab()
+    if not selected_lab:
+        print("No lab selected. Please select a lab first.")
+        interface_management_menu()
+        return
+    
+    options = [
+        "[a] Apply Profile to All Links",
+        "[s] Apply Profile to Selected Links",
+        "[v] View Profiles",
+        "[c] Create Profile",
+        "[d] Delete Profile",
+        "[b] Back to Interface Management",
+    ]
+    terminal_menu = TerminalMenu(
+        options,
+        menu_cursor_style=("fg_red", "bold"),
+        menu_highlight_style=("bg_green", "bold"),
+        title=f"Impairment Profiles - Lab: {selected_lab}",
+    )
+    menu_entry_index = terminal_menu.show()
+    
+    if menu_entry_index in (0, 1):
+        lab = session.query(Lab).filter_by(lab_name=selected_lab).first()
+        links = session.query(Link).filter_by(lab_name=selected_lab).all()
+        if not lab or not links:
+            print(f"No links found in lab '{selected_lab}'.")
+            impairment_profiles_menu()
+            return
+        
+        profile = select_impairment_profile("Select Profile to Apply")
+        if profile is None:
+            impairment_profiles_menu()
+            return
+        
+        if menu_entry_index == 1:
+            link_menu = TerminalMenu(
+                [
+                    f"{link.source_host}:{link.source_interface} -> "
+                    f"{link.destination_host}:{link.destination_interface}"
+                    for link in links
+                ],
+                menu_cursor_style=("fg_red", "bold"),
+                menu_highlight_style=("bg_green", "bold"),
+                multi_select=True,
+                show_multi_select_hint=True,
+                title=f"Select Links for Profile '{profile.name}'",
+            )
+            selected_indexes = link_menu.show()
+            if not selected_indexes:
+                impairment_profiles_menu()
+                return
+            links = [links[i] for i in selected_indexes]
+        
+        interface_actions.apply_impairment_profile(lab, links, profile)
+        input("Press Enter to continue...")
+    elif menu_entry_index == 2:
+        print(tabulate(
+            [
+                [
+                    profile.name,
+                    profile.description or "",
+                    interface_actions.describe_impairments(
+                        interface_actions.get_profile_impairments(profile)
+                    ),
+                ]
+                for profile in interface_actions.get_impairment_profiles()
+            ],
+            headers=["Profile", "Description", "Impairments"],
+        ))
+        input("Press Enter to continue...")
+    elif menu_entry_index == 3:
+        name = input("Enter profile name: ").strip()
+        if not name:
+            print("Profile name cannot be empty.")
+        elif session.query(ImpairmentProfile).filter_by(name=name).first():
+            print(f"Profile '{name}' already exists.")
+        else:
+            description = input("Enter profile description (optional): ").strip()
+            values = prompt_impairment_values()
+            session.add(ImpairmentProfile(name=name, description=description or None, **values))
+            session.commit()
+            print(f"Profile '{name}' created.")
+    elif menu_entry_index == 4:
+        profile = select_impairment_profile("Select Profile to Delete")
+        if profile is not None:
+            session.delete(profile)
+            session.commit()
+            print(f"Profile '{profile.name}' deleted.")
+    else:
+        interface_management_menu()
+        return
+    
+    impairment_profiles_menu()
+
+
+def impairment_scenarios_menu():
+    """Menu to run timed impairment scenarios in the background."""
+    
+    selected_lab = lab_mgmt.get_selected_lab()
+    if not selected_lab:
+        print("No lab selected. Please select a lab first.")
+        interface_management_menu()
+        return
+    
+    active = interface_actions.active_scenario
+    running = bool(active and active["thread"].is_alive())
+    status = f"running: {active['name']}" if running else "idle"
+    
+    options = [
+        "[r] Run Scenario File",
+        "[s] Stop Running Scenario",
+        "[v] View Scenario Log",
+        "[b] Back to Interface Management",
+    ]
+    terminal_menu = TerminalMenu(
+        options,
+        menu_cursor_style=("fg_red", "bold"),
+        menu_highlight_style=("bg_green", "bold"),
+        title=f"Impairment Scenarios - Lab: {selected_lab} ({status})",
+    )
+    menu_entry_index = terminal_menu.show()
+    
+    if menu_entry_index == 0:
+        scenario_file = imports.file_selector("Select Impairment Scenario File", ['.yml', '.yaml'])
+        if scenario_file:
+            interface_actions.start_impairment_scenario(selected_lab, scenario_file)
+        input("Press Enter to continue...")
+    elif menu_entry_index == 1:
+        interface_actions.stop_impairment_scenario()
+        input("Press Enter to continue...")
+    elif menu_entry_index == 2:
+        if not active:
+            print("No scenario has been run in this session.")
+        else:
+            try:
+                with open(active["log_path"], "r", encoding="utf-8") as f:
+                    print(f.read())
+            except FileNotFoundError:
+                print(f"Log file {active['log_path']} not found.")
+        input("Press Enter to continue...")
+    else:
+        interface_management_menu()
+        return
+    
+    impairment_scenarios_menu()
+
+
+def select_impairment_profile(title):
+    """Show a menu of impairment profiles and return the selected one, or None."""
+    profiles = interface_actions.get_impairment_profiles()
+    
+    def format_profile(idx, profile):
+        return (
+            f"[{idx + 1}] {profile.name} - "
+            f"{interface_actions.describe_impairments(interface_actions.get_profile_impairments(profile))}"
+        )
+    
+    return paginated_menu(profiles, page_size=9, title=title, format_func=format_profile)
+
+
 def select_lab_menu():
     """Menu to select a lab for operations."""
     
@@ -672,9 +1157,18 @@ def lab_operations_menu():
         "[a] View and Run Ansible Playbooks", 
         "[m] Interface Management",
         "[b] Backup Device Configurations",
+        "[t] Sync Topology from YAML",
+        "[h] Check Host Reachability",
+    ]
+    
+    # Containerlab labs can read addresses and container names from containerlab inspect
+    if lab_type == "containerlab":
+        options.append("[d] Discover Addresses (containerlab inspect)")
+    
+    options.extend([
         "[x] Back to Lab Selection",
         "[e] Exit to Main Menu",
-    ]
+    ])
     terminal_menu = TerminalMenu(
         options,
         menu_cursor_style=("fg_red", "bold"),
@@ -693,13 +1187,36 @@ def lab_operations_menu():
     elif menu_entry_index == 3:
         config_backup_menu()
     elif menu_entry_index == 4:
+        # Re-read the topology and apply only what changed
+        show_table = ask_show_table()
+        if lab_type == "containerlab":
+            imports.import_from_containerlab_topology(selected_lab, show_table=show_table, sync=True)
+        else:
+            imports.import_links_from_containerlab(selected_lab, show_table=show_table, sync=True)
+        input("Press Enter to continue...")
+        lab_operations_menu()
+    elif menu_entry_index == 5:
+        health_check_menu(selected_lab)
+    elif lab_type == "containerlab" and menu_entry_index == 6:
+        imports.discover_containerlab_hosts(selected_lab)
+        input("Press Enter to continue...")
+        lab_operations_menu()
+    elif menu_entry_index == len(options) - 2:
         lab_mgmt.set_selected_lab(None)
         select_lab_menu()
-    elif menu_entry_index == 5:
+    elif menu_entry_index == len(options) - 1:
         lab_mgmt.set_selected_lab(None)
         main_menu()
 
 
+def health_check_menu(selected_lab):
+    """Probe every host of the lab and cache the results for the host menus."""
+    ping = input("Include ICMP ping? (y/N): ").strip().lower() == "y"
+    health_check.run_health_check(selected_lab, ping=ping)
+    input("Press Enter to continue...")
+    lab_operations_menu()
+
+
 def manage_labs_menu():
     """Menu for managing labs."""
 
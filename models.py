@@ -1,4 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey
+import sys
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, Integer, String, Float, Boolean, DateTime, ForeignKey,
+    Index
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
@@ -33,10 +37,16 @@ class Host(Base):
     image_type = Column(String, nullable=False)
     lab_name = Column(String, ForeignKey('labs.lab_name'), nullable=False)
     console = Column(String, nullable=True)  # Console connection address
+    container_name = Column(String, nullable=True)  # Discovered by containerlab inspect
+    state = Column(String, nullable=True)  # Container state from containerlab inspect
     
     # Relationship
     lab = relationship("Lab", back_populates="hosts")
 
+    __table_args__ = (
+        Index('uq_hosts_lab_name_hostname', 'lab_name', 'hostname', unique=True),
+    )
+
 class Link(Base):
     __tablename__ = 'links'
     id = Column(Integer, primary_key=True)
@@ -55,4 +65,148 @@ class Link(Base):
     # Relationship
     lab = relationship("Lab", back_populates="links")
 
+    __table_args__ = (
+        Index('uq_links_lab_name_source', 'lab_name', 'source_host', 'source_interface', unique=True),
+        Index('ix_links_lab_name_destination', 'lab_name', 'destination_host', 'destination_interface'),
+    )
+
+class ImpairmentProfile(Base):
+    __tablename__ = 'impairment_profiles'
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    description = Column(String, nullable=True)
+    jitter = Column(Integer, default=0, nullable=False)
+    latency = Column(Integer, default=0, nullable=False)
+    loss = Column(Integer, default=0, nullable=False)
+    rate = Column(Integer, default=0, nullable=False)
+    corruption = Column(Integer, default=0, nullable=False)
+
+class ConfigBackup(Base):
+    __tablename__ = 'config_backups'
+    id = Column(Integer, primary_key=True)
+    hostname = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)  # sha256 of the configuration text
+    blob_path = Column(String, nullable=False)  # Compressed blob in the backup store
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    changed = Column(Boolean, default=True, nullable=False)  # False when pointing at previous blob
+    fingerprint = Column(String, nullable=True)  # Cheap device-side change marker, if supported
+    created_at = Column(DateTime, nullable=False)
+    lab_name = Column(String, ForeignKey('labs.lab_name'), nullable=False)
+
+    __table_args__ = (
+        Index('ix_config_backups_lab_host_created', 'lab_name', 'hostname', 'created_at'),
+    )
+
+class HostHealth(Base):
+    __tablename__ = 'host_health'
+    id = Column(Integer, primary_key=True)
+    hostname = Column(String, nullable=False)
+    ssh_reachable = Column(Boolean, nullable=True)  # TCP/22 on ip_address; None if not probed
+    ssh_latency = Column(Float, nullable=True)  # TCP connect time in milliseconds
+    ping_reachable = Column(Boolean, nullable=True)  # ICMP echo; None if not requested
+    console_reachable = Column(Boolean, nullable=True)  # Telnet port of console; None if unset
+    checked_at = Column(DateTime, nullable=False)
+    lab_name = Column(String, ForeignKey('labs.lab_name'), nullable=False)
+
+    __table_args__ = (
+        Index('uq_host_health_lab_name_hostname', 'lab_name', 'hostname', unique=True),
+    )
+
+def fallback_index_name(index):
+    """
+    Name of the plain index standing in for a unique index that cannot be added yet
+    (ix_hosts_lab_name_hostname, which earlier schema versions created, for hosts).
+    """
+    return "ix_" + index.name[len("uq_"):] if index.name.startswith("uq_") else index.name + "_lookup"
+
+# Profiles added when the impairment_profiles table is created
+BUILTIN_IMPAIRMENT_PROFILES = {
+    "transatlantic": {
+        "description": "Long haul WAN path", "latency": 80, "jitter": 5,
+    },
+    "lossy-wifi": {
+        "description": "Congested wireless access", "latency": 10, "jitter": 20, "loss": 3,
+    },
+    "degraded-core": {
+        "description": "Congested core link", "latency": 20, "loss": 1, "rate": 100000,
+    },
+    "clear": {
+        "description": "Remove all impairments",
+    },
+}
+
+@event.listens_for(ImpairmentProfile.__table__, "after_create")
+def seed_impairment_profiles(table, connection, **kwargs):
+    """Add the built-in profiles once, so profiles the user deletes stay deleted."""
+    connection.execute(table.insert(), [
+        dict({"jitter": 0, "latency": 0, "loss": 0, "rate": 0, "corruption": 0}, name=name, **values)
+        for name, values in BUILTIN_IMPAIRMENT_PROFILES.items()
+    ])
+
+def find_duplicate_rows(connection, table, index):
+    """Return (key values, row count) for every group of rows that would violate a unique index."""
+    columns = ", ".join(column.name for column in index.columns)
+    return connection.execute(text(
+        f"SELECT {columns}, COUNT(*) FROM {table.name} "
+        f"GROUP BY {columns} HAVING COUNT(*) > 1"
+    )).fetchall()
+
+def report_duplicate_rows(table, index, duplicates):
+    """Explain on stderr why a unique index was not added."""
+    columns = ", ".join(column.name for column in index.columns)
+    print(
+        f"Not adding unique index {index.name}: {len(duplicates)} ({columns}) values "
+        f"appear in more than one row of {table.name}:",
+        file=sys.stderr,
+    )
+    for row in duplicates[:20]:
+        print(f"  {', '.join(str(value) for value in row[:-1])} ({row[-1]} rows)", file=sys.stderr)
+    if len(duplicates) > 20:
+        print(f"  ... and {len(duplicates) - 20} more", file=sys.stderr)
+    print(
+        f"Using the non-unique index {fallback_index_name(index)} on ({columns}) meanwhile. "
+        "Rename the extra rows (Manage Labs > Edit Lab Hosts / Edit Lab Links) or delete them "
+        "from poc_helper.db, then restart to add the index.",
+        file=sys.stderr,
+    )
+
+def migrate_schema():
+    """
+    Add columns and indexes introduced after a database was created
+    (create_all only adds missing tables). Rows are never deleted here: a unique
+    index that existing duplicates would violate is left out and the conflicts
+    are reported on stderr, so output of scripts such as dynamic_inventory stays clean.
+    Until then a non-unique index on the same columns keeps lookups fast; it is
+    dropped once the unique index is in place.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(
+                        text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                    )
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    if index.unique:
+                        duplicates = find_duplicate_rows(connection, table, index)
+                        if duplicates:
+                            report_duplicate_rows(table, index, duplicates)
+                            columns = ", ".join(column.name for column in index.columns)
+                            connection.execute(text(
+                                f"CREATE INDEX IF NOT EXISTS {fallback_index_name(index)} "
+                                f"ON {table.name} ({columns})"
+                            ))
+                            continue
+                    index.create(bind=connection)
+                if index.unique:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {fallback_index_name(index)}"))
+
 Base.metadata.create_all(engine)
+migrate_schema()
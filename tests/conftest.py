@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# models opens poc_helper.db in the working directory as soon as it is imported,
+# so the whole test session runs in a scratch directory
+os.chdir(tempfile.mkdtemp(prefix="poc_helper_tests_"))
+
+
+@pytest.fixture
+def db():
+    """The shared session, with every table emptied after the test."""
+    import models
+
+    yield models.session
+    models.session.rollback()
+    with models.engine.begin() as connection:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    models.session.expire_all()
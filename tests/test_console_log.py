@@ -0,0 +1,36 @@
+import console_log
+
+
+def read_segments(log_dir):
+    segments = []
+    for segment in console_log.list_segments("lab", "r1", log_dir):
+        with open(console_log.segment_path("lab", "r1", segment, log_dir), "rb") as f:
+            segments.append(f.read())
+    return segments
+
+
+def test_rotation_splits_chunk_at_last_newline(tmp_path, monkeypatch):
+    monkeypatch.setattr(console_log, "CONSOLE_SEGMENT_SIZE", 20)
+    log_dir = str(tmp_path)
+    host_log = console_log.HostLog("lab", "r1", log_dir)
+
+    # Console output rarely ends on a newline; the segment must rotate anyway
+    host_log.append(b"first line\nsecond line\nprom", None)
+    host_log.append(b"pt> show\nmore", None)
+    host_log.close(None)
+
+    assert read_segments(log_dir) == [b"first line\nsecond line\n", b"prompt> show\nmore"]
+
+
+def test_rotation_keeps_newest_segments(tmp_path, monkeypatch):
+    monkeypatch.setattr(console_log, "CONSOLE_SEGMENT_SIZE", 10)
+    monkeypatch.setattr(console_log, "CONSOLE_MAX_SEGMENTS", 2)
+    log_dir = str(tmp_path)
+    host_log = console_log.HostLog("lab", "r1", log_dir)
+
+    for number in range(5):
+        host_log.append(f"line {number} of output\npartial".encode(), None)
+    host_log.close(None)
+
+    assert console_log.list_segments("lab", "r1", log_dir) == [5, 6]
+    assert read_segments(log_dir)[-1] == b"partial"
@@ -0,0 +1,185 @@
+from types import SimpleNamespace
+
+import imports
+from models import Host, Lab, Link
+
+
+TOPOLOGY = """\
+name: demo
+topology:
+  nodes:
+{nodes}
+  links:
+    - endpoints: ["r1:eth1", "r2:eth1"]
+"""
+
+
+def write_topology(path, node_count):
+    nodes = "\n".join(
+        f"    r{i}:\n      kind: linux\n      mgmt-ipv4: 172.20.0.{i}" for i in range(1, node_count + 1)
+    )
+    path.write_text(TOPOLOGY.format(nodes=nodes))
+    return str(path)
+
+
+def test_import_streams_all_nodes_and_links(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(imports, "IMPORT_BATCH_SIZE", 2)
+    db.add(Lab(lab_name="demo"))
+    db.commit()
+
+    imports.import_from_containerlab_topology("demo", write_topology(tmp_path / "demo.clab.yml", 5))
+
+    assert db.query(Host).filter_by(lab_name="demo").count() == 5
+    assert db.query(Link).filter_by(lab_name="demo").count() == 1
+
+
+def test_truncated_topology_leaves_nothing_pending(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(imports, "IMPORT_BATCH_SIZE", 2)
+    db.add(Lab(lab_name="demo"))
+    db.commit()
+    path = write_topology(tmp_path / "demo.clab.yml", 5)
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    # Cut the file inside the links section so several node batches were flushed
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text[:text.index("links:")] + "  links: [\n    - {endpoints: [")
+
+    imports.import_from_containerlab_topology("demo", path)
+    # An unrelated commit must not save part of the failed import
+    db.commit()
+
+    assert db.query(Host).filter_by(lab_name="demo").count() == 0
+    assert db.query(Link).filter_by(lab_name="demo").count() == 0
+
+
+def test_truncated_links_file_leaves_nothing_pending(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(imports, "IMPORT_BATCH_SIZE", 2)
+    db.add(Lab(lab_name="demo"))
+    db.commit()
+    links = "\n".join(f'    - endpoints: ["r{i}:eth1", "r{i + 1}:eth1"]' for i in range(1, 6))
+    path = tmp_path / "links.clab.yml"
+    path.write_text(f"name: demo\ntopology:\n  links:\n{links}\n    - {{endpoints: [\n")
+
+    imports.import_links_from_containerlab("demo", str(path), show_table=False)
+    db.commit()
+
+    assert db.query(Link).filter_by(lab_name="demo").count() == 0
+
+
+INVENTORY = """\
+all:
+  vars:
+    ansible_user: admin
+  children:
+    routers:
+      vars:
+        ansible_network_os: ios
+        ansible_password: router-pass
+      hosts:
+        r1:
+          ansible_host: 10.0.0.1
+      children:
+        core:
+          vars:
+            ansible_network_os: iosxr
+          hosts:
+            r1:
+    lab:
+      hosts:
+        r1:
+        r2:
+          ansible_host: 10.0.0.2
+"""
+
+
+def test_host_in_several_groups_is_imported_once(db, tmp_path):
+    db.add(Lab(lab_name="hw"))
+    db.commit()
+    path = tmp_path / "inventory.yml"
+    path.write_text(INVENTORY)
+
+    imports.import_inv_from_yaml("hw", filename=str(path), batch=True)
+
+    hosts = {host.hostname: host for host in db.query(Host).filter_by(lab_name="hw")}
+    assert sorted(hosts) == ["r1", "r2"]
+    # The child group overrides its parent; variables from every group are kept
+    assert hosts["r1"].network_os == "iosxr"
+    assert hosts["r1"].ip_address == "10.0.0.1"
+    assert hosts["r1"].username == "admin"
+    assert hosts["r1"].password == "router-pass"
+
+
+def test_host_in_several_ini_sections_is_imported_once(db, tmp_path):
+    db.add(Lab(lab_name="hw"))
+    db.commit()
+    path = tmp_path / "inventory.ini"
+    path.write_text("[routers]\nr1 = 10.0.0.1\n\n[lab]\nr1 = 10.0.0.1\nr2 = 10.0.0.2\n")
+
+    imports.import_inv_from_ini("hw", filename=str(path), batch=True)
+
+    assert sorted(host.hostname for host in db.query(Host).filter_by(lab_name="hw")) == ["r1", "r2"]
+
+
+def test_inspect_all_skips_hosts_matching_several_labs():
+    lab = SimpleNamespace(containerlab_name=None)
+    hosts = [SimpleNamespace(id=1, hostname="r1"), SimpleNamespace(id=2, hostname="r2")]
+    containers = [
+        {"name": "clab-demo-r1", "lab_name": "demo"},
+        {"name": "clab-other-r1", "lab_name": "other"},
+        {"name": "clab-demo-r2", "lab_name": "demo"},
+    ]
+
+    matches = imports.match_inspect_containers(lab, hosts, containers)
+
+    assert matches == {2: containers[2]}
+
+
+def link_row(source, destination):
+    source_host, source_interface = source.split(":")
+    destination_host, destination_interface = destination.split(":")
+    return {
+        "source_host": source_host, "source_interface": source_interface,
+        "destination_host": destination_host, "destination_interface": destination_interface,
+        "lab_name": "demo",
+    }
+
+
+def test_sync_keeps_impairments_of_reversed_rewired_link(db):
+    db.add(Lab(lab_name="demo"))
+    db.add(Link(latency=50, **link_row("r1:eth1", "r2:eth1")))
+    db.commit()
+
+    # r1:eth1 now connects to r3, and the topology lists it second
+    counts = imports.sync_containerlab_topology(
+        "demo", [], [link_row("r3:eth1", "r1:eth1")], sync_hosts=False
+    )
+    db.commit()
+
+    assert counts["links_updated"] == 1
+    link = db.query(Link).filter_by(lab_name="demo").one()
+    assert (link.source_host, link.source_interface) == ("r1", "eth1")
+    assert (link.destination_host, link.destination_interface) == ("r3", "eth1")
+    assert link.latency == 50
+
+
+def test_sync_deletes_history_of_removed_hosts(db):
+    from datetime import datetime
+    from models import ConfigBackup, HostHealth
+
+    db.add(Lab(lab_name="demo"))
+    for hostname in ("r1", "r2"):
+        db.add(Host(hostname=hostname, ip_address="", network_os="linux", username="",
+                    password="", image_type="linux", lab_name="demo"))
+        db.add(HostHealth(hostname=hostname, checked_at=datetime.now(), lab_name="demo"))
+        db.add(ConfigBackup(hostname=hostname, content_hash="x", blob_path="x", size=1,
+                            created_at=datetime.now(), lab_name="demo"))
+    db.commit()
+    keep = {"hostname": "r1", "ip_address": "", "network_os": "linux", "username": "",
+            "password": "", "image_type": "linux", "lab_name": "demo"}
+
+    imports.sync_containerlab_topology("demo", [keep], [])
+    db.commit()
+
+    assert [host.hostname for host in db.query(Host)] == ["r1"]
+    assert [record.hostname for record in db.query(HostHealth)] == ["r1"]
+    assert [record.hostname for record in db.query(ConfigBackup)] == ["r1"]
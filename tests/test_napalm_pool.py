@@ -0,0 +1,69 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import device_actions
+
+
+class FakeDevice:
+    def __init__(self, **kwargs):
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def is_alive(self):
+        return {"is_alive": not self.closed}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(device_actions, "get_napalm_driver_class", lambda name: FakeDevice)
+    monkeypatch.setattr(device_actions, "NAPALM_IDLE_TIMEOUT", -1)
+    yield device_actions.napalm_pool
+    device_actions.close_napalm_sessions()
+
+
+HOST = SimpleNamespace(lab_name="lab", hostname="r1", ip_address="10.0.0.1",
+                       username="admin", password="admin")
+
+
+def test_eviction_skips_session_in_use(pool):
+    with device_actions.napalm_session(HOST, "ios", timeout=1) as device:
+        device_actions.evict_idle_napalm_sessions()
+        assert not device.closed
+        assert ("lab", "r1") in pool
+
+
+def test_session_held_by_stuck_job_times_out(pool):
+    entered = threading.Event()
+    release = threading.Event()
+
+    def stuck_job():
+        with device_actions.napalm_session(HOST, "ios", timeout=1):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=stuck_job)
+    thread.start()
+    entered.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            with device_actions.napalm_session(HOST, "ios", timeout=0.2):
+                pass
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_evicted_entry_is_not_reused(pool):
+    with device_actions.napalm_session(HOST, "ios", timeout=1) as first:
+        pass
+    # The session goes idle and is evicted; the next caller opens a new one
+    with device_actions.napalm_session(HOST, "ios", timeout=1) as second:
+        assert first.closed
+        assert second is not first
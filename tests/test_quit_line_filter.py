@@ -0,0 +1,44 @@
+import pytest
+
+from device_actions import QuitLineFilter
+
+
+@pytest.fixture
+def line_filter():
+    return QuitLineFilter()
+
+
+def feed_all(line_filter, chunks):
+    sent = b""
+    for chunk in chunks:
+        forward, quit_typed = line_filter.feed(chunk)
+        sent += forward
+        if quit_typed:
+            return sent, True
+    return sent, False
+
+
+def test_quit_typed_key_by_key_is_never_sent(line_filter):
+    assert feed_all(line_filter, [b"Q", b"U", b"I", b"T", b"\r"]) == (b"", True)
+
+
+def test_held_prefix_is_forwarded_once_it_cannot_match(line_filter):
+    assert feed_all(line_filter, [b"QU", b"x\r"]) == (b"QUx\r", False)
+
+
+def test_quit_inside_a_command_is_sent(line_filter):
+    assert feed_all(line_filter, [b"show QUIT\r", b"QUITE\r"]) == (b"show QUIT\rQUITE\r", False)
+
+
+def test_backspace_edits_held_keys_locally(line_filter):
+    assert feed_all(line_filter, [b"Q", b"\x7f", b"ls\r"]) == (b"ls\r", False)
+
+
+@pytest.mark.parametrize("key", [b" ", b"\t", b"q"])
+def test_pager_and_completion_keys_pass_through_at_line_start(line_filter, key):
+    line_filter.feed(b"show run\r")
+    assert line_filter.feed(key) == (key, False)
+
+
+def test_lower_case_quit_is_sent_to_the_device(line_filter):
+    assert feed_all(line_filter, [b"quit\r"]) == (b"quit\r", False)
@@ -0,0 +1,89 @@
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+import device_actions
+
+
+@pytest.fixture(autouse=True)
+def short_grace(monkeypatch):
+    monkeypatch.setattr(device_actions, "JOB_SHUTDOWN_GRACE", 0.1)
+
+
+def test_slow_host_times_out_without_blocking_others():
+    release = threading.Event()
+    cancelled_seen = []
+
+    def job(host):
+        if host.hostname == "slow":
+            release.wait(5)
+            cancelled_seen.append(device_actions.job_cancelled())
+        return True
+
+    hosts = [SimpleNamespace(hostname=name) for name in ("slow", "a", "b", "c")]
+    start = time.monotonic()
+    results = device_actions.run_host_jobs(hosts, job, max_workers=2, timeout=0.5)
+    elapsed = time.monotonic() - start
+    release.set()
+
+    by_host = {result["hostname"]: result for result in results}
+    assert by_host["slow"]["success"] is False
+    assert by_host["slow"]["error"] == "timed out after 0.5s"
+    assert all(by_host[name]["success"] for name in ("a", "b", "c"))
+    assert elapsed < 2
+
+    time.sleep(0.1)
+    assert cancelled_seen == [True]
+
+
+def test_timed_out_backup_does_not_write_file(tmp_path, monkeypatch):
+    release = threading.Event()
+    finished = threading.Event()
+
+    class SlowDevice:
+        def get_config(self):
+            release.wait(5)
+            return {"running": "hostname r1\n"}
+
+    @contextmanager
+    def fake_session(host, driver, timeout=None):
+        try:
+            yield SlowDevice()
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(device_actions, "napalm_session", fake_session)
+    path = tmp_path / "startup-config.cfg"
+    host = SimpleNamespace(hostname="r1", network_os="ios")
+
+    results = device_actions.run_host_jobs(
+        [host], lambda h: device_actions.backup_host_config_to_file(h, str(path)), timeout=0.3
+    )
+    release.set()
+    finished.wait(5)
+    time.sleep(0.1)
+
+    assert results[0]["error"] == "timed out after 0.3s"
+    assert not path.exists()
+
+
+def test_wait_for_running_returns_after_overrunning_jobs():
+    release = threading.Event()
+    finished = []
+
+    def job(host):
+        release.wait(5)
+        finished.append(host.hostname)
+        return True
+
+    timer = threading.Timer(0.5, release.set)
+    timer.start()
+    results = device_actions.run_host_jobs(
+        [SimpleNamespace(hostname="slow")], job, timeout=0.2, wait_for_running=True
+    )
+
+    assert results[0]["error"] == "timed out after 0.2s"
+    assert finished == ["slow"]
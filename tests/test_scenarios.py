@@ -0,0 +1,35 @@
+import pytest
+
+import interface_actions
+
+
+def write_scenario(tmp_path, steps):
+    path = tmp_path / "scenario.yml"
+    path.write_text(f"name: test\nsteps:\n{steps}")
+    return str(path)
+
+
+def test_scenario_steps_are_sorted_by_time(tmp_path):
+    path = write_scenario(tmp_path, (
+        "  - {at: 30, links: all, restore: true}\n"
+        "  - {at: 0, links: ['r1:*'], set: {latency: 50}}\n"
+    ))
+
+    scenario = interface_actions.load_impairment_scenario(path)
+
+    assert [step["at"] for step in scenario["steps"]] == [0.0, 30.0]
+
+
+@pytest.mark.parametrize("step", [
+    "{at: 0, set: {latency: fast}}",
+    "{at: 0, set: {latency: -5}}",
+    "{at: 0, set: {delay: 5}}",
+    "{at: 0, set: [latency, 5]}",
+    "{at: soon, set: {loss: 1}}",
+    "{at: 0, links: 5, set: {loss: 1}}",
+])
+def test_invalid_step_is_rejected_at_load(tmp_path, step):
+    path = write_scenario(tmp_path, f"  - {{at: 0, set: {{loss: 1}}}}\n  - {step}\n")
+
+    with pytest.raises(ValueError):
+        interface_actions.load_impairment_scenario(path)
@@ -0,0 +1,43 @@
+import os
+import subprocess
+
+import topology_cache
+
+
+def fake_scp(content):
+    """Return a subprocess.run replacement that writes content to the scp target."""
+    def run(argv, **kwargs):
+        with open(argv[-1], "w", encoding="utf-8") as f:
+            f.write(content)
+        return subprocess.CompletedProcess(argv, 0, "", "")
+    return run
+
+
+def test_fetch_redownloads_missing_local_file(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    entry = {"path": "/labs/lab.clab.yml", "mtime": 100.0, "size": 12}
+    monkeypatch.setattr(topology_cache.subprocess, "run", fake_scp("name: lab\n"))
+
+    first = topology_cache.fetch_remote_topology("user@host", entry, cache_dir=cache_dir)
+    os.unlink(first)
+
+    second = topology_cache.fetch_remote_topology("user@host", entry, cache_dir=cache_dir)
+    assert second == first
+    assert os.path.exists(second)
+    assert topology_cache.is_cached("user@host", entry, cache_dir=cache_dir)
+
+
+def test_fetch_replaces_older_version(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    old_entry = {"path": "/labs/lab.clab.yml", "mtime": 100.0, "size": 12}
+    new_entry = {"path": "/labs/lab.clab.yml", "mtime": 200.0, "size": 14}
+    monkeypatch.setattr(topology_cache.subprocess, "run", fake_scp("name: lab\n"))
+
+    old_path = topology_cache.fetch_remote_topology("user@host", old_entry, cache_dir=cache_dir)
+    new_path = topology_cache.fetch_remote_topology("user@host", new_entry, cache_dir=cache_dir)
+
+    assert os.path.exists(new_path)
+    assert not os.path.exists(old_path)
+    assert list(topology_cache.load_index(cache_dir)["files"]) == [
+        topology_cache.file_key("user@host", new_entry)
+    ]
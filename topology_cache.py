@@ -0,0 +1,206 @@
+"""
+Local cache of remote containerlab topology files for POC Helper Menu.
+
+Remote directory listings are fetched with a single SSH call that returns the
+modification time and size of every topology file, and are reused for
+LISTING_TTL seconds. Downloaded files are stored under TOPOLOGY_CACHE_DIR keyed by
+(host, path, mtime, size), so a file is only transferred again when it changed on
+the remote host. The cache is bounded by TOPOLOGY_CACHE_MAX_BYTES and
+TOPOLOGY_CACHE_MAX_FILES, evicting the least recently used copies first.
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+from device_actions import ssh_control_options
+
+
+TOPOLOGY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "poc_helper", "topologies")
+TOPOLOGY_CACHE_MAX_BYTES = 50 * 1024 * 1024
+TOPOLOGY_CACHE_MAX_FILES = 200
+# Seconds a remote directory listing is reused before SSH is asked again
+LISTING_TTL = 300
+
+
+def index_path(cache_dir=None):
+    """Return the path of the JSON index describing the cache contents."""
+    return os.path.join(cache_dir or TOPOLOGY_CACHE_DIR, "index.json")
+
+
+def load_index(cache_dir=None):
+    """Load the cache index, starting fresh if it is missing or unreadable."""
+    try:
+        with open(index_path(cache_dir), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    index.setdefault("listings", {})
+    index.setdefault("files", {})
+    return index
+
+
+def save_index(index, cache_dir=None):
+    """Atomically write the cache index."""
+    cache_dir = cache_dir or TOPOLOGY_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".index-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path(cache_dir))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def listing_key(remote_target, remote_path):
+    """Return the index key for a remote directory listing."""
+    return f"{remote_target}:{remote_path}"
+
+
+def file_key(remote_target, entry):
+    """Return the cache key for one version of a remote file."""
+    identity = f"{remote_target}:{entry['path']}:{entry['mtime']}:{entry['size']}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def parse_listing(output):
+    """Parse `find -printf '%T@ %s %p'` output into file entries."""
+    entries = []
+    for line in output.splitlines():
+        parts = line.strip().split(" ", 2)
+        if len(parts) != 3:
+            continue
+        try:
+            entries.append({"path": parts[2], "mtime": float(parts[0]), "size": int(parts[1])})
+        except ValueError:
+            continue
+    return sorted(entries, key=lambda entry: entry["path"])
+
+
+def list_remote_topologies(remote_target, remote_path, refresh=False, cache_dir=None):
+    """
+    Return the topology YAML files in remote_path with their mtime and size.
+
+    A listing younger than LISTING_TTL is served from the cache without SSH unless
+    refresh is set.
+
+    Returns:
+        (entries, fetched_at) tuple, or (None, None) if the remote listing failed
+    """
+    index = load_index(cache_dir)
+    key = listing_key(remote_target, remote_path)
+    listing = index["listings"].get(key)
+    if listing and not refresh and time.time() - listing["fetched_at"] < LISTING_TTL:
+        return listing["files"], listing["fetched_at"]
+
+    # One round trip: names, sizes and mtimes of the top-level YAML files
+    find_command = (
+        f"find {shlex.quote(remote_path)} -maxdepth 1 -type f "
+        f"\\( -name '*.yml' -o -name '*.yaml' \\) -printf '%T@ %s %p\\n' 2>/dev/null"
+    )
+    result = subprocess.run(
+        ["ssh", *ssh_control_options(remote_target), remote_target, find_command],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(f"Failed to scan remote path: {result.stderr.strip()}")
+        return None, None
+
+    entries = parse_listing(result.stdout)
+    fetched_at = time.time()
+    index["listings"][key] = {"fetched_at": fetched_at, "files": entries}
+    save_index(index, cache_dir)
+    return entries, fetched_at
+
+
+def is_cached(remote_target, entry, cache_dir=None, index=None):
+    """Return True if this version of the remote file is already in the cache."""
+    index = index or load_index(cache_dir)
+    record = index["files"].get(file_key(remote_target, entry))
+    return bool(record) and os.path.exists(record["local_path"])
+
+
+def fetch_remote_topology(remote_target, entry, cache_dir=None):
+    """
+    Return a local copy of a remote topology file, downloading it only if this
+    (host, path, mtime, size) version is not cached yet.
+
+    Returns:
+        Local file path, or None if the download failed
+    """
+    cache_dir = cache_dir or TOPOLOGY_CACHE_DIR
+    index = load_index(cache_dir)
+    key = file_key(remote_target, entry)
+    record = index["files"].get(key)
+
+    if record and os.path.exists(record["local_path"]):
+        record["last_used"] = time.time()
+        save_index(index, cache_dir)
+        return record["local_path"]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    local_path = os.path.join(cache_dir, f"{key[:16]}-{os.path.basename(entry['path'])}")
+    tmp_path = f"{local_path}.part"
+    result = subprocess.run(
+        ["scp", "-q", *ssh_control_options(remote_target),
+         f"{remote_target}:{entry['path']}", tmp_path],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(f"Failed to download remote file: {result.stderr.strip()}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return None
+    os.replace(tmp_path, local_path)
+
+    # Older versions of the same remote file are superseded by this download
+    # (a stale record for this very version points at the file just written)
+    for old_key, old_record in list(index["files"].items()):
+        if old_key == key:
+            continue
+        if old_record["remote_target"] == remote_target and old_record["remote_path"] == entry["path"]:
+            remove_cached_file(index, old_key)
+
+    index["files"][key] = {
+        "remote_target": remote_target,
+        "remote_path": entry["path"],
+        "mtime": entry["mtime"],
+        "size": entry["size"],
+        "local_path": local_path,
+        "last_used": time.time(),
+    }
+    evict_topology_cache(index, keep=key)
+    save_index(index, cache_dir)
+    return local_path
+
+
+def remove_cached_file(index, key):
+    """Drop a cached file and its index record."""
+    record = index["files"].pop(key, None)
+    if record and os.path.exists(record["local_path"]):
+        os.unlink(record["local_path"])
+
+
+def evict_topology_cache(index, max_bytes=None, max_files=None, keep=None):
+    """Remove least recently used files, except keep, until the cache is within its limits."""
+    max_bytes = TOPOLOGY_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    max_files = TOPOLOGY_CACHE_MAX_FILES if max_files is None else max_files
+
+    by_age = sorted(index["files"].items(), key=lambda item: item[1]["last_used"])
+    total_bytes = sum(record["size"] for _, record in by_age)
+    total_files = len(by_age)
+    for key, record in by_age:
+        if total_bytes <= max_bytes and total_files <= max_files:
+            break
+        if key == keep:
+            continue
+        remove_cached_file(index, key)
+        total_bytes -= record["size"]
+        total_files -= 1